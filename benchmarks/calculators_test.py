@@ -0,0 +1,149 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from jira_agile_metrics.calculators.cfd import calculate_cfd_data
+from jira_agile_metrics.calculators.cycletime import CycleTimeCalculator
+from jira_agile_metrics.calculators.forecast import (
+    burnup_monte_carlo,
+    burnup_monte_carlo_summary,
+    calculate_daily_throughput,
+    throughput_sampler,
+)
+from jira_agile_metrics.calculators.progressreport import (
+    Epic,
+    Team,
+    forecast_to_complete,
+)
+from jira_agile_metrics.calculators.throughput import calculate_throughput
+from jira_agile_metrics.querymanager import QueryManager
+from jira_agile_metrics.utils import breakdown_by_month, write_json_rows
+
+from .conftest import NOW
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(scope="session")
+def daily_throughput(cycle_data, settings):
+    done = cycle_data[settings["done_column"]]
+    return calculate_daily_throughput(
+        cycle_data, settings["done_column"], done.min(), done.max()
+    )
+
+
+def test_calculate_cycle_times(benchmark, size, jira, settings):
+    def run():
+        # A new query manager each time, so nothing is cached between rounds
+        query_manager = QueryManager(jira, settings)
+        return CycleTimeCalculator(query_manager, settings, {}).run(now=NOW)
+
+    data = benchmark.pedantic(run, rounds=3, iterations=1)
+    assert len(data) == size
+
+
+def test_calculate_cfd_data(benchmark, size, cycle_data, settings):
+    cycle_names = [s["name"] for s in settings["cycle"]]
+    data = benchmark(calculate_cfd_data, cycle_data, cycle_names)
+    assert data[cycle_names[0]].max() == size
+
+
+def test_calculate_throughput(benchmark, size, cycle_data):
+    data = benchmark(calculate_throughput, cycle_data, "1D")
+    assert data["count"].sum() == cycle_data["completed_timestamp"].count()
+
+
+def test_breakdown_by_month(benchmark, size, cycle_data, settings):
+    started = cycle_data[cycle_data[settings["committed_column"]].notnull()]
+    data = benchmark(
+        breakdown_by_month,
+        started,
+        settings["committed_column"],
+        settings["done_column"],
+        "key",
+        "issue_type",
+    )
+    assert len(data.index) > 0
+
+
+def test_write_json_rows(benchmark, size, cycle_data, settings, tmp_path):
+    columns = ["key", "url", "summary"] + [
+        s["name"] for s in settings["cycle"]
+    ]
+    output_file = str(tmp_path / "cycletime.json")
+
+    benchmark(write_json_rows, output_file, columns, cycle_data, columns)
+    assert (tmp_path / "cycletime.json").stat().st_size > 0
+
+
+def test_burnup_monte_carlo(benchmark, size, daily_throughput):
+    start_value = size // 2
+    sampler = throughput_sampler(daily_throughput, start_value, size)
+
+    data = benchmark.pedantic(
+        burnup_monte_carlo,
+        kwargs=dict(
+            start_value=start_value,
+            target_value=size,
+            start_date=daily_throughput.index.max(),
+            frequency=daily_throughput.index.freq,
+            draw_sample=sampler,
+            trials=100,
+        ),
+        rounds=3,
+        iterations=1,
+    )
+    assert len(data.columns) == 100
+
+
+def test_burnup_monte_carlo_summary(benchmark, size, daily_throughput):
+    data = benchmark.pedantic(
+        burnup_monte_carlo_summary,
+        kwargs=dict(
+            start_value=size // 2,
+            target_value=size,
+            start_date=daily_throughput.index.max(),
+            frequency=daily_throughput.index.freq,
+            samples=daily_throughput["count"].values,
+            trials=10000,
+        ),
+        rounds=3,
+        iterations=1,
+    )
+    assert data.trials == 10000
+
+
+def test_forecast_to_complete(benchmark, size, cycle_data, settings):
+    weekly = calculate_throughput(cycle_data, "1W")["count"].tolist()
+    team = Team("Team 1", wip=2, sampler=lambda: random.choice(weekly))
+
+    # One epic per hundred issues, each partly done
+    rng = np.random.default_rng(size)
+    epics = [
+        Epic(
+            key="E-%d" % i,
+            summary="Epic %d" % i,
+            status="in-progress",
+            resolution=None,
+            resolution_date=None,
+            min_stories=10,
+            max_stories=20,
+            team_name=team.name,
+            deadline=None,
+            team=team,
+            stories_raised=10,
+            stories_done=int(rng.integers(0, 10)),
+        )
+        for i in range(max(size // 100, 1))
+    ]
+
+    benchmark.pedantic(
+        forecast_to_complete,
+        args=(team, epics, settings["quantiles"]),
+        kwargs=dict(trials=100, now=pd.Timestamp(NOW)),
+        rounds=3,
+        iterations=1,
+    )
+    assert all(e.forecast is not None for e in epics)
@@ -0,0 +1,63 @@
+import pytest
+
+from jira_agile_metrics.calculators.ageingwip import AgeingWIPChartCalculator
+from jira_agile_metrics.calculators.burnup import BurnupCalculator
+from jira_agile_metrics.calculators.cfd import CFDCalculator
+from jira_agile_metrics.calculators.cycletime import CycleTimeCalculator
+from jira_agile_metrics.calculators.forecast import BurnupForecastCalculator
+from jira_agile_metrics.calculators.histogram import HistogramCalculator
+from jira_agile_metrics.calculators.impediments import ImpedimentsCalculator
+from jira_agile_metrics.calculators.netflow import NetFlowChartCalculator
+from jira_agile_metrics.calculators.percentiles import PercentilesCalculator
+from jira_agile_metrics.calculators.scatterplot import ScatterplotCalculator
+from jira_agile_metrics.calculators.throughput import ThroughputCalculator
+from jira_agile_metrics.calculators.wip import WIPChartCalculator
+from jira_agile_metrics.utils import set_chart_context
+
+pytest.importorskip("pytest_benchmark")
+
+# In the order they need to run, as in `config.CALCULATORS`
+CALCULATORS = [
+    CycleTimeCalculator,
+    CFDCalculator,
+    ScatterplotCalculator,
+    HistogramCalculator,
+    PercentilesCalculator,
+    ThroughputCalculator,
+    BurnupCalculator,
+    WIPChartCalculator,
+    NetFlowChartCalculator,
+    AgeingWIPChartCalculator,
+    BurnupForecastCalculator,
+    ImpedimentsCalculator,
+]
+
+
+@pytest.fixture(scope="session")
+def results(size, cycle_data, settings):
+    """The results of running every calculator on the synthetic issues"""
+    set_chart_context("paper")
+
+    results = {CycleTimeCalculator: cycle_data}
+    for calculator in CALCULATORS[1:]:
+        results[calculator] = calculator(None, settings, results).run()
+    return results
+
+
+@pytest.mark.parametrize("profile", ["default", "fast"])
+@pytest.mark.parametrize("calculator", CALCULATORS)
+def test_write(
+    benchmark,
+    size,
+    calculator,
+    profile,
+    results,
+    settings,
+    monkeypatch,
+    tmp_path,
+):
+    monkeypatch.chdir(tmp_path)
+    settings = dict(settings, chart_profile=profile)
+    benchmark.pedantic(
+        calculator(None, settings, results).write, rounds=3, iterations=1
+    )
@@ -0,0 +1,156 @@
+"""Fixtures for the benchmark suite. See "Benchmarks" in the README."""
+
+import collections
+import datetime
+import math
+import os
+
+import pytest
+
+from jira_agile_metrics.calculators.cycletime import CycleTimeCalculator
+from jira_agile_metrics.config import config_to_options
+from jira_agile_metrics.conftest import (
+    FauxJIRA,
+    generate_issues,
+    synthetic_fields,
+)
+from jira_agile_metrics.querymanager import QueryManager
+
+# Number of issues to benchmark with, e.g. `BENCHMARK_SIZES=1000,1000000`
+SIZES = [
+    int(size)
+    for size in os.environ.get("BENCHMARK_SIZES", "1000,10000").split(",")
+]
+
+NOW = datetime.datetime(2019, 1, 1)
+
+CONFIG = """\
+Connection:
+    Domain: https://example.org
+
+Query: project = A
+
+Attributes:
+    Team: Team
+
+Workflow:
+    Backlog: Backlog
+    Committed: Next
+    Build: Build
+    Test:
+        - Code review
+        - QA
+    Done: Done
+
+Output:
+    Backlog column: Backlog
+    Committed column: Committed
+    Done column: Done
+
+    Cycle time data: cycletime.csv
+    CFD data: cfd.csv
+    Scatterplot data: scatterplot.csv
+    Histogram data: histogram.csv
+    Throughput data: throughput.csv
+    Percentiles data: percentiles.csv
+    Impediments data: impediments.csv
+
+    CFD chart: cfd.png
+    Scatterplot chart: scatterplot.png
+    Histogram chart: histogram.png
+    Throughput chart: throughput.png
+    Burnup chart: burnup.png
+    Burnup forecast chart: burnup-forecast.png
+    WIP chart: wip.png
+    Ageing WIP chart: ageing-wip.png
+    Net flow chart: net-flow.png
+    Impediments chart: impediments.png
+    Impediments days chart: impediments-days.png
+    Impediments status chart: impediments-status.png
+    Impediments status days chart: impediments-status-days.png
+"""
+
+# Mean time of each benchmark, by benchmark name and size
+timings = collections.defaultdict(dict)
+
+
+def pytest_generate_tests(metafunc):
+    if "size" in metafunc.fixturenames:
+        metafunc.parametrize("size", SIZES, scope="session")
+
+
+@pytest.fixture(scope="session")
+def settings():
+    return config_to_options(CONFIG)["settings"]
+
+
+@pytest.fixture(scope="session")
+def jira(size, settings, minimal_fields):
+    return FauxJIRA(
+        fields=synthetic_fields(minimal_fields),
+        issues=generate_issues(size, settings["cycle"], seed=size),
+    )
+
+
+@pytest.fixture(scope="session")
+def minimal_fields():
+    return [
+        {"id": "summary", "name": "Summary"},
+        {"id": "issuetype", "name": "Issue type"},
+        {"id": "status", "name": "Status"},
+        {"id": "resolution", "name": "Resolution"},
+        {"id": "created", "name": "Created date"},
+        {"id": "customfield_100", "name": "Flagged"},
+    ]
+
+
+@pytest.fixture(scope="session")
+def cycle_data(jira, settings):
+    return CycleTimeCalculator(QueryManager(jira, settings), settings, {}).run(
+        now=NOW
+    )
+
+
+@pytest.fixture(autouse=True)
+def record_timing(request):
+    """Remember the mean time of each benchmark for the scaling summary"""
+    yield
+
+    benchmark = request.node.funcargs.get("benchmark")
+    if benchmark is None or not benchmark.stats:
+        return
+
+    params = dict(request.node.callspec.params)
+    size = params.pop("size", None)
+    name = request.node.originalname + "".join(
+        "[%s]" % getattr(v, "__name__", v) for v in params.values()
+    )
+    timings[name][size] = benchmark.stats.stats.mean
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Show how the time taken by each benchmark grows with the number of
+    issues. An exponent of 1 means it scales linearly.
+    """
+    if not timings:
+        return
+
+    terminalreporter.section("scaling")
+    terminalreporter.write_line(
+        "%-50s %10s %12s %10s"
+        % ("benchmark", "issues", "mean (s)", "exponent")
+    )
+
+    for name, sizes in sorted(timings.items()):
+        previous = None
+        for size, mean in sorted(sizes.items()):
+            exponent = (
+                "%.2f"
+                % (math.log(mean / previous[1]) / math.log(size / previous[0]))
+                if previous and mean > 0 and previous[1] > 0
+                else ""
+            )
+            terminalreporter.write_line(
+                "%-50s %10d %12.4f %10s" % (name, size, mean, exponent)
+            )
+            previous = (size, mean)
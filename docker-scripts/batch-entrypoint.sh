@@ -1,6 +1,7 @@
 #!/bin/bash
 
 echo "Processing all .yml and .yaml files in /config"
+configs=()
 for config in $(ls /config/*) ; do
     filename=$(basename -- "$config")
 
@@ -12,7 +13,19 @@ for config in $(ls /config/*) ; do
 
     if [ "${extension}" == "yml" ] || [ "${extension}" == "yaml" ] ; then
         mkdir -p ${output}
-        rm ${output}/*
-        jira-agile-metrics -vv --output-directory ${output} $@ ${config} 2>&1 | tee ${output}/metrics.log
+        rm -f ${output}/*
+        configs+=("${config}")
     fi
-done
\ No newline at end of file
+done
+
+# Process all files in one go, so that connections and issues fetched from
+# JIRA are shared. Set BATCH_WORKERS to process several files at once, and
+# DAEMON_INTERVAL to keep refreshing the outputs every so many seconds.
+# Each file's log is written to metrics.log in its output directory. Caches
+# are kept in CACHE_DIRECTORY, as the output directories are emptied above.
+exec jira-agile-metrics -vv --output-directory /data \
+    --batch-workers ${BATCH_WORKERS:-1} \
+    --batch-log metrics.log \
+    --cache-directory ${CACHE_DIRECTORY:-/data/.cache} \
+    ${DAEMON_INTERVAL:+--daemon ${DAEMON_INTERVAL}} $@ \
+    --batch "${configs[@]}"
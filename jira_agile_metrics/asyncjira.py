@@ -0,0 +1,321 @@
+import asyncio
+import contextvars
+import email.utils
+import logging
+import random
+import threading
+import time
+
+from jira.exceptions import JIRAError
+from jira.resources import Issue
+
+from .config import ConfigError
+from .telemetry import RETRY_STATUS_CODES
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2 = True
+except ImportError:  # pragma: no cover
+    HTTP2 = False
+
+logger = logging.getLogger(__name__)
+
+# The list that `get_json()` appends (url, status code, elapsed, size) to
+# for each response, set for each call to `AsyncJIRA._run()`
+_responses = contextvars.ContextVar("responses", default=None)
+
+
+class AsyncJIRA(object):
+    """JIRA client that sends REST requests concurrently from an asyncio
+    event loop.
+
+    Implements the parts of the `jira.JIRA` interface that `QueryManager`
+    uses (`fields()`, `search_issues()` and `_get_json()`), so calculators
+    work unchanged.
+    All pages of a search are requested at once, with up to
+    `max_connections` requests in flight over a single pool of keep-alive
+    connections. HTTP/2 is used if the `h2` package is installed.
+
+    The event loop runs in a background thread, so the blocking methods can
+    be called from any thread, including query workers. Functions in
+    `response_hooks` are called with the url, status code, elapsed time and
+    size of each response, in the thread that made the call.
+
+    Requests that are rate limited or find the server unavailable are
+    retried up to `max_retries` times, waiting as long as the server asks
+    in its `Retry-After` header, or otherwise backing off exponentially
+    from `retry_delay` seconds (up to `max_retry_delay`).
+    """
+
+    max_connections = 100
+    page_size = 100
+    max_retries = 3
+    retry_delay = 1.0
+    max_retry_delay = 60.0
+
+    def __init__(
+        self,
+        options,
+        basic_auth=None,
+        proxies=None,
+        max_connections=None,
+        transport=None,
+        max_retries=None,
+    ):
+        if httpx is None:
+            raise ConfigError(
+                "The async backend requires the `httpx` package. "
+                "Install it with `pip install jira-agile-metrics[async]`."
+            ) from None
+
+        self._options = dict(options)
+        self._options.setdefault("rest_api_version", "2")
+
+        self.response_hooks = []
+
+        if max_connections:
+            self.max_connections = max_connections
+        if max_retries is not None:
+            self.max_retries = max_retries
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="async-jira", daemon=True
+        )
+        self._thread.start()
+
+        self._semaphore = None
+        self._client = self._run(
+            self._create_client(basic_auth, proxies, transport)
+        )
+
+    async def _create_client(self, basic_auth, proxies, transport):
+        self._semaphore = asyncio.Semaphore(self.max_connections)
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+
+        mounts = None
+        if proxies and transport is None:
+            mounts = {}
+            for scheme, proxy in proxies.items():
+                mounts[scheme + "://"] = httpx.AsyncHTTPTransport(
+                    proxy=proxy, limits=limits, http2=HTTP2
+                )
+
+        return httpx.AsyncClient(
+            base_url="%s/rest/api/%s/"
+            % (
+                self._options["server"].rstrip("/"),
+                self._options["rest_api_version"],
+            ),
+            auth=basic_auth,
+            verify=self._options.get("verify", True),
+            headers=self._options.get("headers"),
+            limits=limits,
+            http2=HTTP2,
+            mounts=mounts,
+            transport=transport,
+            timeout=self._options.get("timeout", 60),
+        )
+
+    def _run(self, coroutine):
+        """Run `coroutine` on the event loop and wait for its result, then
+        call the response hooks for any responses it received.
+        """
+        responses = []
+        try:
+            return asyncio.run_coroutine_threadsafe(
+                self._collect_responses(coroutine, responses), self._loop
+            ).result()
+        finally:
+            for response in responses:
+                for hook in self.response_hooks:
+                    hook(*response)
+
+    async def _collect_responses(self, coroutine, responses):
+        # Tasks started by `coroutine` inherit this context
+        _responses.set(responses)
+        return await coroutine
+
+    def close(self):
+        """Close all connections and stop the event loop"""
+        self._run(self._client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def get_json(self, path, params=None):
+        """Return the decoded JSON response for a GET request to the given
+        REST API `path` (relative to `/rest/api/<version>/`).
+        """
+        return await self.request_json("GET", path, params=params)
+
+    async def post_json(self, path, data, params=None):
+        """Return the decoded JSON response for a POST request of `data` as
+        JSON to the given REST API `path`.
+        """
+        return await self.request_json("POST", path, params=params, json=data)
+
+    async def request_json(self, method, path, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                start = self._loop.time()
+                response = await self._client.request(method, path, **kwargs)
+                elapsed = self._loop.time() - start
+
+            responses = _responses.get()
+            if responses is not None:
+                responses.append(
+                    (
+                        str(response.url),
+                        response.status_code,
+                        elapsed,
+                        len(response.content),
+                    )
+                )
+
+            if (
+                response.status_code not in RETRY_STATUS_CODES
+                or attempt == self.max_retries
+            ):
+                break
+
+            delay = self.get_retry_delay(response, attempt)
+            logger.warning(
+                "Got %d from %s, retrying in %.1f seconds",
+                response.status_code,
+                response.url,
+                delay,
+            )
+            await asyncio.sleep(delay)
+
+        if response.status_code >= 400:
+            raise JIRAError(
+                text=response.text,
+                status_code=response.status_code,
+                url=str(response.url),
+            )
+
+        return response.json()
+
+    def get_retry_delay(self, response, attempt):
+        """Return how many seconds to wait before retrying the request that
+        got `response`, the `attempt`th retry (from 0)
+        """
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = (
+                        email.utils.parsedate_to_datetime(
+                            retry_after
+                        ).timestamp()
+                        - time.time()
+                    )
+                except (TypeError, ValueError):
+                    delay = None
+
+            if delay is not None:
+                return min(max(delay, 0), self.max_retry_delay)
+
+        # Exponential backoff, with jitter so that concurrent requests do
+        # not all retry at once
+        return min(
+            self.retry_delay * 2**attempt * (1 + random.random()),
+            self.max_retry_delay,
+        )
+
+    def _get_json(self, path, params=None):
+        return self._run(self.get_json(path, params))
+
+    def _post_json(self, path, data, params=None):
+        return self._run(self.post_json(path, data, params))
+
+    def fields(self):
+        return self._run(self.get_json("field"))
+
+    def search_issues(
+        self,
+        jql_str,
+        startAt=0,
+        maxResults=50,
+        validate_query=True,
+        fields=None,
+        expand=None,
+        json_result=False,
+    ):
+        """Return a list of `jira.resources.Issue` objects for the issues
+        matching `jql_str`. As with `jira.JIRA`, a false `maxResults` fetches
+        all matching issues.
+        """
+        raw_issues = self._run(
+            self._search(
+                jql_str, startAt, maxResults, validate_query, fields, expand
+            )
+        )
+        return [Issue(self._options, None, raw=raw) for raw in raw_issues]
+
+    async def _search(
+        self, jql, start_at, max_results, validate_query, fields, expand
+    ):
+        params = {
+            "jql": jql,
+            "validateQuery": "true" if validate_query else "false",
+            "fields": ",".join(fields)
+            if isinstance(fields, (list, tuple))
+            else fields or "*all",
+        }
+        if expand:
+            params["expand"] = expand
+
+        page_size = (
+            min(max_results, self.page_size) if max_results else self.page_size
+        )
+
+        # The first page tells us how many issues there are, and how many
+        # the server is prepared to return per page. The rest of the pages
+        # are then requested concurrently.
+        first_page = await self.get_json(
+            "search", dict(params, startAt=start_at, maxResults=page_size)
+        )
+
+        issues = first_page["issues"]
+        page_size = first_page.get("maxResults") or page_size or len(issues)
+
+        end = first_page["total"]
+        if max_results:
+            end = min(end, start_at + max_results)
+
+        if page_size > 0 and len(issues) > 0:
+            pages = await asyncio.gather(
+                *[
+                    self.get_json(
+                        "search",
+                        dict(
+                            params,
+                            startAt=page_start,
+                            maxResults=min(page_size, end - page_start),
+                        ),
+                    )
+                    for page_start in range(
+                        start_at + len(issues), end, page_size
+                    )
+                ]
+            )
+
+            for page in pages:
+                issues.extend(page["issues"])
+
+        logger.debug("Fetched %d issues for `%s`", len(issues), jql)
+        return issues[: end - start_at]
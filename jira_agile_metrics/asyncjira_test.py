@@ -0,0 +1,235 @@
+import json
+import threading
+
+import pytest
+
+from .querymanager import QueryManager
+from .telemetry import QueryStats
+
+httpx = pytest.importorskip("httpx")
+
+from .asyncjira import AsyncJIRA  # noqa: E402
+
+
+def make_issue(n):
+    return {
+        "id": str(10000 + n),
+        "key": "A-%d" % n,
+        "fields": {
+            "summary": "Issue A-%d" % n,
+            "issuetype": {"name": "Story"},
+            "status": {"name": "Backlog"},
+            "resolution": None,
+            "created": "2018-01-01T01:01:01.000+0000",
+            "updated": "2018-01-02T01:01:01.000+0000",
+            "customfield_001": "Team 1",
+        },
+        "changelog": {
+            "startAt": 0,
+            "maxResults": 1,
+            "total": 1,
+            "histories": [
+                {
+                    "id": str(n),
+                    "created": "2018-01-02T01:01:01.000+0000",
+                    "items": [
+                        {
+                            "field": "status",
+                            "fromString": "Backlog",
+                            "toString": "Next",
+                        }
+                    ],
+                }
+            ],
+        },
+    }
+
+
+@pytest.fixture
+def server():
+    """A fake JIRA REST API with 250 issues, returning at most 100 issues per
+    page. Records the query parameters of each search request.
+    """
+    issues = [make_issue(n) for n in range(250)]
+    requests = []
+    lock = threading.Lock()
+
+    def handler(request):
+        if request.url.path == "/rest/api/2/field":
+            return httpx.Response(
+                200,
+                json=[
+                    {"id": "summary", "name": "Summary"},
+                    {"id": "status", "name": "Status"},
+                    {"id": "customfield_001", "name": "Team"},
+                ],
+            )
+
+        if request.url.path == "/rest/api/2/search":
+            params = request.url.params
+            with lock:
+                requests.append(dict(params))
+
+            if params["jql"] == "bad":
+                return httpx.Response(400, json={"errorMessages": ["Bad"]})
+
+            start_at = int(params["startAt"])
+            max_results = min(int(params["maxResults"]), 100)
+            return httpx.Response(
+                200,
+                json={
+                    "startAt": start_at,
+                    "maxResults": max_results,
+                    "total": len(issues),
+                    "issues": issues[start_at : start_at + max_results],
+                },
+            )
+
+        return httpx.Response(404)
+
+    transport = httpx.MockTransport(handler)
+    transport.requests = requests
+    return transport
+
+
+@pytest.fixture
+def jira(server):
+    client = AsyncJIRA({"server": "https://example.org"}, transport=server)
+    yield client
+    client.close()
+
+
+def test_fields(jira):
+    assert jira.fields() == [
+        {"id": "summary", "name": "Summary"},
+        {"id": "status", "name": "Status"},
+        {"id": "customfield_001", "name": "Team"},
+    ]
+
+
+def test_get_json(jira):
+    assert jira._get_json("field") == jira.fields()
+
+
+def test_search_issues_fetches_all_pages(jira, server):
+    issues = jira.search_issues(
+        "project=A", maxResults=False, expand="changelog", fields="summary"
+    )
+
+    assert [i.key for i in issues] == ["A-%d" % n for n in range(250)]
+    assert issues[0].fields.summary == "Issue A-0"
+    assert issues[0].changelog.histories[0].items[0].toString == "Next"
+
+    assert sorted(int(r["startAt"]) for r in server.requests) == [0, 100, 200]
+    assert all(r["expand"] == "changelog" for r in server.requests)
+    assert all(r["fields"] == "summary" for r in server.requests)
+
+
+def test_search_issues_max_results(jira, server):
+    issues = jira.search_issues("project=A", maxResults=120)
+
+    assert len(issues) == 120
+    assert sorted(
+        (int(r["startAt"]), int(r["maxResults"])) for r in server.requests
+    ) == [(0, 100), (100, 20)]
+
+
+def test_search_issues_error(jira):
+    from jira.exceptions import JIRAError
+
+    with pytest.raises(JIRAError) as e:
+        jira.search_issues("bad")
+
+    assert e.value.status_code == 400
+    assert json.loads(e.value.text) == {"errorMessages": ["Bad"]}
+
+
+def test_query_manager(jira):
+    qm = QueryManager(jira, {"attributes": {"Team": "Team"}})
+
+    issues = qm.find_issues("project=A")
+    assert len(issues) == 250
+    assert qm.resolve_attribute_value(issues[0], "Team") == "Team 1"
+    assert [
+        (c.change, c.from_string, c.to_string)
+        for c in qm.iter_changes(issues[0], ["status"])
+    ] == [("status", None, "Backlog"), ("status", "Backlog", "Next")]
+
+
+def test_response_hooks(jira):
+    responses = []
+
+    def hook(url, status_code, elapsed, size):
+        responses.append((url, status_code, threading.current_thread()))
+        assert elapsed >= 0
+        assert size > 0
+
+    jira.response_hooks.append(hook)
+    jira.search_issues("project=A", maxResults=False)
+
+    assert len(responses) == 3
+    assert all("/rest/api/2/search?" in url for url, _, _ in responses)
+    assert all(status == 200 for _, status, _ in responses)
+
+    # Hooks are called in the thread that made the call
+    assert all(t is threading.current_thread() for _, _, t in responses)
+
+    from jira.exceptions import JIRAError
+
+    with pytest.raises(JIRAError):
+        jira.search_issues("bad")
+    assert responses[-1][1] == 400
+
+
+def test_retries_rate_limited_requests():
+    from jira.exceptions import JIRAError
+
+    statuses = {"field": [429, 503, 200], "search": [503] * 3}
+    requests = []
+
+    def handler(request):
+        name = request.url.path.split("/")[-1]
+        requests.append(name)
+        status = statuses[name].pop(0) if statuses[name] else 503
+        if status == 200:
+            return httpx.Response(200, json=[])
+        return httpx.Response(status, headers={"Retry-After": "0"})
+
+    client = AsyncJIRA(
+        {"server": "https://example.org"},
+        transport=httpx.MockTransport(handler),
+        max_retries=2,
+    )
+    responses = []
+    client.response_hooks.append(
+        lambda url, status_code, elapsed, size: responses.append(status_code)
+    )
+    stats = QueryStats("project=A")
+    client.response_hooks.append(stats.record_response)
+
+    try:
+        assert client.fields() == []
+        assert responses == [429, 503, 200]
+
+        # Give up after `max_retries` retries
+        with pytest.raises(JIRAError) as e:
+            client.search_issues("project=A")
+        assert e.value.status_code == 503
+        assert requests.count("search") == 3
+
+        # The request given up on is not counted as a retry
+        assert stats.retries == 4
+    finally:
+        client.close()
+
+
+def test_retry_delay(jira):
+    response = httpx.Response(429, headers={"Retry-After": "7"})
+    assert jira.get_retry_delay(response, 0) == 7
+
+    response = httpx.Response(429, headers={"Retry-After": "3600"})
+    assert jira.get_retry_delay(response, 0) == jira.max_retry_delay
+
+    response = httpx.Response(503)
+    assert 1 <= jira.get_retry_delay(response, 0) <= 2
+    assert 4 <= jira.get_retry_delay(response, 2) <= 8
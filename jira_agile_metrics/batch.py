@@ -0,0 +1,292 @@
+import concurrent.futures
+import json
+import logging
+import os
+
+from .calculator import calculate, write_outputs
+from .check import check_options, print_problems
+from .config import config_to_options, CALCULATORS, ConfigError
+from .daemon import DaemonTarget
+from .querymanager import IssueStore, QueryManager
+from .utils import thread_name
+
+logger = logging.getLogger(__name__)
+
+
+class BatchJob(object):
+    """A configuration file to process in a batch"""
+
+    def __init__(self, config_file, output_directory):
+        self.config_file = config_file
+        self.name = os.path.splitext(os.path.basename(config_file))[0]
+        self.output_directory = os.path.join(output_directory, self.name)
+
+        self.options = None
+        self.connection = None
+        self.query_manager = None
+        self.calculators = None
+        self.report = None
+        self.error = None
+
+
+def run_batch(
+    config_files,
+    connect,
+    output_directory=".",
+    workers=1,
+    override=None,
+    check=False,
+    run_daemon=None,
+    log_file=None,
+):
+    """Process each of `config_files` in one process. The outputs of each
+    configuration file are written to a directory under `output_directory`
+    named after the file, e.g. `team-a.yml` to `<output_directory>/team-a`.
+
+    `connect` is called with the options of a configuration file to create
+    a JIRA (or Trello) client. Configuration files with the same connection
+    settings share one client, field list and issue store, so that issues
+    fetched for one are not fetched again for another. `override`, if
+    given, is called with the options of each file, e.g. to apply command
+    line arguments.
+
+    Up to `workers` configuration files are calculated at the same time.
+    Files are written one configuration at a time, since the calculators
+    write to the current working directory. If `check` is true, the files
+    are checked with `check.check_config()` instead.
+
+    If `run_daemon` is given, it is called with a list of
+    `daemon.DaemonTarget`, one for each configuration file, instead of
+    calculating the metrics once, e.g. to keep refreshing them with a
+    `daemon.Daemon`.
+
+    If `log_file` is given, the messages logged for each configuration file
+    are also written to a file of that name in its output directory.
+
+    Returns a list of the configuration files that failed.
+    """
+
+    output_directory = os.path.abspath(output_directory)
+    jobs = [
+        BatchJob(config_file, output_directory) for config_file in config_files
+    ]
+
+    log_handlers = add_log_handlers(jobs, log_file) if log_file else []
+
+    connections = {}
+    for job in jobs:
+        try:
+            job.options = load_options(job.config_file)
+            if override is not None:
+                override(job.options)
+            resolve_output_paths(job)
+            job.connection = get_connection(connections, job.options, connect)
+        except Exception as e:
+            fail(job, e)
+
+    try:
+        if check:
+            for job in jobs:
+                if job.error is None:
+                    check_job(job)
+        elif run_daemon is not None:
+            targets = []
+            for job in jobs:
+                if job.error is None:
+                    try:
+                        targets.append(daemon_target(job))
+                    except Exception as e:
+                        fail(job, e)
+            run_daemon(targets)
+        else:
+            calculate_jobs([job for job in jobs if job.error is None], workers)
+            for job in jobs:
+                if job.error is None:
+                    write_job(job)
+    finally:
+        for jira, _ in connections.values():
+            if hasattr(jira, "close"):
+                jira.close()
+
+        for handler in log_handlers:
+            logging.getLogger().removeHandler(handler)
+            handler.close()
+
+    failed = [job.config_file for job in jobs if job.error is not None]
+    logger.info(
+        "Processed %d configuration files, %d failed",
+        len(jobs),
+        len(failed),
+    )
+    return failed
+
+
+def load_options(config_file):
+    logger.debug("Parsing options from %s", config_file)
+    with open(config_file) as config:
+        return config_to_options(
+            config.read(), cwd=os.path.dirname(os.path.abspath(config_file))
+        )
+
+
+def resolve_output_paths(job):
+    """Make the paths of files read back when calculating the metrics of
+    `job` absolute, in its output directory, or for caches, in a directory
+    named after the job under the `cache_directory`, if one is set. The
+    metrics are calculated before changing into the output directory to
+    write them.
+    """
+    settings = job.options["settings"]
+    if settings.get("cycle_time_cache"):
+        settings["cycle_time_cache"] = os.path.join(
+            os.path.join(settings["cache_directory"], job.name)
+            if settings.get("cache_directory")
+            else job.output_directory,
+            settings["cycle_time_cache"],
+        )
+
+
+class JobLogFilter(logging.Filter):
+    """Passes the log records of the batch job `name`, which are logged
+    from threads named after the job (see `utils.thread_name()`)
+    """
+
+    def __init__(self, name):
+        super().__init__()
+        self.job_name = name
+
+    def filter(self, record):
+        return record.threadName == self.job_name
+
+
+def add_log_handlers(jobs, log_file):
+    """Log the messages of each job to `log_file` in its output directory.
+    Returns the handlers added to the root logger.
+    """
+
+    handlers = []
+    for job in jobs:
+        os.makedirs(job.output_directory, exist_ok=True)
+        handler = logging.FileHandler(
+            os.path.join(job.output_directory, log_file)
+        )
+        handler.setFormatter(
+            logging.Formatter(
+                "[%(asctime)s %(levelname)s] %(message)s",
+                datefmt="%Y-%m-%d %H:%M:%S",
+            )
+        )
+        handler.addFilter(JobLogFilter(job.name))
+        logging.getLogger().addHandler(handler)
+        handlers.append(handler)
+    return handlers
+
+
+def get_connection(connections, options, connect):
+    """Return a tuple of a client and an `IssueStore` for the connection
+    settings in `options`, reusing those in `connections` if another
+    configuration file has the same settings.
+    """
+
+    key = json.dumps(
+        [
+            options["connection"],
+            options["settings"]["type_mapping"]
+            if options["connection"]["type"] == "trello"
+            else None,
+        ],
+        sort_keys=True,
+        default=str,
+    )
+
+    if key not in connections:
+        connections[key] = (connect(options), IssueStore())
+
+    return connections[key]
+
+
+def calculate_jobs(jobs, workers):
+    """Run the calculators for each job, up to `workers` at a time"""
+
+    def run(job):
+        with thread_name(job.name):
+            logger.info("Calculating metrics for %s", job.config_file)
+
+            jira, issue_store = job.connection
+            settings = job.options["settings"]
+
+            job.query_manager = QueryManager(
+                jira, settings, issue_store=issue_store
+            )
+            job.calculators, _, job.report = calculate(
+                CALCULATORS, job.query_manager, settings
+            )
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=workers or 1
+    ) as executor:
+        futures = {executor.submit(run, job): job for job in jobs}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                fail(futures[future], e)
+
+
+def write_job(job):
+    """Write the outputs of a job to its output directory"""
+
+    with thread_name(job.name):
+        logger.info(
+            "Writing outputs for %s to %s", job.name, job.output_directory
+        )
+
+        cwd = os.getcwd()
+        try:
+            os.makedirs(job.output_directory, exist_ok=True)
+            os.chdir(job.output_directory)
+            write_outputs(
+                job.calculators,
+                job.report,
+                job.query_manager,
+                job.options["settings"],
+            )
+        except Exception as e:
+            fail(job, e)
+        finally:
+            os.chdir(cwd)
+
+
+def daemon_target(job):
+    jira, issue_store = job.connection
+    settings = job.options["settings"]
+
+    job.query_manager = QueryManager(jira, settings, issue_store=issue_store)
+    return DaemonTarget(
+        job.query_manager, settings, job.output_directory, name=job.name
+    )
+
+
+def check_job(job):
+    jira, issue_store = job.connection
+
+    try:
+        with thread_name(job.name):
+            problems = check_options(jira, job.options, issue_store)
+    except Exception as e:
+        fail(job, e)
+        return
+
+    if print_problems(job.config_file, problems) != 0:
+        job.error = "%d problem(s) found" % len(problems)
+
+
+def fail(job, error):
+    job.error = error
+    with thread_name(job.name):
+        logger.error(
+            "Processing %s failed: %s",
+            job.config_file,
+            error,
+            exc_info=None if isinstance(error, ConfigError) else error,
+        )
@@ -0,0 +1,167 @@
+import logging
+
+import pytest
+
+from .batch import run_batch
+from .config import config_to_options
+from .conftest import FauxJIRA, generate_issues, synthetic_fields
+
+CONFIG = """
+Connection:
+    Domain: https://example.org
+
+Query: project = {project}
+
+Workflow:
+    Backlog: Backlog
+    Committed: Next
+    Build: Build
+    Test:
+        - Code review
+        - QA
+    Done: Done
+
+Output:
+    Cycle time data: cycletime.csv
+    CFD data: cfd.csv
+"""
+
+
+class CountingJIRA(FauxJIRA):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+
+    def fields(self):
+        self.calls.append("fields")
+        return super().fields()
+
+    def search_issues(self, jql, *args, **kwargs):
+        self.calls.append(jql)
+        return super().search_issues(jql, *args, **kwargs)
+
+
+@pytest.fixture
+def config_files(tmp_path):
+    files = []
+    for name, project in [("team-a", "A"), ("team-b", "A"), ("team-c", "C")]:
+        config_file = tmp_path / ("%s.yml" % name)
+        config_file.write_text(CONFIG.format(project=project))
+        files.append(str(config_file))
+    return files
+
+
+@pytest.fixture
+def connect(minimal_fields):
+    clients = []
+
+    def connect(options):
+        cycle = config_to_options(CONFIG.format(project="A"))["settings"][
+            "cycle"
+        ]
+        jira = CountingJIRA(
+            fields=synthetic_fields(minimal_fields),
+            issues=generate_issues(20, cycle),
+        )
+        clients.append(jira)
+        return jira
+
+    connect.clients = clients
+    return connect
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_run_batch(tmp_path, config_files, connect, workers):
+    output_directory = tmp_path / "output"
+
+    failed = run_batch(
+        config_files, connect, str(output_directory), workers=workers
+    )
+    assert failed == []
+
+    for name in ["team-a", "team-b", "team-c"]:
+        assert (output_directory / name / "cycletime.csv").exists()
+        assert (output_directory / name / "cfd.csv").exists()
+
+    # One connection, which looked up fields once and ran each query once
+    assert len(connect.clients) == 1
+    assert sorted(connect.clients[0].calls) == [
+        "fields",
+        "project = A",
+        "project = C",
+    ]
+
+
+def test_run_batch_continues_after_failure(tmp_path, config_files, connect):
+    bad_config = tmp_path / "bad.yml"
+    bad_config.write_text("Connection: [")
+
+    failed = run_batch(
+        [str(bad_config)] + config_files, connect, str(tmp_path / "output")
+    )
+    assert failed == [str(bad_config)]
+    assert (tmp_path / "output" / "team-c" / "cycletime.csv").exists()
+
+
+def test_run_batch_cycle_time_cache(
+    tmp_path, config_files, connect, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    for config_file in config_files:
+        with open(config_file, "a") as f:
+            f.write("    Cycle time cache: cycletime.cache\n")
+
+    output_directory = tmp_path / "output"
+    assert run_batch(config_files, connect, str(output_directory)) == []
+
+    # Each configuration file has its own cache in its output directory
+    for name in ["team-a", "team-b", "team-c"]:
+        assert (output_directory / name / "cycletime.cache").exists()
+    assert not (tmp_path / "cycletime.cache").exists()
+
+    # Caches can be kept out of the output directories, which may be emptied
+    cache_directory = tmp_path / "cache"
+
+    def override(options):
+        options["settings"]["cache_directory"] = str(cache_directory)
+
+    assert (
+        run_batch(
+            config_files, connect, str(output_directory), override=override
+        )
+        == []
+    )
+
+    for name in ["team-a", "team-b", "team-c"]:
+        assert (cache_directory / name / "cycletime.cache").exists()
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_run_batch_log_file(tmp_path, config_files, connect, caplog, workers):
+    caplog.set_level(logging.INFO)
+    handlers = list(logging.getLogger().handlers)
+
+    bad_config = tmp_path / "bad.yml"
+    bad_config.write_text("Connection: [")
+
+    output_directory = tmp_path / "output"
+    run_batch(
+        config_files + [str(bad_config)],
+        connect,
+        str(output_directory),
+        workers=workers,
+        log_file="metrics.log",
+    )
+
+    # Each configuration file has its own log, with only its own messages
+    for name in ["team-a", "team-b", "team-c"]:
+        log = (output_directory / name / "metrics.log").read_text()
+        assert "Calculating metrics for %s" % (tmp_path / name) in log
+        assert "Writing outputs for %s" % name in log
+        assert "bad.yml" not in log
+
+    log = (output_directory / "bad" / "metrics.log").read_text()
+    assert "Processing %s failed" % bad_config in log
+
+    # The log handlers are removed at the end of the run
+    assert logging.getLogger().handlers == handlers
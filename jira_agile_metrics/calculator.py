@@ -1,4 +1,15 @@
+import json
 import logging
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # Not available on Windows
+
+from .simulation import resolve_simulation_seed
+from .workbook import Workbook
 
 logger = logging.getLogger(__name__)
 
@@ -16,12 +27,17 @@ class Calculator(object):
         self.settings = settings
         self._results = results
 
+        # Calculator classes whose results have been read
+        self.dependencies = set()
+
     def get_result(self, calculator=None, default=None):
         """Get the results calculated by a previous calculator
         of type `calculator` (a class). Defaults to `self.__class__`
         """
 
-        return self._results.get(calculator or self.__class__, default)
+        calculator = calculator or self.__class__
+        self.dependencies.add(calculator)
+        return self._results.get(calculator, default)
 
     # Lifecycle methods -- implement as appropriate
 
@@ -35,35 +51,229 @@ class Calculator(object):
         target directory.
         """
 
+    def write_sheets(self, workbook):
+        """Add sheets with the results to the combined `workbook.Workbook`,
+        if one is configured.
+        """
+
 
 def run_calculators(calculators, query_manager, settings):
     """Run all calculators passed in, in the order listed.
     Returns the aggregated results.
+
+    The time and memory used by each calculator is logged, and written to
+    the `run_report` file if set.
     """
 
+    calculators, results, report = calculate(
+        calculators, query_manager, settings
+    )
+    write_outputs(calculators, report, query_manager, settings)
+    return results
+
+
+def calculate(calculators, query_manager, settings):
+    """Run all calculators passed in, in the order listed, without writing
+    any files. If no `simulation_seed` is set, one is drawn for the whole
+    run. Returns a tuple of the calculator objects, the aggregated
+    results and the measurements for each calculator, to pass to
+    `write_outputs()`.
+    """
+
+    # All simulations in the run share one seed, logged if it is not set
+    settings = resolve_simulation_seed(settings)
+
     results = {}
     calculators = [C(query_manager, settings, results) for C in calculators]
+    report = {c.__class__.__name__: {} for c in calculators}
 
-    # Run all calculators first
     for c in calculators:
-        logger.info("%s running...", c.__class__.__name__)
-        results[c.__class__] = c.run()
-        logger.info("%s completed\n", c.__class__.__name__)
+        name = c.__class__.__name__
+        logger.info("%s running...", name)
+        results[c.__class__], report[name]["run"] = measure(c.run)
+        report[name]["run"]["result_size"] = result_size(results[c.__class__])
+        logger.info("%s completed\n", name)
+
+    return calculators, results, report
+
+
+def write_outputs(calculators, report, query_manager, settings, only=None):
+    """Write the output files of calculators that have been run with
+    `calculate()` to the current working directory, then log and write
+    the run report. If `only` is given, only the files of the calculators
+    in it are written, and the others are reported as skipped. The
+    combined workbook, if any, always has the sheets of all calculators.
+    """
+
+    workbook = (
+        Workbook(settings["workbook"]) if settings.get("workbook") else None
+    )
+
+    def write(c):
+        c.write()
+        if workbook is not None:
+            c.write_sheets(workbook)
 
-    # Write all files as a second pass
     for c in calculators:
-        logger.info("Writing file for %s...", c.__class__.__name__)
+        name = c.__class__.__name__
+
+        if only is not None and c not in only:
+            if workbook is not None:
+                try:
+                    c.write_sheets(workbook)
+                except Exception:
+                    logger.exception("Writing sheets for %s failed", name)
+            continue
+
+        logger.info("Writing file for %s...", name)
         try:
-            c.write()
-        except Exception:
+            _, report[name]["write"] = measure(lambda: write(c))
+        except Exception as e:
+            report[name]["write"] = dict(e.measurements, failed=True)
             logger.exception(
                 (
                     "Writing file for %s failed with a fatal error. "
                     "Attempting to run subsequent writers regardless."
                 ),
-                c.__class__.__name__,
+                name,
             )
         else:
-            logger.info("%s completed\n", c.__class__.__name__)
+            logger.info("%s completed\n", name)
 
-    return results
+    if workbook is not None:
+        try:
+            workbook.save()
+        except Exception:
+            logger.exception(
+                "Writing workbook %s failed", workbook.output_file
+            )
+
+    log_run_report(report)
+
+    if settings.get("run_report"):
+        write_run_report(
+            report,
+            settings["run_report"],
+            getattr(query_manager, "telemetry", None),
+        )
+
+
+def measure(func):
+    """Call `func` and return a tuple of its result and a dict with the wall
+    time and CPU time taken (in seconds) and the increase in the peak memory
+    use of the process (in bytes). If `func` raises an exception, the
+    measurements are attached to it as `measurements`.
+    """
+
+    start_rss = peak_rss()
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+
+    def measurements():
+        end_rss = peak_rss()
+        return {
+            "wall_time": time.perf_counter() - start_wall,
+            "cpu_time": time.process_time() - start_cpu,
+            "peak_rss_delta": end_rss - start_rss
+            if end_rss is not None
+            else None,
+        }
+
+    try:
+        result = func()
+    except Exception as e:
+        e.measurements = measurements()
+        raise
+
+    return result, measurements()
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in bytes, or None
+    if it cannot be determined.
+    """
+
+    if resource is None:
+        return None
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def result_size(result):
+    """Return the number of rows or items in a calculator result, if it has
+    a length.
+    """
+
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def log_run_report(report):
+    """Log a table of the time taken by each calculator"""
+
+    lines = [
+        "%-32s %9s %9s %9s %9s %9s"
+        % ("Calculator", "Run (s)", "Write (s)", "CPU (s)", "RSS (MB)", "Size")
+    ]
+
+    for name, stages in report.items():
+        write = stages.get("write")
+        rss_deltas = [
+            m["peak_rss_delta"]
+            for m in stages.values()
+            if m["peak_rss_delta"] is not None
+        ]
+        lines.append(
+            "%-32s %9.2f %9s %9.2f %9s %9s"
+            % (
+                name,
+                stages["run"]["wall_time"],
+                "skipped"
+                if write is None
+                else "failed"
+                if write.get("failed")
+                else "%.2f" % write["wall_time"],
+                sum(m["cpu_time"] for m in stages.values()),
+                "%.1f" % (sum(rss_deltas) / 1024 / 1024) if rss_deltas else "",
+                stages["run"]["result_size"]
+                if stages["run"]["result_size"] is not None
+                else "",
+            )
+        )
+
+    logger.info("Time taken by each calculator:\n%s", "\n".join(lines))
+
+
+def write_run_report(report, output_file, telemetry=None):
+    """Write the measurements for each calculator to `output_file` as
+    JSON, along with the requests made to JIRA for each query if
+    `telemetry` is given.
+    """
+
+    logger.info("Writing run report to %s", output_file)
+
+    data = {
+        "calculators": report,
+        "total": {
+            "wall_time": sum(
+                m["wall_time"]
+                for stages in report.values()
+                for m in stages.values()
+            ),
+            "cpu_time": sum(
+                m["cpu_time"]
+                for stages in report.values()
+                for m in stages.values()
+            ),
+            "peak_rss": peak_rss(),
+        },
+    }
+
+    if telemetry is not None:
+        data["queries"] = telemetry.to_list()
+
+    with open(output_file, "w") as f:
+        json.dump(data, f, indent=4)
@@ -1,3 +1,6 @@
+import json
+import os.path
+
 from .calculator import Calculator, run_calculators
 
 
@@ -39,3 +42,60 @@ def test_run_calculator():
     }
 
     assert written == ["Enabled", "Enabled bar"]
+
+
+def test_run_calculators_writes_run_report(tmp_path):
+    class Rows(Calculator):
+        def run(self):
+            return [1, 2, 3]
+
+        def write(self):
+            pass
+
+    class BrokenWriter(Calculator):
+        def run(self):
+            return None
+
+        def write(self):
+            raise ValueError("Broken")
+
+    run_report = os.path.join(str(tmp_path), "run-report.json")
+    settings = {"run_report": run_report}
+
+    run_calculators([Rows, BrokenWriter], object(), settings)
+
+    with open(run_report) as f:
+        report = json.load(f)
+
+    assert list(report["calculators"].keys()) == ["Rows", "BrokenWriter"]
+
+    rows = report["calculators"]["Rows"]
+    assert rows["run"]["result_size"] == 3
+    assert rows["run"]["wall_time"] >= 0
+    assert rows["run"]["cpu_time"] >= 0
+    assert "failed" not in rows["write"]
+
+    broken = report["calculators"]["BrokenWriter"]
+    assert broken["run"]["result_size"] is None
+    assert broken["write"]["failed"] is True
+
+    assert report["total"]["wall_time"] >= rows["run"]["wall_time"]
+
+
+def test_run_calculators_share_simulation_seed():
+    seeds = []
+
+    class Simulation(Calculator):
+        def run(self):
+            seeds.append(self.settings["simulation_seed"])
+
+    settings = {"simulation_seed": None}
+    run_calculators([Simulation, Simulation], object(), settings)
+
+    assert seeds[0] is not None
+    assert seeds[0] == seeds[1]
+    assert settings["simulation_seed"] is None
+
+    seeds.clear()
+    run_calculators([Simulation], object(), {"simulation_seed": 1234})
+    assert seeds == [1234]
@@ -1,14 +1,16 @@
 import logging
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 from ..calculator import Calculator
-from ..utils import set_chart_style
+from ..chartcache import Chart
+from ..utils import LazyModule, apply_chart_context
 
 from .cycletime import CycleTimeCalculator
 
+plt = LazyModule("matplotlib.pyplot", on_import=apply_chart_context)
+sns = LazyModule("seaborn", on_import=apply_chart_context)
+
 logger = logging.getLogger(__name__)
 
 
@@ -86,6 +88,15 @@ class AgeingWIPChartCalculator(Calculator):
             )
             return
 
+        chart = Chart(
+            self,
+            output_file,
+            chart_data,
+            settings=["ageing_wip_chart_title"],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         if self.settings["ageing_wip_chart_title"]:
@@ -107,9 +118,8 @@ class AgeingWIPChartCalculator(Calculator):
         _, top = ax.get_ylim()
         ax.set_ylim(0, top)
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing ageing WIP chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing ageing WIP chart to %s", chart.output_file)
+        chart.save(fig)
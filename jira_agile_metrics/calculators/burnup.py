@@ -1,12 +1,14 @@
 import logging
 import pandas as pd
-import matplotlib.pyplot as plt
 
 from ..calculator import Calculator
-from ..utils import set_chart_style
+from ..chartcache import Chart
+from ..utils import LazyModule, apply_chart_context
 
 from .cfd import CFDCalculator
 
+plt = LazyModule("matplotlib.pyplot", on_import=apply_chart_context)
+
 logger = logging.getLogger(__name__)
 
 
@@ -52,6 +54,15 @@ class BurnupCalculator(Calculator):
                 )
                 return
 
+        chart = Chart(
+            self,
+            output_file,
+            chart_data,
+            settings=["burnup_window", "burnup_chart_title"],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         if self.settings["burnup_chart_title"]:
@@ -83,9 +94,8 @@ class BurnupCalculator(Calculator):
             ncol=2,
         )
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing burnup chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing burnup chart to %s", chart.output_file)
+        chart.save(fig)
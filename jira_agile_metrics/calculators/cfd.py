@@ -1,13 +1,21 @@
 import logging
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 
 from ..calculator import Calculator
-from ..utils import get_extension, set_chart_style
+from ..chartcache import Chart
+from ..utils import (
+    LazyModule,
+    apply_chart_context,
+    get_extension,
+    write_arrow_file,
+    ARROW_EXTENSIONS,
+)
 
 from .cycletime import CycleTimeCalculator
 
+plt = LazyModule("matplotlib.pyplot", on_import=apply_chart_context)
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,6 +50,9 @@ class CFDCalculator(Calculator):
         else:
             logger.debug("No output file specified for CFD chart")
 
+    def write_sheets(self, workbook):
+        workbook.add_sheet("CFD", self.get_result())
+
     def write_file(self, data, output_files):
         for output_file in output_files:
             output_extension = get_extension(output_file)
@@ -49,6 +60,8 @@ class CFDCalculator(Calculator):
             logger.info("Writing CFD data to %s", output_file)
             if output_extension == ".json":
                 data.to_json(output_file, date_format="iso")
+            elif output_extension in ARROW_EXTENSIONS:
+                write_arrow_file(data, output_file)
             elif output_extension == ".xlsx":
                 data.to_excel(output_file, "CFD")
             else:
@@ -69,6 +82,15 @@ class CFDCalculator(Calculator):
                 logger.warning("Cannot draw CFD with no data")
                 return
 
+        chart = Chart(
+            self,
+            output_file,
+            data,
+            settings=["cfd_window", "cfd_chart_title", "backlog_column"],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         if self.settings["cfd_chart_title"]:
@@ -94,12 +116,11 @@ class CFDCalculator(Calculator):
         top = data[data.columns[0]].max()
         ax.set_ylim(bottom=bottom, top=top)
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing CFD chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing CFD chart to %s", chart.output_file)
+        chart.save(fig)
 
 
 def calculate_cfd_data(cycle_data, cycle_names):
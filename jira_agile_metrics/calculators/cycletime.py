@@ -1,11 +1,22 @@
 import json
 import logging
+import concurrent.futures
 import datetime
+import gzip
+import os
+import tempfile
+import threading
 import dateutil
 import pandas as pd
 from ..trello import TrelloClient
 from ..calculator import Calculator
-from ..utils import get_extension, to_json_string
+from ..utils import (
+    get_extension,
+    write_json_rows,
+    write_arrow_file,
+    arrow_category_columns,
+    ARROW_EXTENSIONS,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +34,8 @@ class CycleTimeCalculator(Calculator):
 
     If 'query_attribute' is set in `settings`, a column with this name
     will be added, and populated with the `value` key, if any, from each
-    criteria block under `queries` in settings.
+    criteria block under `queries` in settings. If `query_workers` is set,
+    up to that many criteria blocks are fetched and processed in parallel.
 
     In addition, `cycle_time` will be set to the time delta between the
     first `accepted`-type column and the first `complete` column, or None.
@@ -36,10 +48,25 @@ class CycleTimeCalculator(Calculator):
 
     If an item moves backwards through the cycle, subsequent date/time
     stamps in the cycle are erased.
+
+    If `cycle_time_cache` is set, the data for each issue is saved to this
+    file (in the `cache_directory`, if set), and reused on the next run for
+    issues that have not been updated since.
     """
 
     def run(self, now=None):
 
+        cache = (
+            CycleTimeCache(
+                os.path.join(
+                    self.settings["cache_directory"] or "",
+                    self.settings["cycle_time_cache"],
+                )
+            )
+            if self.settings["cycle_time_cache"]
+            else None
+        )
+
         return calculate_cycle_times(
             self.query_manager,
             self.settings["cycle"],
@@ -49,16 +76,15 @@ class CycleTimeCalculator(Calculator):
             self.settings["queries"],
             self.settings["query_attribute"],
             now=now,
+            workers=self.settings["query_workers"],
+            cache=cache,
         )
 
-    def write(self):
-        output_files = self.settings["cycle_time_data"]
-
-        if not output_files:
-            logger.debug("No output file specified for cycle time data")
-            return
+    def output_columns(self):
+        """Return a tuple of the headings and the columns of the cycle
+        time data written to files
+        """
 
-        cycle_data = self.get_result()
         cycle_names = [s["name"] for s in self.settings["cycle"]]
         attribute_names = sorted(self.settings["attributes"].keys())
         query_attribute_names = (
@@ -84,18 +110,32 @@ class CycleTimeCalculator(Calculator):
             + ["blocked_days"]
         )
 
+        return header, columns
+
+    def write(self):
+        output_files = self.settings["cycle_time_data"]
+
+        if not output_files:
+            logger.debug("No output file specified for cycle time data")
+            return
+
+        cycle_data = self.get_result()
+        header, columns = self.output_columns()
+
         for output_file in output_files:
 
             logger.info("Writing cycle time data to %s", output_file)
             output_extension = get_extension(output_file)
 
             if output_extension == ".json":
-                values = [header] + [
-                    list(map(to_json_string, row))
-                    for row in cycle_data[columns].values.tolist()
-                ]
-                with open(output_file, "w") as out:
-                    out.write(json.dumps(values))
+                write_json_rows(output_file, header, cycle_data, columns)
+            elif output_extension in ARROW_EXTENSIONS:
+                # All columns, including the cycle time and impediments
+                write_arrow_file(
+                    cycle_data,
+                    output_file,
+                    arrow_category_columns(self.settings),
+                )
             elif output_extension == ".xlsx":
                 cycle_data.to_excel(
                     output_file,
@@ -113,6 +153,16 @@ class CycleTimeCalculator(Calculator):
                     index=False,
                 )
 
+    def write_sheets(self, workbook):
+        header, columns = self.output_columns()
+        workbook.add_sheet(
+            "Cycle data",
+            self.get_result(),
+            columns=columns,
+            header=header,
+            index=False,
+        )
+
 
 def calculate_cycle_times(
     query_manager,
@@ -123,6 +173,8 @@ def calculate_cycle_times(
     queries,  # [{jql:"", value:""}]
     query_attribute=None,  # ""
     now=None,
+    workers=None,
+    cache=None,  # CycleTimeCache
 ):
 
     # Allows unit testing to use a fixed date
@@ -169,197 +221,86 @@ def calculate_cycle_times(
     if query_attribute:
         series[query_attribute] = {"data": [], "dtype": "str"}
 
-    for criteria in queries:
-        for issue in query_manager.find_issues(criteria["jql"]):
-            if type(query_manager.jira) == TrelloClient:
-                issue_url = issue.url
-            else:
-                issue_url = "%s/browse/%s" % (
-                    query_manager.jira._options["server"],
-                    issue.key,
-                )
-            item = {
-                "key": issue.key,
-                "url": issue_url,
-                "issue_type": issue.fields.issuetype.name,
-                "summary": issue.fields.summary,
-                "status": issue.fields.status.name,
-                "resolution": issue.fields.resolution.name
-                if issue.fields.resolution
-                else None,
-                "cycle_time": None,
-                "completed_timestamp": None,
-                "blocked_days": 0,
-                "impediments": [],
-            }
-
-            for name in attributes:
-                item[name] = query_manager.resolve_attribute_value(issue, name)
-
-            if query_attribute:
-                item[query_attribute] = criteria.get("value", None)
+    # Only download the fields used to calculate each item
+    fields = query_manager.search_fields(
+        query_manager.field_name_to_id("Flagged"), attributes=True
+    )
 
-            for cycle_name in cycle_names:
-                item[cycle_name] = None
-
-            last_status = None
-            impediment_flag = None
-            impediment_start_status = None
-            impediment_start = None
-
-            # Record date of status and impediments flag changes
-            for snapshot in query_manager.iter_changes(
-                issue, ["status", "Flagged"]
-            ):
-                if snapshot.change == "status":
-                    snapshot_cycle_step = cycle_lookup.get(
-                        snapshot.to_string.lower(), None
-                    )
-                    if snapshot_cycle_step is None:
-                        logger.info(
-                            "Issue %s transitioned to unknown JIRA status %s",
-                            issue.key,
-                            snapshot.to_string,
-                        )
-                        unmapped_statuses.add(snapshot.to_string)
-                        continue
-
-                    last_status = (
-                        snapshot_cycle_step_name
-                    ) = snapshot_cycle_step["name"]
-
-                    # Keep the first time we entered a step
-                    if item[snapshot_cycle_step_name] is None:
-                        item[snapshot_cycle_step_name] = snapshot.date.date()
-
-                    # Wipe any subsequent dates,
-                    # in case this was a move backwards
-                    found_cycle_name = False
-                    for cycle_name in cycle_names:
-                        if (
-                            not found_cycle_name
-                            and cycle_name == snapshot_cycle_step_name
-                        ):
-                            found_cycle_name = True
-                            continue
-                        elif found_cycle_name and item[cycle_name] is not None:
-                            logger.info(
-                                (
-                                    "Issue %s moved backwards to %s "
-                                    "[JIRA: %s -> %s], wiping data "
-                                    "for subsequent step %s"
-                                ),
-                                issue.key,
-                                snapshot_cycle_step_name,
-                                snapshot.from_string,
-                                snapshot.to_string,
-                                cycle_name,
-                            )
-                            item[cycle_name] = None
-                elif snapshot.change == "Flagged":
-                    if snapshot.from_string == snapshot.to_string is None:
-                        # Initial state from None -> None
-                        continue
-                    elif (
-                        snapshot.to_string is not None
-                        and snapshot.to_string != ""
-                    ):
-                        impediment_flag = snapshot.to_string
-                        impediment_start = snapshot.date.date()
-                        impediment_start_status = last_status
-                    elif (
-                        snapshot.to_string is None or snapshot.to_string == ""
-                    ):
-                        if impediment_start is None:
-                            logger.warning(
-                                (
-                                    "Issue %s had impediment flag "
-                                    "cleared before being set. "
-                                    "This should not happen."
-                                ),
-                                issue.key,
-                            )
-                            continue
-
-                        if impediment_start_status in active_columns:
-                            item["blocked_days"] += (
-                                snapshot.date.date() - impediment_start
-                            ).days
-                        item["impediments"].append(
-                            {
-                                "start": impediment_start,
-                                "end": snapshot.date.date(),
-                                "status": impediment_start_status,
-                                "flag": impediment_flag,
-                            }
-                        )
-
-                        # Reset for next time
-                        impediment_flag = None
-                        impediment_start = None
-                        impediment_start_status = None
-
-            # If an impediment flag was set but never cleared:
-            # treat as resolved on the ticket
-            # resolution date if the ticket was resolved,
-            # else as still open until today.
-            if impediment_start is not None:
-                if issue.fields.resolutiondate:
-                    resolution_date = dateutil.parser.parse(
-                        issue.fields.resolutiondate
-                    ).date()
-                    if impediment_start_status in active_columns:
-                        item["blocked_days"] += (
-                            resolution_date - impediment_start
-                        ).days
-                    item["impediments"].append(
-                        {
-                            "start": impediment_start,
-                            "end": resolution_date,
-                            "status": impediment_start_status,
-                            "flag": impediment_flag,
-                        }
-                    )
-                else:
-                    if impediment_start_status in active_columns:
-                        item["blocked_days"] += (
-                            now.date() - impediment_start
-                        ).days
-                    item["impediments"].append(
-                        {
-                            "start": impediment_start,
-                            "end": None,
-                            "status": impediment_start_status,
-                            "flag": impediment_flag,
-                        }
-                    )
-                impediment_flag = None
-                impediment_start = None
-                impediment_start_status = None
+    if cache is not None:
+        cache.load(
+            [
+                getattr(query_manager.jira, "_options", {}).get("server"),
+                cycle,
+                attributes,
+                committed_column,
+                done_column,
+                fields,
+                # Used to resolve attribute values
+                query_manager.attributes_to_fields,
+                query_manager.settings["known_values"],
+            ]
+        )
 
-            # calculate cycle time
+    def calculate_item(issue):
+        if cache is not None:
+            cached = cache.get(issue)
+            if cached is not None:
+                item, blocked_since, issue_unmapped_statuses = cached
+                unmapped_statuses.update(issue_unmapped_statuses)
+                return dict(item), blocked_since
+
+        issue_unmapped_statuses = set()
+        item, blocked_since = calculate_issue_cycle_times(
+            query_manager,
+            issue,
+            cycle_names,
+            cycle_lookup,
+            active_columns,
+            attributes,
+            committed_column,
+            done_column,
+            issue_unmapped_statuses,
+        )
+        unmapped_statuses.update(issue_unmapped_statuses)
 
-            previous_timestamp = None
-            committed_timestamp = None
-            done_timestamp = None
+        if cache is not None:
+            cache.put(
+                issue, (dict(item), blocked_since, issue_unmapped_statuses)
+            )
 
-            for cycle_name in reversed(cycle_names):
-                if item[cycle_name] is not None:
-                    previous_timestamp = item[cycle_name]
+        return item, blocked_since
 
-                if previous_timestamp is not None:
-                    item[cycle_name] = previous_timestamp
-                    if cycle_name == done_column:
-                        done_timestamp = previous_timestamp
-                    if cycle_name == committed_column:
-                        committed_timestamp = previous_timestamp
+    def fetch_query_items(criteria):
+        items = []
+        for issue in query_manager.find_issues(criteria["jql"], fields=fields):
+            item, blocked_since = calculate_item(issue)
 
-            if committed_timestamp is not None and done_timestamp is not None:
-                item["cycle_time"] = done_timestamp - committed_timestamp
-                item["completed_timestamp"] = done_timestamp
+            if query_attribute:
+                item[query_attribute] = criteria.get("value", None)
 
+            items.append((item, blocked_since))
+        return items
+
+    # Each criteria block can be fetched and processed in its own worker.
+    # `map()` preserves the order of `queries`, so the combined frame is the
+    # same as if the queries had been run one after another.
+    if workers and workers > 1 and len(queries) > 1:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers
+        ) as executor:
+            query_items = list(executor.map(fetch_query_items, queries))
+    else:
+        query_items = map(fetch_query_items, queries)
+
+    blocked_since = []
+    for items in query_items:
+        for item, item_blocked_since in items:
             for k, v in item.items():
                 series[k]["data"].append(v)
+            blocked_since.append(item_blocked_since)
+
+    if cache is not None:
+        cache.save()
 
     if len(unmapped_statuses) > 0:
         logger.warn(
@@ -375,6 +316,12 @@ def calculate_cycle_times(
     for k, v in series.items():
         data[k] = pd.Series(v["data"], dtype=v["dtype"])
 
+    # Impediments that are still open count as blocked until today
+    blocked_since = pd.Series(blocked_since, dtype="datetime64[ns]")
+    data["blocked_days"] += (
+        (pd.Timestamp(now.date()) - blocked_since).dt.days.fillna(0)
+    ).astype(data["blocked_days"].dtype)
+
     return pd.DataFrame(
         data,
         columns=["key", "url", "issue_type", "summary", "status", "resolution"]
@@ -383,3 +330,357 @@ def calculate_cycle_times(
         + ["cycle_time", "completed_timestamp", "blocked_days", "impediments"]
         + cycle_names,
     )
+
+
+def calculate_issue_cycle_times(
+    query_manager,
+    issue,
+    cycle_names,
+    cycle_lookup,  # {status.lower(): {index:0, name:""}}
+    active_columns,
+    attributes,
+    committed_column,
+    done_column,
+    unmapped_statuses,  # set, updated in place
+):
+    """Build the cycle time data for a single `issue` as a dict of column
+    name to value. Any JIRA statuses not found in `cycle_lookup` are added to
+    `unmapped_statuses`.
+
+    Returns a tuple of the dict and, if the issue is still flagged as
+    impeded in an active column, the date the impediment started, or None.
+    The days since then are not included in `blocked_days`, since they
+    depend on when the data is calculated rather than on the issue.
+    """
+
+    if type(query_manager.jira) == TrelloClient:
+        issue_url = issue.url
+    else:
+        issue_url = "%s/browse/%s" % (
+            query_manager.jira._options["server"],
+            issue.key,
+        )
+    item = {
+        "key": issue.key,
+        "url": issue_url,
+        "issue_type": issue.fields.issuetype.name,
+        "summary": issue.fields.summary,
+        "status": issue.fields.status.name,
+        "resolution": issue.fields.resolution.name
+        if issue.fields.resolution
+        else None,
+        "cycle_time": None,
+        "completed_timestamp": None,
+        "blocked_days": 0,
+        "impediments": [],
+    }
+
+    for name in attributes:
+        item[name] = query_manager.resolve_attribute_value(issue, name)
+
+    for cycle_name in cycle_names:
+        item[cycle_name] = None
+
+    last_status = None
+    blocked_since = None
+    impediment_flag = None
+    impediment_start_status = None
+    impediment_start = None
+
+    # Record date of status and impediments flag changes
+    for snapshot in query_manager.iter_changes(issue, ["status", "Flagged"]):
+        if snapshot.change == "status":
+            snapshot_cycle_step = cycle_lookup.get(
+                snapshot.to_string.lower(), None
+            )
+            if snapshot_cycle_step is None:
+                logger.info(
+                    "Issue %s transitioned to unknown JIRA status %s",
+                    issue.key,
+                    snapshot.to_string,
+                )
+                unmapped_statuses.add(snapshot.to_string)
+                continue
+
+            last_status = snapshot_cycle_step_name = snapshot_cycle_step[
+                "name"
+            ]
+
+            # Keep the first time we entered a step
+            if item[snapshot_cycle_step_name] is None:
+                item[snapshot_cycle_step_name] = snapshot.date.date()
+
+            # Wipe any subsequent dates,
+            # in case this was a move backwards
+            found_cycle_name = False
+            for cycle_name in cycle_names:
+                if (
+                    not found_cycle_name
+                    and cycle_name == snapshot_cycle_step_name
+                ):
+                    found_cycle_name = True
+                    continue
+                elif found_cycle_name and item[cycle_name] is not None:
+                    logger.info(
+                        (
+                            "Issue %s moved backwards to %s "
+                            "[JIRA: %s -> %s], wiping data "
+                            "for subsequent step %s"
+                        ),
+                        issue.key,
+                        snapshot_cycle_step_name,
+                        snapshot.from_string,
+                        snapshot.to_string,
+                        cycle_name,
+                    )
+                    item[cycle_name] = None
+        elif snapshot.change == "Flagged":
+            if snapshot.from_string == snapshot.to_string is None:
+                # Initial state from None -> None
+                continue
+            elif snapshot.to_string is not None and snapshot.to_string != "":
+                impediment_flag = snapshot.to_string
+                impediment_start = snapshot.date.date()
+                impediment_start_status = last_status
+            elif snapshot.to_string is None or snapshot.to_string == "":
+                if impediment_start is None:
+                    logger.warning(
+                        (
+                            "Issue %s had impediment flag "
+                            "cleared before being set. "
+                            "This should not happen."
+                        ),
+                        issue.key,
+                    )
+                    continue
+
+                if impediment_start_status in active_columns:
+                    item["blocked_days"] += (
+                        snapshot.date.date() - impediment_start
+                    ).days
+                item["impediments"].append(
+                    {
+                        "start": impediment_start,
+                        "end": snapshot.date.date(),
+                        "status": impediment_start_status,
+                        "flag": impediment_flag,
+                    }
+                )
+
+                # Reset for next time
+                impediment_flag = None
+                impediment_start = None
+                impediment_start_status = None
+
+    # If an impediment flag was set but never cleared:
+    # treat as resolved on the ticket
+    # resolution date if the ticket was resolved,
+    # else as still open until today.
+    if impediment_start is not None:
+        if issue.fields.resolutiondate:
+            resolution_date = dateutil.parser.parse(
+                issue.fields.resolutiondate
+            ).date()
+            if impediment_start_status in active_columns:
+                item["blocked_days"] += (
+                    resolution_date - impediment_start
+                ).days
+            item["impediments"].append(
+                {
+                    "start": impediment_start,
+                    "end": resolution_date,
+                    "status": impediment_start_status,
+                    "flag": impediment_flag,
+                }
+            )
+        else:
+            if impediment_start_status in active_columns:
+                blocked_since = impediment_start
+            item["impediments"].append(
+                {
+                    "start": impediment_start,
+                    "end": None,
+                    "status": impediment_start_status,
+                    "flag": impediment_flag,
+                }
+            )
+        impediment_flag = None
+        impediment_start = None
+        impediment_start_status = None
+
+    # calculate cycle time
+
+    previous_timestamp = None
+    committed_timestamp = None
+    done_timestamp = None
+
+    for cycle_name in reversed(cycle_names):
+        if item[cycle_name] is not None:
+            previous_timestamp = item[cycle_name]
+
+        if previous_timestamp is not None:
+            item[cycle_name] = previous_timestamp
+            if cycle_name == done_column:
+                done_timestamp = previous_timestamp
+            if cycle_name == committed_column:
+                committed_timestamp = previous_timestamp
+
+    if committed_timestamp is not None and done_timestamp is not None:
+        item["cycle_time"] = done_timestamp - committed_timestamp
+        item["completed_timestamp"] = done_timestamp
+
+    return item, blocked_since
+
+
+class CycleTimeCache(object):
+    """The cycle time data for each issue from a previous run, saved to
+    `path` as gzip compressed JSON. The data for an issue is reused if the
+    issue has not been updated since. The cache is discarded if any of the
+    settings the data depends on have changed. Issues with attribute values
+    that cannot be saved as JSON are calculated again on every run.
+    """
+
+    version = 2
+
+    def __init__(self, path):
+        self.path = path
+        self.signature = None
+        self.items = {}  # key -> (updated, data)
+        self.used = {}
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def load(self, signature):
+        """Load the cache file, if it exists and was saved with the same
+        `signature` (any JSON serialisable value)
+        """
+        self.signature = json.dumps(
+            [self.version, signature], sort_keys=True, default=str
+        )
+        self.items = {}
+        self.used = {}
+
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                cache = json.load(f, object_hook=decode_cache_value)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(
+                "Ignoring unreadable cycle time cache %s: %s", self.path, e
+            )
+            return
+
+        if cache.get("signature") != self.signature:
+            logger.info(
+                "Settings have changed. Not using cycle time cache %s",
+                self.path,
+            )
+            return
+
+        self.items = {
+            key: (
+                updated,
+                (
+                    data["item"],
+                    data["blocked_since"],
+                    set(data["unmapped_statuses"]),
+                ),
+            )
+            for key, (updated, data) in cache["items"].items()
+        }
+        logger.debug(
+            "Loaded cycle time data for %d issues from %s",
+            len(self.items),
+            self.path,
+        )
+
+    def get(self, issue):
+        """Return the data saved for `issue`, or None if there is none or
+        the issue has been updated since
+        """
+        updated = getattr(issue.fields, "updated", None)
+        cached = self.items.get(issue.key)
+
+        with self._lock:
+            if updated is None or cached is None or cached[0] != updated:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.used[issue.key] = cached
+            return cached[1]
+
+    def put(self, issue, data):
+        updated = getattr(issue.fields, "updated", None)
+        if updated is not None:
+            with self._lock:
+                self.used[issue.key] = (updated, data)
+
+    def save(self):
+        """Save the data for the issues seen in this run, replacing the
+        cache file in one step
+        """
+        logger.info(
+            "Reused cycle time data for %d issues, calculated %d",
+            self.hits,
+            self.misses,
+        )
+
+        items = {}
+        for key, (updated, (item, blocked_since, unmapped)) in sorted(
+            self.used.items()
+        ):
+            data = {
+                "item": item,
+                "blocked_since": blocked_since,
+                "unmapped_statuses": sorted(unmapped),
+            }
+            try:
+                json.dumps(data, default=encode_cache_value)
+            except (TypeError, ValueError):
+                logger.debug("Not caching cycle time data for %s", key)
+                continue
+            items[key] = (updated, data)
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(
+                raw, "wt", encoding="utf-8"
+            ) as f:
+                json.dump(
+                    {"signature": self.signature, "items": items},
+                    f,
+                    default=encode_cache_value,
+                    separators=(",", ":"),
+                )
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+def encode_cache_value(value):
+    """Encode the dates and durations in cycle time data as JSON"""
+    if isinstance(value, datetime.datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, datetime.timedelta):
+        return {"__timedelta__": value.total_seconds()}
+    raise TypeError("Cannot cache value %r" % (value,))
+
+
+def decode_cache_value(obj):
+    """Decode a value encoded by `encode_cache_value()`"""
+    if "__datetime__" in obj:
+        return dateutil.parser.isoparse(obj["__datetime__"])
+    if "__date__" in obj:
+        return dateutil.parser.isoparse(obj["__date__"]).date()
+    if "__timedelta__" in obj:
+        return datetime.timedelta(seconds=obj["__timedelta__"])
+    return obj
@@ -1,15 +1,20 @@
+import time
 import pytest
 import datetime
-from pandas import NaT, Timestamp, Timedelta
+from pandas import NaT, Timestamp, Timedelta, read_feather, read_parquet
 
 from ..conftest import (
     FauxJIRA as JIRA,
     FauxIssue as Issue,
     FauxChange as Change,
     FauxFieldValue as Value,
+    generate_issues,
+    synthetic_fields,
 )
 
 from ..querymanager import QueryManager
+from ..utils import extend_dict
+from . import cycletime
 from .cycletime import CycleTimeCalculator
 
 
@@ -489,3 +494,184 @@ def test_movement_skipped_columns(jira_with_skipped_columns, settings):
             "Done": Timestamp("2018-01-04 00:00:00"),
         },
     ]
+
+
+def test_parallel_queries_keep_configured_order(custom_fields, jira, settings):
+    def by_team(issue, jql):
+        # Make the first query the slowest to finish
+        if jql == "(filter=1)":
+            time.sleep(0.05)
+            return issue.key in ("A-3", "A-4")
+        return issue.key in ("A-1", "A-2")
+
+    settings = extend_dict(
+        settings,
+        {
+            "query_attribute": "Query",
+            "queries": [
+                {"jql": "(filter=1)", "value": "First"},
+                {"jql": "(filter=2)", "value": "Second"},
+            ],
+        },
+    )
+    jira = JIRA(fields=custom_fields, issues=jira._issues, filter=by_team)
+    now = datetime.datetime(2018, 1, 10, 15, 37, 0)
+
+    sequential = CycleTimeCalculator(
+        QueryManager(jira, settings), settings, {}
+    ).run(now=now)
+
+    parallel_settings = extend_dict(settings, {"query_workers": 2})
+    parallel = CycleTimeCalculator(
+        QueryManager(jira, parallel_settings), parallel_settings, {}
+    ).run(now=now)
+
+    assert list(parallel["key"]) == ["A-3", "A-4", "A-1", "A-2"]
+    assert list(parallel["Query"]) == ["First", "First", "Second", "Second"]
+    assert parallel.equals(sequential)
+
+
+def test_synthetic_issues(minimal_fields, minimal_settings):
+    settings = extend_dict(minimal_settings, {"attributes": {"Team": "Team"}})
+    now = datetime.datetime(2019, 6, 1)
+
+    def run(seed):
+        jira = JIRA(
+            fields=synthetic_fields(minimal_fields),
+            issues=generate_issues(200, settings["cycle"], seed=seed),
+        )
+        return CycleTimeCalculator(
+            QueryManager(jira, settings), settings, {}
+        ).run(now=now)
+
+    data = run(seed=1)
+
+    assert len(data) == 200
+    assert data.equals(run(seed=1))
+    assert not data.equals(run(seed=2))
+
+    assert set(data["issue_type"]) == {"Epic", "Story", "Defect"}
+    assert set(data["Team"]) == {"Team 1", "Team 2", "Team 3"}
+    assert data["blocked_days"].sum() > 0
+    assert (
+        data["completed_timestamp"].notnull() == (data["status"] == "Done")
+    ).all()
+
+
+def test_cycle_time_cache(tmp_path, mocker, jira, settings):
+    for issue in jira._issues:
+        issue.fields.updated = "2018-01-09 01:01:01"
+
+    cached_settings = extend_dict(
+        settings, {"cycle_time_cache": str(tmp_path / "cycletime.cache")}
+    )
+
+    def run(settings, now):
+        return CycleTimeCalculator(
+            QueryManager(jira, settings), settings, {}
+        ).run(now=now)
+
+    spy = mocker.spy(cycletime, "calculate_issue_cycle_times")
+    first_day = datetime.datetime(2018, 1, 10, 15, 37, 0)
+    next_day = datetime.datetime(2018, 1, 11, 15, 37, 0)
+
+    assert run(cached_settings, first_day).equals(run(settings, first_day))
+    assert spy.call_count == 2 * len(jira._issues)
+
+    # Days blocked by open impediments are brought up to date
+    spy.reset_mock()
+    data = run(cached_settings, next_day)
+    assert spy.call_count == 0
+    assert data.equals(run(settings, next_day))
+    assert not data["blocked_days"].equals(
+        run(settings, first_day)["blocked_days"]
+    )
+
+    # Only updated issues are calculated again
+    jira._issues[1].fields.updated = "2018-01-10 01:01:01"
+    jira._issues[1].fields.summary = "Updated"
+    spy.reset_mock()
+    data = run(cached_settings, next_day)
+    assert spy.call_count == 1
+    assert data.equals(run(settings, next_day))
+    assert data["summary"][1] == "Updated"
+
+    # Changing the workflow invalidates the cache
+    spy.reset_mock()
+    run(extend_dict(cached_settings, {"done_column": "Test"}), next_day)
+    assert spy.call_count == len(jira._issues)
+
+    # So does changing how attribute values are resolved
+    run(cached_settings, next_day)
+    spy.reset_mock()
+    run(
+        extend_dict(cached_settings, {"known_values": {"Release": ["R3"]}}),
+        next_day,
+    )
+    assert spy.call_count == len(jira._issues)
+
+    # The cache can be kept in another directory
+    run(
+        extend_dict(
+            settings,
+            {
+                "cycle_time_cache": "cycletime.cache",
+                "cache_directory": str(tmp_path / "cache"),
+            },
+        ),
+        next_day,
+    )
+    assert (tmp_path / "cache" / "cycletime.cache").exists()
+
+
+def test_cache_values_round_trip():
+    values = [
+        datetime.datetime(2018, 1, 10, 15, 37, 0, 123),
+        datetime.datetime(2018, 1, 10, 15, 37, tzinfo=datetime.timezone.utc),
+        Timestamp("2018-01-10 15:37:00"),
+        datetime.date(2018, 1, 10),
+        datetime.timedelta(days=2, seconds=3),
+    ]
+
+    for value in values:
+        decoded = cycletime.decode_cache_value(
+            cycletime.encode_cache_value(value)
+        )
+        assert decoded == value
+
+    # Dates are not decoded as datetimes
+    assert (
+        type(
+            cycletime.decode_cache_value(
+                cycletime.encode_cache_value(datetime.date(2018, 1, 10))
+            )
+        )
+        is datetime.date
+    )
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".feather"])
+def test_write_arrow_file(tmp_path, jira, settings, extension):
+    pytest.importorskip("pyarrow")
+
+    output_file = str(tmp_path / ("cycletime" + extension))
+    settings = extend_dict(settings, {"cycle_time_data": [output_file]})
+
+    results = {}
+    calculator = CycleTimeCalculator(
+        QueryManager(jira, settings), settings, results
+    )
+    results[CycleTimeCalculator] = data = calculator.run(
+        now=datetime.datetime(2018, 1, 10, 15, 37, 0)
+    )
+    calculator.write()
+
+    written = (
+        read_parquet(output_file)
+        if extension == ".parquet"
+        else read_feather(output_file)
+    )
+    assert list(written["key"]) == list(data["key"])
+    assert written["status"].dtype == "category"
+    assert written["Committed"].dtype == data["Committed"].dtype
+    assert len(written["impediments"][2]) == len(data["impediments"][2])
@@ -3,10 +3,17 @@ import datetime
 import dateutil.parser
 
 import pandas as pd
-import matplotlib.pyplot as plt
 
 from ..calculator import Calculator
-from ..utils import breakdown_by_month, set_chart_style, to_bin
+from ..chartcache import Chart
+from ..utils import (
+    LazyModule,
+    apply_chart_context,
+    breakdown_by_month,
+    to_bin,
+)
+
+plt = LazyModule("matplotlib.pyplot", on_import=apply_chart_context)
 
 logger = logging.getLogger(__name__)
 
@@ -58,7 +65,11 @@ class DebtCalculator(Calculator):
             "age": {"data": [], "dtype": "timedelta64[ns]"},
         }
 
-        for issue in self.query_manager.find_issues(query, expand=None):
+        for issue in self.query_manager.find_issues(
+            query,
+            expand=None,
+            fields=self.query_manager.search_fields(priority_field_id),
+        ):
             created_date = dateutil.parser.parse(issue.fields.created)
             resolved_date = (
                 dateutil.parser.parse(issue.fields.resolutiondate)
@@ -124,6 +135,15 @@ class DebtCalculator(Calculator):
         if window:
             breakdown = breakdown[-window:]
 
+        chart = Chart(
+            self,
+            output_file,
+            breakdown,
+            settings=["debt_window", "debt_chart_title"],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         breakdown.plot.bar(ax=ax, stacked=True)
@@ -138,12 +158,11 @@ class DebtCalculator(Calculator):
         labels = [d.strftime("%b %y") for d in breakdown.index]
         ax.set_xticklabels(labels, rotation=90, size="small")
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing debt chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing debt chart to %s", chart.output_file)
+        chart.save(fig)
 
     def write_debt_age_chart(self, chart_data, output_file):
         priority_values = self.settings["debt_priority_values"]
@@ -179,6 +198,15 @@ class DebtCalculator(Calculator):
         if priority_values:
             breakdown = breakdown.reindex(priority_values)
 
+        chart = Chart(
+            self,
+            output_file,
+            breakdown,
+            settings=["debt_age_chart_bins", "debt_age_chart_title"],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         breakdown.plot.barh(ax=ax, stacked=True)
@@ -190,9 +218,8 @@ class DebtCalculator(Calculator):
         ax.set_xlabel("Number of items", labelpad=20)
         ax.set_ylabel("Priority", labelpad=10)
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing debt age chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing debt age chart to %s", chart.output_file)
+        chart.save(fig)
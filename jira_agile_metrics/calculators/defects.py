@@ -2,10 +2,16 @@ import logging
 import dateutil.parser
 
 import pandas as pd
-import matplotlib.pyplot as plt
 
 from ..calculator import Calculator
-from ..utils import breakdown_by_month, set_chart_style
+from ..chartcache import Chart
+from ..utils import (
+    LazyModule,
+    apply_chart_context,
+    breakdown_by_month,
+)
+
+plt = LazyModule("matplotlib.pyplot", on_import=apply_chart_context)
 
 logger = logging.getLogger(__name__)
 
@@ -83,7 +89,13 @@ class DefectsCalculator(Calculator):
             "resolved": {"data": [], "dtype": "datetime64[ns]"},
         }
 
-        for issue in self.query_manager.find_issues(query, expand=None):
+        for issue in self.query_manager.find_issues(
+            query,
+            expand=None,
+            fields=self.query_manager.search_fields(
+                priority_field_id, type_field_id, environment_field_id
+            ),
+        ):
             series["key"]["data"].append(issue.key)
             series["priority"]["data"].append(
                 self.query_manager.resolve_field_value(
@@ -165,6 +177,15 @@ class DefectsCalculator(Calculator):
             )
             return
 
+        chart = Chart(
+            self,
+            output_file,
+            breakdown,
+            settings=["defects_window", "defects_by_priority_chart_title"],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         breakdown.plot.bar(ax=ax, stacked=True)
@@ -179,12 +200,13 @@ class DefectsCalculator(Calculator):
         labels = [d.strftime("%b %y") for d in breakdown.index]
         ax.set_xticklabels(labels, rotation=90, size="small")
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing defects by priority chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info(
+            "Writing defects by priority chart to %s", chart.output_file
+        )
+        chart.save(fig)
 
     def write_defects_by_type_chart(self, chart_data, output_file):
         window = self.settings["defects_window"]
@@ -201,6 +223,15 @@ class DefectsCalculator(Calculator):
             logger.warning("Cannot draw defects by type chart with zero items")
             return
 
+        chart = Chart(
+            self,
+            output_file,
+            breakdown,
+            settings=["defects_window", "defects_by_type_chart_title"],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         breakdown.plot.bar(ax=ax, stacked=True)
@@ -215,12 +246,11 @@ class DefectsCalculator(Calculator):
         labels = [d.strftime("%b %y") for d in breakdown.index]
         ax.set_xticklabels(labels, rotation=90, size="small")
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing defects by type chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing defects by type chart to %s", chart.output_file)
+        chart.save(fig)
 
     def write_defects_by_environment_chart(self, chart_data, output_file):
         window = self.settings["defects_window"]
@@ -244,6 +274,15 @@ class DefectsCalculator(Calculator):
             )
             return
 
+        chart = Chart(
+            self,
+            output_file,
+            breakdown,
+            settings=["defects_window", "defects_by_environment_chart_title"],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         breakdown.plot.bar(ax=ax, stacked=True)
@@ -258,9 +297,10 @@ class DefectsCalculator(Calculator):
         labels = [d.strftime("%b %y") for d in breakdown.index]
         ax.set_xticklabels(labels, rotation=90, size="small")
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing defects by environment chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info(
+            "Writing defects by environment chart to %s", chart.output_file
+        )
+        chart.save(fig)
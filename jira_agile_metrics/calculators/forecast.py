@@ -1,18 +1,39 @@
 import logging
 import datetime
+import warnings
 
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.transforms
 
 from ..calculator import Calculator
-from ..utils import set_chart_style, to_days_since_epoch
+from ..chartcache import Chart
+from ..simulation import get_simulation_random
+from ..utils import (
+    LazyModule,
+    apply_chart_context,
+    get_extension,
+    to_days_since_epoch,
+    write_arrow_file,
+    ARROW_EXTENSIONS,
+)
 
 from .cycletime import CycleTimeCalculator
 from .burnup import BurnupCalculator
 
+plt = LazyModule("matplotlib.pyplot", on_import=apply_chart_context)
+mtransforms = LazyModule("matplotlib.transforms")
+mcollections = LazyModule("matplotlib.collections")
+
 logger = logging.getLogger(__name__)
 
+# The most trials drawn on the burnup forecast chart. Beyond this, more
+# lines take longer to draw without changing what the chart looks like.
+MAX_TRIAL_PATHS = 1000
+
+# The ranges of values shaded on the burnup forecast chart when only a
+# summary of the trials is kept
+FAN_QUANTILES = [(0.05, 0.95), (0.25, 0.75)]
+
 
 class BurnupForecastCalculator(Calculator):
     """Draw a burn-up chart with a forecast run to completion"""
@@ -26,7 +47,10 @@ class BurnupForecastCalculator(Calculator):
 
         # This calculation is expensive.
         # Only run it if we intend to write a file.
-        if not self.settings["burnup_forecast_chart"]:
+        if not (
+            self.settings["burnup_forecast_chart"]
+            or self.settings["burnup_forecast_data"]
+        ):
             logger.debug(
                 (
                     "Not calculating burnup forecast chart "
@@ -108,23 +132,98 @@ class BurnupForecastCalculator(Calculator):
             )
             return None
 
+        quantiles = list(self.settings["quantiles"])
+        if self.settings["burnup_forecast_chart_deadline_confidence"]:
+            quantiles.append(
+                self.settings["burnup_forecast_chart_deadline_confidence"]
+            )
+        convergence = trial_convergence(self.settings, quantiles)
+        rng = get_simulation_random(self.settings).generator("burnup_forecast")
+
+        # Running trials until they converge may take many more than
+        # `trials`, too many to keep each one
+        summary = self.settings["burnup_forecast_chart_summary"]
+        if convergence is not None and not summary:
+            logger.info(
+                "Keeping a summary of the trials, as forecast tolerance is set"
+            )
+            summary = True
+
+        if summary:
+            return burnup_monte_carlo_summary(
+                start_value=start_value,
+                target_value=target,
+                start_date=burnup_data.index.max(),
+                frequency=throughput_data.index.freq,
+                samples=throughput_data["count"].values,
+                trials=trials,
+                convergence=convergence,
+                rng=rng,
+            )
+
         return burnup_monte_carlo(
             start_value=start_value,
             target_value=target,
             start_date=burnup_data.index.max(),
             frequency=throughput_data.index.freq,
             draw_sample=throughput_sampler(
-                throughput_data, start_value, target
+                throughput_data, start_value, target, rng=rng
             ),
             trials=trials,
         )
 
     def write(self):
-        output_file = self.settings["burnup_forecast_chart"]
-        if not output_file:
+        if self.settings["burnup_forecast_data"]:
+            self.write_file(self.settings["burnup_forecast_data"])
+        else:
+            logger.debug("No output file specified for burnup forecast data")
+
+        if self.settings["burnup_forecast_chart"]:
+            self.write_chart(self.settings["burnup_forecast_chart"])
+        else:
             logger.debug("No output file specified for burnup forecast chart")
+
+    def write_sheets(self, workbook):
+        data = self.get_summary_data()
+        if data is not None:
+            workbook.add_sheet("Forecast", data)
+
+    def get_summary_data(self):
+        """Return the forecast summarised by date (see
+        `ForecastSummary.to_frame()`), or None if there is no forecast
+        """
+
+        mc_trials = self.get_result()
+        if mc_trials is None:
+            return None
+
+        if not isinstance(mc_trials, ForecastSummary):
+            mc_trials = ForecastSummary.from_trials(mc_trials)
+
+        return mc_trials.to_frame(self.settings["quantiles"])
+
+    def write_file(self, output_files):
+        data = self.get_summary_data()
+        if data is None:
+            logger.warning(
+                "Cannot write burnup forecast data with zero completed trials"
+            )
             return
 
+        for output_file in output_files:
+            output_extension = get_extension(output_file)
+
+            logger.info("Writing burnup forecast data to %s", output_file)
+            if output_extension == ".json":
+                data.to_json(output_file, date_format="iso")
+            elif output_extension in ARROW_EXTENSIONS:
+                write_arrow_file(data, output_file)
+            elif output_extension == ".xlsx":
+                data.to_excel(output_file, "Forecast")
+            else:
+                data.to_csv(output_file)
+
+    def write_chart(self, output_file):
         burnup_data = self.get_result(BurnupCalculator)
         if burnup_data is None or len(burnup_data.index) == 0:
             logger.warning("Cannot draw burnup forecast chart with zero items")
@@ -173,17 +272,37 @@ class BurnupForecastCalculator(Calculator):
             or burnup_data[backlog_column].max()
         )
 
+        summary = mc_trials if isinstance(mc_trials, ForecastSummary) else None
+
+        chart = Chart(
+            self,
+            output_file,
+            burnup_data,
+            *(summary.state() if summary is not None else (mc_trials,)),
+            settings=[
+                "simulation_seed",
+                "burnup_forecast_window",
+                "burnup_forecast_chart_deadline",
+                "burnup_forecast_chart_deadline_confidence",
+                "burnup_forecast_chart_target",
+                "burnup_forecast_chart_title",
+                "quantiles",
+                "backlog_column",
+                "date_format",
+            ]
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         if self.settings["burnup_forecast_chart_title"]:
             ax.set_title(self.settings["burnup_forecast_chart_title"])
 
-        fig.autofmt_xdate()
-
-        transform_vertical = matplotlib.transforms.blended_transform_factory(
+        transform_vertical = mtransforms.blended_transform_factory(
             ax.transData, ax.transAxes
         )
-        transform_horizontal = matplotlib.transforms.blended_transform_factory(
+        transform_horizontal = mtransforms.blended_transform_factory(
             ax.transAxes, ax.transData
         )
 
@@ -192,28 +311,66 @@ class BurnupForecastCalculator(Calculator):
 
         deadline_confidence_date = None
 
-        # plot each monte carlo simulation line
-        if mc_trials is not None:
-
-            for col in mc_trials:
-                mc_trials[col][mc_trials[col] > target] = target
+        if summary is not None:
+            # shade the range of values reached by most trials on each date
+            days = summary.days_since_epoch()
+            for low, high in FAN_QUANTILES:
+                bands = summary.value_quantiles([low, high])
+                ax.fill_between(
+                    days,
+                    bands[low].values,
+                    bands[high].values,
+                    color="#ff9696",
+                    alpha=0.4,
+                    linewidth=0,
+                )
 
-            mc_trials.plot.line(
-                ax=ax,
-                legend=False,
-                color="#ff9696",
-                linestyle="solid",
-                linewidth=0.1,
+            # The slowest trials can run on long after the rest, so only
+            # show up to a little after the shading and the quantiles end
+            last_day = to_days_since_epoch(
+                summary.finish_date_quantiles(
+                    [
+                        max(
+                            list(quantiles)
+                            + [high for _, high in FAN_QUANTILES]
+                        )
+                    ]
+                )
+                .iloc[0]
+                .date()
+            )
+            last_day += (last_day - ax.get_xlim()[0]) * 0.05
+        else:
+            # plot all the monte carlo simulation lines as one collection,
+            # which is much quicker to draw than a line per trial
+            paths = trial_paths(mc_trials, target)
+            ax.add_collection(
+                mcollections.LineCollection(
+                    paths,
+                    colors="#ff9696",
+                    linestyles="solid",
+                    linewidths=0.1,
+                )
             )
+            last_day = paths[0, -1, 0]
 
+        # Make sure we can see the forecast
+        left, right = ax.get_xlim()
+        ax.set_xlim(left, max(right, last_day))
+        ax.autoscale_view(scalex=False)
+        fig.autofmt_xdate()
+
+        if mc_trials is not None:
             # draw quantiles at finish line
-            finish_dates = mc_trials.apply(pd.Series.last_valid_index)
-            finish_date_quantiles = finish_dates.quantile(
-                quantiles
-            ).dt.normalize()
+            if summary is not None:
+                finish_dates_at = summary.finish_date_quantiles
+            else:
+                finish_dates_at = trial_finish_dates(mc_trials).quantile
+
+            finish_date_quantiles = finish_dates_at(quantiles).dt.normalize()
 
             if deadline_confidence is not None:
-                deadline_confidence_quantiles = finish_dates.quantile(
+                deadline_confidence_quantiles = finish_dates_at(
                     [deadline_confidence]
                 ).dt.normalize()
                 if len(deadline_confidence_quantiles) > 0:
@@ -340,12 +497,44 @@ class BurnupForecastCalculator(Calculator):
             ncol=2,
         )
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing burnup forecast chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing burnup forecast chart to %s", chart.output_file)
+        chart.save(fig)
+
+
+def trial_paths(mc_trials, target, max_paths=MAX_TRIAL_PATHS):
+    """Return the trials in `mc_trials` as an array of lines, one per trial,
+    of (days since epoch, value) points, with values capped at `target`, as
+    used by `LineCollection`. Points after a trial finished are NaN, which
+    are not drawn.
+
+    Drawing takes time in proportion to the number of lines, so at most
+    `max_paths` evenly spaced trials are returned. The trials are
+    independent, so these are a fair sample of them all.
+    """
+
+    values = mc_trials.values.astype(float)
+    if values.shape[1] > max_paths:
+        columns = np.linspace(0, values.shape[1] - 1, max_paths)
+        values = values[:, columns.round().astype(int)]
+    values = np.minimum(values, target)
+
+    days = np.asarray(
+        (mc_trials.index - pd.Timestamp("1970-01-01")).days, dtype=float
+    )
+
+    x = np.broadcast_to(days[:, np.newaxis], values.shape)
+    return np.stack([x, values], axis=-1).swapaxes(0, 1)
+
+
+def trial_finish_dates(mc_trials):
+    """Return the date of the last value of each trial in `mc_trials`"""
+
+    valid = mc_trials.notnull().values
+    last = len(valid) - 1 - valid[::-1].argmax(axis=0)
+    return pd.Series(mc_trials.index[last], index=mc_trials.columns)
 
 
 def calculate_daily_throughput(
@@ -365,26 +554,28 @@ def calculate_daily_throughput(
     )
 
 
-def throughput_sampler(throughput_data, start_value, target):
+def throughput_sampler(throughput_data, start_value, target, rng=None):
     """Return a function that can efficiently
-    draw samples from `throughput_data`"""
-    sample_buffer_size = int(
-        2 * (target - start_value) / throughput_data["count"].mean()
+    draw samples from `throughput_data`, using the NumPy `Generator` `rng`"""
+    if rng is None:
+        rng = np.random.default_rng()
+
+    counts = throughput_data["count"].values
+    sample_buffer_size = max(
+        int(2 * (target - start_value) / counts.mean()), 1
     )
 
     sample_buffer = dict(idx=0, buffer=None)
 
     def get_throughput_sample():
         if sample_buffer["buffer"] is None or sample_buffer["idx"] >= len(
-            sample_buffer["buffer"].index
+            sample_buffer["buffer"]
         ):
-            sample_buffer["buffer"] = throughput_data["count"].sample(
-                sample_buffer_size, replace=True
-            )
+            sample_buffer["buffer"] = rng.choice(counts, sample_buffer_size)
             sample_buffer["idx"] = 0
 
         sample_buffer["idx"] += 1
-        return sample_buffer["buffer"].iloc[sample_buffer["idx"] - 1]
+        return sample_buffer["buffer"][sample_buffer["idx"] - 1]
 
     return get_throughput_sample
 
@@ -397,27 +588,366 @@ def burnup_monte_carlo(
     draw_sample,
     trials=100,
     max_iterations=9999,
+    convergence=None,
 ):
+    """Run `trials` trials of a burn-up from `start_value` to `target_value`,
+    or, if a `TrialConvergence` is given, batches of trials until it has
+    converged. Returns a frame with a column of values for each trial.
+    """
 
     series = {}
-    for t in range(trials):
-        current_date = start_date
-        current_value = start_value
+    while True:
+        finish_steps = []
+
+        for _ in range(
+            trials if convergence is None else convergence.batch_size
+        ):
+            t = len(series)
+            current_date = start_date
+            current_value = start_value
+
+            dates = [current_date]
+            steps = [current_value]
+
+            while (
+                current_value < target_value and len(steps) <= max_iterations
+            ):
+                current_date += frequency
+                current_value += draw_sample()
+
+                dates.append(current_date)
+                steps.append(
+                    min(current_value, target_value)
+                )  # don't overshoot the target
+
+            series["Trial %d" % t] = pd.Series(
+                steps, index=dates, name="Trial %d" % t
+            )
+            finish_steps.append(len(steps) - 1)
+
+        if convergence is None or convergence.add(finish_steps):
+            break
+
+    return pd.DataFrame(series)
+
+
+def trial_convergence(settings, quantiles):
+    """Return a `TrialConvergence` for `quantiles`, if a
+    `forecast_tolerance` is set in `settings`, or None to run a fixed
+    number of trials
+    """
 
-        dates = [current_date]
-        steps = [current_value]
+    if not settings["forecast_tolerance"]:
+        return None
 
-        while current_value < target_value and len(steps) <= max_iterations:
-            current_date += frequency
-            current_value += draw_sample()
+    return TrialConvergence(
+        quantiles,
+        settings["forecast_tolerance"],
+        settings["forecast_max_trials"],
+    )
+
+
+class TrialConvergence(object):
+    """Decides when enough Monte Carlo trials have been run to estimate the
+    `quantiles` of their outcomes. Trials are run in batches of
+    `batch_size`, passing the outcomes of each batch to `add()`. Using the
+    method of batch means, the standard error of each quantile is estimated
+    from the spread of the quantiles of the batches. The trials have
+    converged once every standard error is within `tolerance` (a fraction)
+    of the quantile, after at least `min_batches` batches, or once
+    `max_trials` trials have been run.
+    """
+
+    min_batches = 10
+
+    def __init__(self, quantiles, tolerance, max_trials, batch_size=100):
+        self.quantiles = list(quantiles)
+        self.tolerance = tolerance
+        self.max_trials = max_trials
+        self.batch_size = batch_size
+
+        self.trials = 0
+        self.batch_quantiles = []
+
+    def add(self, outcomes):
+        """Add the outcomes of a batch of trials, as a sequence with one
+        value (or a row of values, one for each thing forecast) per trial.
+        Missing values are ignored. Returns True if the trials have
+        converged.
+        """
+
+        outcomes = np.asarray(outcomes, dtype=float)
+        with warnings.catch_warnings():
+            # Some outcomes may have no values in a batch
+            warnings.simplefilter("ignore", RuntimeWarning)
+            self.batch_quantiles.append(
+                np.nanquantile(outcomes, self.quantiles, axis=0)
+            )
+        self.trials += len(outcomes)
 
-            dates.append(current_date)
-            steps.append(
-                min(current_value, target_value)
-            )  # don't overshoot the target
+        return self.converged
 
-        series["Trial %d" % t] = pd.Series(
-            steps, index=dates, name="Trial %d" % t
+    @property
+    def converged(self):
+        if (
+            len(self.batch_quantiles) >= self.min_batches
+            and self.within_tolerance()
+        ):
+            logger.info(
+                "Forecast quantiles converged after %d trials", self.trials
+            )
+            return True
+
+        if self.trials >= self.max_trials:
+            logger.warning(
+                "Forecast quantiles had not converged after %d trials",
+                self.trials,
+            )
+            return True
+
+        return False
+
+    def within_tolerance(self):
+        batch_quantiles = np.array(self.batch_quantiles)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            estimate = np.nanmean(batch_quantiles, axis=0)
+            error = np.nanstd(batch_quantiles, axis=0, ddof=1) / np.sqrt(
+                np.sum(~np.isnan(batch_quantiles), axis=0)
+            )
+
+        # Outcomes without enough values to tell are left out
+        known = ~np.isnan(error)
+        return bool(
+            np.all(
+                error[known] <= self.tolerance * np.maximum(estimate[known], 1)
+            )
         )
 
-    return pd.DataFrame(series)
+
+class ForecastSummary(object):
+    """A summary of burn-up forecast trials that start at `start_value` on
+    `start_date`, and take steps of `frequency` until they reach
+    `target_value`. For each step, it keeps a histogram of the values of the
+    trials still running (`value_counts`), and the number of trials that
+    finished on that step (`finish_counts`). Unlike a frame of all the
+    trials, its size does not depend on how many trials there are.
+    """
+
+    def __init__(self, start_value, target_value, start_date, frequency):
+        self.start_value = int(start_value)
+        self.target_value = int(target_value)
+        self.start_date = start_date
+        self.frequency = frequency
+        self.trials = 0
+
+        width = max(self.target_value - self.start_value, 0) + 1
+        self.value_counts = np.zeros((1, width), dtype=np.int64)
+        self.finish_counts = np.zeros(1, dtype=np.int64)
+
+    @classmethod
+    def from_trials(cls, mc_trials):
+        """Summarise a frame of trials, as from `burnup_monte_carlo()`"""
+
+        values = mc_trials.values
+        valid = mc_trials.notnull().values
+        start_value = values[0, 0]
+        target_value = np.nanmax(values)
+
+        summary = cls(
+            start_value,
+            target_value,
+            mc_trials.index[0],
+            mc_trials.index.freq or pd.Timedelta(1, "D"),
+        )
+        summary.add(
+            np.nan_to_num(values.T, nan=start_value).astype(np.int64),
+            len(valid) - valid[::-1].argmax(axis=0),
+        )
+        return summary
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, ForecastSummary)
+            and self.state()[:-2] == other.state()[:-2]
+            and np.array_equal(self.value_counts, other.value_counts)
+            and np.array_equal(self.finish_counts, other.finish_counts)
+        )
+
+    def state(self):
+        """Return everything the summary is made of, e.g. for hashing"""
+        return (
+            self.start_value,
+            self.target_value,
+            str(self.start_date),
+            str(self.frequency),
+            self.trials,
+            self.value_counts,
+            self.finish_counts,
+        )
+
+    def add(self, paths, lengths):
+        """Add trials to the summary. `paths` is an integer array with a row
+        of values for each trial, of which the first `lengths` values (up to
+        and including the step that reached the target) are used.
+        """
+
+        trials, steps = len(lengths), lengths.max()
+        paths = paths[:, :steps]
+        width = self.value_counts.shape[1]
+
+        if steps > len(self.finish_counts):
+            extra = steps - len(self.finish_counts)
+            self.value_counts = np.vstack(
+                [self.value_counts, np.zeros((extra, width), dtype=np.int64)]
+            )
+            self.finish_counts = np.concatenate(
+                [self.finish_counts, np.zeros(extra, dtype=np.int64)]
+            )
+
+        step = np.arange(steps)
+        running = step < lengths[:, np.newaxis]
+        offsets = np.clip(paths - self.start_value, 0, width - 1)
+        cells = (step * width + offsets)[running]
+
+        self.value_counts[:steps] += np.bincount(
+            cells, minlength=steps * width
+        ).reshape(steps, width)
+        self.finish_counts[:steps] += np.bincount(lengths - 1, minlength=steps)
+        self.trials += trials
+
+    @property
+    def dates(self):
+        return pd.date_range(
+            self.start_date,
+            periods=len(self.finish_counts),
+            freq=self.frequency,
+        )
+
+    def days_since_epoch(self):
+        return np.asarray(
+            (self.dates - pd.Timestamp("1970-01-01")).days, dtype=float
+        )
+
+    def value_quantiles(self, quantiles):
+        """Return a frame of the value reached at each of `quantiles` of the
+        trials on each date, counting finished trials at the target
+        """
+
+        counts = self.value_counts.copy()
+        counts[1:, -1] += np.cumsum(self.finish_counts)[:-1]
+
+        cdf = np.cumsum(counts, axis=1)
+        return pd.DataFrame(
+            {
+                q: self.start_value
+                + np.minimum(
+                    (cdf < max(q * self.trials, 1)).sum(axis=1),
+                    cdf.shape[1] - 1,
+                )
+                for q in quantiles
+            },
+            index=self.dates,
+        )
+
+    def finish_date_quantiles(self, quantiles):
+        """Return a series of the date by which each of `quantiles` of the
+        trials had finished
+        """
+
+        cdf = np.cumsum(self.finish_counts)
+        steps = np.searchsorted(
+            cdf, [max(q * self.trials, 1) for q in quantiles], side="left"
+        )
+        return pd.Series(
+            self.dates[np.minimum(steps, len(cdf) - 1)], index=quantiles
+        )
+
+    def to_frame(self, quantiles):
+        """Return a frame with, for each date, the value reached at each of
+        `quantiles` of the trials, and the fraction of trials that had
+        finished by then
+        """
+
+        data = self.value_quantiles(quantiles)
+        data.columns = ["%.0f%%" % (q * 100) for q in quantiles]
+        data["Completed"] = np.cumsum(self.finish_counts) / self.trials
+        data.index.name = "Date"
+        return data
+
+
+def burnup_monte_carlo_summary(
+    start_value,
+    target_value,
+    start_date,
+    frequency,
+    samples,
+    trials=100,
+    max_iterations=9999,
+    batch_size=1000,
+    convergence=None,
+    rng=None,
+):
+    """Run trials like `burnup_monte_carlo()`, with each step drawn at random
+    from the array `samples` by the NumPy `Generator` `rng`, but return a
+    `ForecastSummary`. Trials are run `batch_size` at a time (or the
+    convergence's batch size), so memory use does not grow with `trials`.
+    """
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    samples = np.asarray(samples, dtype=np.int64)
+    summary = ForecastSummary(start_value, target_value, start_date, frequency)
+
+    # Enough steps for most trials to finish in one go
+    steps = int(2 * max(target_value - start_value, 0) / samples.mean()) + 1
+
+    if convergence is not None:
+        batch_size = convergence.batch_size
+
+    while convergence is not None or summary.trials < trials:
+        paths, lengths = simulate_trials(
+            samples,
+            summary.start_value,
+            summary.target_value,
+            batch_size
+            if convergence is not None
+            else min(batch_size, trials - summary.trials),
+            min(steps, max_iterations),
+            max_iterations,
+            rng,
+        )
+        summary.add(paths, lengths)
+
+        if convergence is not None and convergence.add(lengths - 1):
+            break
+
+    return summary
+
+
+def simulate_trials(
+    samples, start_value, target_value, trials, steps, max_iterations, rng
+):
+    """Return an array of the values of `trials` trials, one row per trial,
+    drawn `steps` steps at a time from `samples` by the NumPy `Generator`
+    `rng`, and the number of values in each trial up to and including the
+    one that reached `target_value`.
+    """
+
+    paths = np.full((trials, 1), start_value, dtype=np.int64)
+
+    while (
+        paths[:, -1].min() < target_value and paths.shape[1] <= max_iterations
+    ):
+        draws = rng.choice(
+            samples, (trials, min(steps, max_iterations + 1 - paths.shape[1]))
+        )
+        paths = np.hstack([paths, paths[:, -1:] + np.cumsum(draws, axis=1)])
+
+    paths = np.minimum(paths, target_value)
+    finished = paths == target_value
+    lengths = np.where(
+        finished.any(axis=1), finished.argmax(axis=1) + 1, paths.shape[1]
+    )
+    return paths, lengths
@@ -6,7 +6,13 @@ from pandas import DataFrame, Timestamp, date_range
 from .cycletime import CycleTimeCalculator
 from .cfd import CFDCalculator
 from .burnup import BurnupCalculator
-from .forecast import BurnupForecastCalculator
+from .forecast import (
+    BurnupForecastCalculator,
+    ForecastSummary,
+    TrialConvergence,
+    trial_finish_dates,
+    trial_paths,
+)
 
 from ..utils import extend_dict
 
@@ -25,6 +31,10 @@ def settings(minimal_settings):
             "quantiles": [0.1, 0.3, 0.5],
             "burnup_forecast_chart": "forecast.png",
             # without a file, calculator stops
+            "burnup_forecast_chart_summary": False,
+            "burnup_forecast_data": None,
+            "forecast_tolerance": None,
+            "forecast_max_trials": 100000,
         },
     )
 
@@ -173,3 +183,151 @@ def test_calculate_forecast_settings(query_manager, settings, results):
 
         # we reach the target value
         assert trial_values[-1] == 15
+
+
+def test_calculate_forecast_seed(query_manager, settings, results):
+    settings.update({"simulation_seed": 1234})
+
+    data = BurnupForecastCalculator(query_manager, settings, results).run()
+    assert data.equals(
+        BurnupForecastCalculator(query_manager, settings, results).run()
+    )
+
+    settings.update({"burnup_forecast_chart_summary": True})
+
+    summary = BurnupForecastCalculator(query_manager, settings, results).run()
+    assert summary == (
+        BurnupForecastCalculator(query_manager, settings, results).run()
+    )
+
+
+def test_calculate_forecast_convergence(query_manager, settings, results):
+    settings.update({"forecast_tolerance": 0.05, "forecast_max_trials": 5000})
+    calculator = BurnupForecastCalculator(query_manager, settings, results)
+
+    # only a summary is kept, however many trials are run
+    summary = calculator.run()
+
+    # at least ten batches of 100 trials, but no more than the maximum
+    assert 1000 <= summary.trials <= 5000
+    assert summary.trials % 100 == 0
+
+
+def test_trial_convergence():
+    convergence = TrialConvergence([0.5, 0.9], 0.01, 1000, batch_size=10)
+
+    # Identical batches converge as soon as there are enough of them
+    for _ in range(convergence.min_batches - 1):
+        assert not convergence.add([3] * 10)
+    assert convergence.add([3] * 10)
+    assert convergence.trials == 100
+
+    # Outcomes that never settle stop at the maximum number of trials
+    convergence = TrialConvergence([0.5, 0.9], 0.01, 1000, batch_size=10)
+    batches = 0
+    while not convergence.add([batches % 2 * 100] * 10):
+        batches += 1
+    assert convergence.trials == 1000
+
+    # A row of outcomes per trial, with missing values ignored
+    convergence = TrialConvergence([0.5], 0.01, 1000, batch_size=2)
+    for _ in range(convergence.min_batches - 1):
+        convergence.add([[1, np.nan], [1, np.nan]])
+    assert convergence.add([[1, np.nan], [1, 2]])
+
+
+def test_trial_paths():
+    trials = DataFrame(
+        {
+            "Trial 0": [6, 8, 10, np.nan],
+            "Trial 1": [6, 7, 9, 12],
+            "Trial 2": [6, 6, 10, np.nan],
+        },
+        index=date_range("1970-01-02", periods=4, freq="D"),
+    )
+
+    paths = trial_paths(trials, target=10)
+    assert paths.shape == (3, 4, 2)
+    assert paths[1].tolist() == [[1, 6], [2, 7], [3, 9], [4, 10]]
+    assert paths[0, :3].tolist() == [[1, 6], [2, 8], [3, 10]]
+    assert np.isnan(paths[0, 3, 1])
+
+    # Only draw some of the trials
+    paths = trial_paths(trials, target=10, max_paths=2)
+    assert paths[:, 2, 1].tolist() == [10, 10]
+
+    assert list(trial_finish_dates(trials)) == [
+        Timestamp("1970-01-04"),
+        Timestamp("1970-01-05"),
+        Timestamp("1970-01-04"),
+    ]
+
+
+def test_calculate_forecast_summary(query_manager, settings, results):
+    settings.update({"burnup_forecast_chart_summary": True})
+    calculator = BurnupForecastCalculator(query_manager, settings, results)
+
+    summary = calculator.run()
+    assert isinstance(summary, ForecastSummary)
+    assert summary.trials == 10
+    assert summary.dates[0] == Timestamp("2018-01-09")
+
+    values = summary.value_quantiles([0.1, 0.5, 1])
+    assert values.iloc[0].tolist() == [6, 6, 6]
+    assert values.iloc[-1].tolist() == [30, 30, 30]
+
+    # Every trial finishes by the last date
+    finish_dates = summary.finish_date_quantiles([0.5, 1])
+    assert finish_dates[0.5] <= finish_dates[1] == summary.dates[-1]
+
+
+def test_forecast_summary_from_trials(tmp_path):
+    trials = DataFrame(
+        {
+            "Trial 0": [6, 8, 10, np.nan],
+            "Trial 1": [6, 7, 9, 10],
+            "Trial 2": [6, 6, 10, np.nan],
+            "Trial 3": [6, 7, 8, 10],
+        },
+        index=date_range("2018-01-09", periods=4, freq="D"),
+    )
+
+    summary = ForecastSummary.from_trials(trials)
+    assert summary.trials == 4
+    assert summary.finish_counts.tolist() == [0, 0, 2, 2]
+    assert summary.value_counts[1].tolist() == [1, 2, 1, 0, 0]
+
+    assert summary.finish_date_quantiles([0.5, 0.75]).tolist() == [
+        Timestamp("2018-01-11"),
+        Timestamp("2018-01-12"),
+    ]
+
+    # Finished trials count as being at the target
+    assert summary.value_quantiles([0.25, 0.5, 1]).iloc[3].tolist() == [
+        10,
+        10,
+        10,
+    ]
+
+    data = summary.to_frame([0.25, 0.5])
+    assert list(data.columns) == ["25%", "50%", "Completed"]
+    assert data["50%"].tolist() == [6, 7, 9, 10]
+    assert data["Completed"].tolist() == [0, 0, 0.5, 1]
+
+    assert summary == ForecastSummary.from_trials(trials.copy())
+    assert summary != ForecastSummary.from_trials(trials.iloc[:, :3])
+
+
+def test_write_forecast_data(query_manager, settings, results, tmp_path):
+    output_file = str(tmp_path / "forecast.csv")
+    settings.update(
+        {"burnup_forecast_chart": None, "burnup_forecast_data": [output_file]}
+    )
+    calculator = BurnupForecastCalculator(query_manager, settings, results)
+    results[BurnupForecastCalculator] = calculator.run()
+
+    calculator.write()
+
+    with open(output_file) as f:
+        assert f.readline() == "Date,10%,30%,50%,Completed\n"
+        assert f.readline() == "2018-01-09,6,6,6,0.0\n"
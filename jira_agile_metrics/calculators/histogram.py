@@ -1,14 +1,22 @@
 import logging
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 from ..calculator import Calculator
-from ..utils import get_extension, set_chart_style
+from ..chartcache import Chart
+from ..utils import (
+    LazyModule,
+    apply_chart_context,
+    get_extension,
+    write_arrow_file,
+    ARROW_EXTENSIONS,
+)
 
 from .cycletime import CycleTimeCalculator
 
+plt = LazyModule("matplotlib.pyplot", on_import=apply_chart_context)
+sns = LazyModule("seaborn", on_import=apply_chart_context)
+
 logger = logging.getLogger(__name__)
 
 
@@ -58,6 +66,11 @@ class HistogramCalculator(Calculator):
         else:
             logger.debug("No output file specified for histogram chart")
 
+    def write_sheets(self, workbook):
+        workbook.add_sheet(
+            "Histogram", self.get_result().to_frame(name="histogram")
+        )
+
     def write_file(self, data, output_files):
         file_data = self.get_result()
 
@@ -67,6 +80,10 @@ class HistogramCalculator(Calculator):
             logger.info("Writing histogram data to %s", output_file)
             if output_extension == ".json":
                 file_data.to_json(output_file, date_format="iso")
+            elif output_extension in ARROW_EXTENSIONS:
+                write_arrow_file(
+                    file_data.to_frame(name="histogram"), output_file
+                )
             elif output_extension == ".xlsx":
                 file_data.to_frame(name="histogram").to_excel(
                     output_file, "Histogram", header=True
@@ -109,6 +126,19 @@ class HistogramCalculator(Calculator):
             ", ".join(["%.2f" % (q * 100.0) for q in quantiles]),
         )
 
+        chart = Chart(
+            self,
+            output_file,
+            ct_days,
+            settings=[
+                "histogram_window",
+                "quantiles",
+                "histogram_chart_title",
+            ],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
         bins = range(int(ct_days.max()) + 2)
 
@@ -142,9 +172,8 @@ class HistogramCalculator(Calculator):
             )
 
         ax.set_ylabel("Frequency")
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing histogram chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing histogram chart to %s", chart.output_file)
+        chart.save(fig)
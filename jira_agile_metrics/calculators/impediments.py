@@ -1,17 +1,22 @@
 import logging
 import pandas as pd
-import matplotlib.pyplot as plt
 
 from ..calculator import Calculator
+from ..chartcache import Chart
 from ..utils import (
+    LazyModule,
+    apply_chart_context,
     get_extension,
+    write_arrow_file,
+    ARROW_EXTENSIONS,
     breakdown_by_month,
     breakdown_by_month_sum_days,
-    set_chart_style,
 )
 
 from .cycletime import CycleTimeCalculator
 
+plt = LazyModule("matplotlib.pyplot", on_import=apply_chart_context)
+
 logger = logging.getLogger(__name__)
 
 
@@ -113,6 +118,11 @@ class ImpedimentsCalculator(Calculator):
                 data, self.settings["impediments_status_days_chart"]
             )
 
+    def write_sheets(self, workbook):
+        data = self.get_result()
+        if data is not None:
+            workbook.add_sheet("Impediments", data)
+
     def write_data(self, data, output_files):
         for output_file in output_files:
             output_extension = get_extension(output_file)
@@ -120,6 +130,8 @@ class ImpedimentsCalculator(Calculator):
             logger.info("Writing impediments data to %s", output_file)
             if output_extension == ".json":
                 data.to_json(output_file, date_format="iso")
+            elif output_extension in ARROW_EXTENSIONS:
+                write_arrow_file(data, output_file)
             elif output_extension == ".xlsx":
                 data.to_excel(output_file, "Impediments", header=True)
             else:
@@ -147,6 +159,15 @@ class ImpedimentsCalculator(Calculator):
             logger.warning("Cannot draw impediments chart with zero items")
             return
 
+        chart = Chart(
+            self,
+            output_file,
+            breakdown,
+            settings=["impediments_window", "impediments_chart_title"],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         breakdown.plot.bar(ax=ax, stacked=True)
@@ -161,12 +182,11 @@ class ImpedimentsCalculator(Calculator):
         labels = [d.strftime("%b %y") for d in breakdown.index]
         ax.set_xticklabels(labels, rotation=90, size="small")
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing impediments chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing impediments chart to %s", chart.output_file)
+        chart.save(fig)
 
     def write_impediments_days_chart(self, chart_data, output_file):
         if len(chart_data.index) == 0:
@@ -187,6 +207,15 @@ class ImpedimentsCalculator(Calculator):
             logger.warning("Cannot draw impediments chart with zero items")
             return
 
+        chart = Chart(
+            self,
+            output_file,
+            breakdown,
+            settings=["impediments_window", "impediments_days_chart_title"],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         breakdown.plot.bar(ax=ax, stacked=True)
@@ -201,12 +230,11 @@ class ImpedimentsCalculator(Calculator):
         labels = [d.strftime("%b %y") for d in breakdown.index]
         ax.set_xticklabels(labels, rotation=90, size="small")
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing impediments days chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing impediments days chart to %s", chart.output_file)
+        chart.save(fig)
 
     def write_impediments_status_chart(self, chart_data, output_file):
         if len(chart_data.index) == 0:
@@ -231,6 +259,15 @@ class ImpedimentsCalculator(Calculator):
             )
             return
 
+        chart = Chart(
+            self,
+            output_file,
+            breakdown,
+            settings=["impediments_window", "impediments_status_chart_title"],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         breakdown.plot.bar(ax=ax, stacked=True)
@@ -245,12 +282,13 @@ class ImpedimentsCalculator(Calculator):
         labels = [d.strftime("%b %y") for d in breakdown.index]
         ax.set_xticklabels(labels, rotation=90, size="small")
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing impediments status chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info(
+            "Writing impediments status chart to %s", chart.output_file
+        )
+        chart.save(fig)
 
     def write_impediments_status_days_chart(self, chart_data, output_file):
         if len(chart_data.index) == 0:
@@ -275,6 +313,18 @@ class ImpedimentsCalculator(Calculator):
             )
             return
 
+        chart = Chart(
+            self,
+            output_file,
+            breakdown,
+            settings=[
+                "impediments_window",
+                "impediments_status_days_chart_title",
+            ],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         breakdown.plot.bar(ax=ax, stacked=True)
@@ -289,9 +339,10 @@ class ImpedimentsCalculator(Calculator):
         labels = [d.strftime("%b %y") for d in breakdown.index]
         ax.set_xticklabels(labels, rotation=90, size="small")
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing impediments status days chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info(
+            "Writing impediments status days chart to %s", chart.output_file
+        )
+        chart.save(fig)
@@ -1,11 +1,13 @@
 import logging
-import matplotlib.pyplot as plt
 
 from ..calculator import Calculator
-from ..utils import set_chart_style
+from ..chartcache import Chart
+from ..utils import LazyModule, apply_chart_context
 
 from .cfd import CFDCalculator
 
+plt = LazyModule("matplotlib.pyplot", on_import=apply_chart_context)
+
 logger = logging.getLogger(__name__)
 
 
@@ -63,6 +65,19 @@ class NetFlowChartCalculator(Calculator):
             logger.warning("Cannot draw net flow chart with zero items")
             return
 
+        chart = Chart(
+            self,
+            output_file,
+            chart_data,
+            settings=[
+                "net_flow_chart_title",
+                "net_flow_window",
+                "date_format",
+            ],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         if self.settings["net_flow_chart_title"]:
@@ -88,9 +103,8 @@ class NetFlowChartCalculator(Calculator):
         ]
         ax.set_xticklabels(labels, rotation=70, size="small")
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing ageing WIP chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing ageing WIP chart to %s", chart.output_file)
+        chart.save(fig)
@@ -1,7 +1,7 @@
 import logging
 
 from ..calculator import Calculator
-from ..utils import get_extension
+from ..utils import get_extension, write_arrow_file, ARROW_EXTENSIONS
 
 from .cycletime import CycleTimeCalculator
 
@@ -35,9 +35,18 @@ class PercentilesCalculator(Calculator):
             logger.info("Writing percentiles data to %s", output_file)
             if output_extension == ".json":
                 file_data.to_json(output_file, date_format="iso")
+            elif output_extension in ARROW_EXTENSIONS:
+                write_arrow_file(
+                    file_data.to_frame(name="percentiles"), output_file
+                )
             elif output_extension == ".xlsx":
                 file_data.to_frame(name="percentiles").to_excel(
                     output_file, "Percentiles", header=True
                 )
             else:
                 file_data.to_csv(output_file, header=True)
+
+    def write_sheets(self, workbook):
+        workbook.add_sheet(
+            "Percentiles", self.get_result().to_frame(name="percentiles")
+        )
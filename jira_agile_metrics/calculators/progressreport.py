@@ -1,36 +1,46 @@
 import io
 import logging
-import random
 import math
 import base64
 import datetime
 import dateutil
+import functools
 
 import numpy as np
 import pandas as pd
-import scipy.stats
-import statsmodels.formula.api as sm
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import matplotlib.transforms
-
-import jinja2
 
 from ..calculator import Calculator
-from ..utils import set_chart_style, to_days_since_epoch
+from ..simulation import get_simulation_random
+from ..utils import (
+    LazyModule,
+    apply_chart_context,
+    set_chart_style,
+    to_days_since_epoch,
+)
 
 from .cycletime import calculate_cycle_times
 from .throughput import calculate_throughput
-from .forecast import throughput_sampler
+from .forecast import throughput_sampler, trial_convergence
 from .cfd import calculate_cfd_data
 from .scatterplot import calculate_scatterplot_data
 
+scipy_stats = LazyModule("scipy.stats")
+sm = LazyModule("statsmodels.formula.api")
+plt = LazyModule("matplotlib.pyplot", on_import=apply_chart_context)
+mdates = LazyModule("matplotlib.dates")
+mtransforms = LazyModule("matplotlib.transforms")
+
 logger = logging.getLogger(__name__)
 
-jinja_env = jinja2.Environment(
-    loader=jinja2.PackageLoader("jira_agile_metrics", "calculators"),
-    autoescape=jinja2.select_autoescape(["html", "xml"]),
-)
+
+@functools.lru_cache(maxsize=None)
+def get_jinja_env():
+    import jinja2
+
+    return jinja2.Environment(
+        loader=jinja2.PackageLoader("jira_agile_metrics", "calculators"),
+        autoescape=jinja2.select_autoescape(["html", "xml"]),
+    )
 
 
 class ProgressReportCalculator(Calculator):
@@ -260,6 +270,16 @@ class ProgressReportCalculator(Calculator):
             for team in teams
         ]
 
+        # Each team simulates with its own independent random stream
+        team_rngs = dict(
+            zip(
+                teams,
+                get_simulation_random(self.settings).generators(
+                    "progress_report", len(teams)
+                ),
+            )
+        )
+
         for team in teams:
             update_team_sampler(
                 team=team,
@@ -267,6 +287,7 @@ class ProgressReportCalculator(Calculator):
                 cycle=cycle,
                 backlog_column=backlog_column,
                 done_column=done_column,
+                rng=team_rngs[team],
             )
 
         team_lookup = {team.name.lower(): team for team in teams}
@@ -350,6 +371,8 @@ class ProgressReportCalculator(Calculator):
                     quantiles,
                     trials=trials,
                     now=now,
+                    convergence=trial_convergence(self.settings, quantiles),
+                    rng=team_rngs.get(team),
                 )
 
         return {"outcomes": outcomes, "teams": teams}
@@ -370,7 +393,7 @@ class ProgressReportCalculator(Calculator):
         quantiles = self.settings["quantiles"]
         date_format = self.settings["date_format"]
 
-        template = jinja_env.get_template("progressreport_template.html")
+        template = get_jinja_env().get_template("progressreport_template.html")
         today = datetime.date.today()
 
         epics_by_team = {}
@@ -593,15 +616,34 @@ class Forecast(object):
         self.deadline_quantile = deadline_quantile
 
 
-def throughput_range_sampler(min, max):
+def throughput_range_sampler(min, max, rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
+
+    sample_buffer = dict(idx=0, buffer=[])
+
     def get_throughput_range_sample():
-        return random.randint(min, max)
+        # drawing samples one at a time from NumPy is slow
+        if sample_buffer["idx"] >= len(sample_buffer["buffer"]):
+            sample_buffer["buffer"] = rng.integers(
+                min, max, 100, endpoint=True
+            ).tolist()
+            sample_buffer["idx"] = 0
+
+        sample_buffer["idx"] += 1
+        return sample_buffer["buffer"][sample_buffer["idx"] - 1]
 
     return get_throughput_range_sample
 
 
 def update_team_sampler(
-    team, query_manager, cycle, backlog_column, done_column, frequency="1W"
+    team,
+    query_manager,
+    cycle,
+    backlog_column,
+    done_column,
+    frequency="1W",
+    rng=None,
 ):
 
     # Use query if set
@@ -627,13 +669,15 @@ def update_team_sampler(
             )
         else:
             team.sampler = throughput_sampler(
-                throughput, 0, 10
+                throughput, 0, 10, rng=rng
             )  # we have to hardcode the buffer size
 
     # Use min/max if set and query either wasn't set, or returned nothing
     if team.sampler is None and team.min_throughput and team.max_throughput:
         team.sampler = throughput_range_sampler(
-            team.min_throughput, max(team.min_throughput, team.max_throughput)
+            team.min_throughput,
+            max(team.min_throughput, team.max_throughput),
+            rng=rng,
         )
 
 
@@ -670,7 +714,9 @@ def calculate_team_throughput(
 def find_outcomes(
     query_manager, query, outcome_deadline_field, epic_query_template
 ):
-    for issue in query_manager.find_issues(query):
+    for issue in query_manager.find_issues(
+        query, fields=query_manager.search_fields(outcome_deadline_field)
+    ):
         yield Outcome(
             name=issue.fields.summary,
             key=issue.key,
@@ -689,7 +735,15 @@ def find_epics(
     outcome,
 ):
 
-    for issue in query_manager.find_issues(outcome.epic_query):
+    for issue in query_manager.find_issues(
+        outcome.epic_query,
+        fields=query_manager.search_fields(
+            epic_min_stories_field,
+            epic_max_stories_field,
+            epic_team_field,
+            epic_deadline_field,
+        ),
+    ):
         yield Epic(
             key=issue.key,
             summary=issue.fields.summary,
@@ -784,14 +838,29 @@ def update_story_counts(
 
 
 def forecast_to_complete(
-    team, epics, quantiles, trials=1000, max_iterations=9999, now=None
+    team,
+    epics,
+    quantiles,
+    trials=1000,
+    max_iterations=9999,
+    now=None,
+    convergence=None,
+    rng=None,
 ):
+    """Forecast the number of weeks for `team` to complete each of `epics`,
+    with `trials` Monte Carlo trials, or, if a `TrialConvergence` is given,
+    batches of trials until it has converged. Epic sizes are drawn by the
+    NumPy `Generator` `rng`. Sets the `forecast` of each epic.
+    """
 
     # Allows unit testing to use a fixed date
     if now is None:
         now = datetime.datetime.utcnow()
 
-    epic_trials = {e.key: pd.Series([np.nan] * trials) for e in epics}
+    if rng is None:
+        rng = np.random.default_rng()
+
+    epic_trials = {e.key: [] for e in epics}
 
     if team.sampler is None:
         logger.error("Team %s has no sampler. Unable to forecast." % team.name)
@@ -803,67 +872,78 @@ def forecast_to_complete(
             : team.wip
         ]
 
-    for trial in range(trials):
-
-        # track progress of each epic - target value is randomised
-        trial_values = [
-            {
-                "epic": e,
-                "value": e.stories_done,
-                "target": calculate_epic_target(e),
-                "weeks": 0,
-            }
-            for e in epics
-        ]
+    trial = 0
+    while True:
+        batch = []
 
-        active_epics = filter_active_epics(trial_values)
-        steps = 0
+        for _ in range(
+            trials if convergence is None else convergence.batch_size
+        ):
 
-        while len(active_epics) > 0 and steps <= max_iterations:
-            steps += 1
+            # track progress of each epic - target value is randomised
+            trial_values = [
+                {
+                    "epic": e,
+                    "value": e.stories_done,
+                    "target": calculate_epic_target(e, rng),
+                    "weeks": 0,
+                }
+                for e in epics
+            ]
 
-            # increment all epics that are not finished
-            for ev in trial_values:
-                if ev["value"] < ev["target"]:
-                    ev["weeks"] += 1
+            active_epics = filter_active_epics(trial_values)
+            steps = 0
 
-            # draw a sample (throughput over a week)
-            # for the team and distribute
-            # it over the active epics
-            sample = team.sampler()
-            per_active_epic = int(sample / len(active_epics))
-            remainder = sample % len(active_epics)
+            while len(active_epics) > 0 and steps <= max_iterations:
+                steps += 1
 
-            for ev in active_epics:
-                ev["value"] += per_active_epic
+                # increment all epics that are not finished
+                for ev in trial_values:
+                    if ev["value"] < ev["target"]:
+                        ev["weeks"] += 1
 
-            # reset in case some have finished
-            active_epics = filter_active_epics(trial_values)
+                # draw a sample (throughput over a week)
+                # for the team and distribute
+                # it over the active epics
+                sample = team.sampler()
+                per_active_epic = int(sample / len(active_epics))
+                remainder = sample % len(active_epics)
 
-            # apply remainder to a randomly picked epic
-            # if sample didn't evenly divide
-            if len(active_epics) > 0 and remainder > 0:
-                lucky_epic = random.randint(0, len(active_epics) - 1)
-                active_epics[lucky_epic]["value"] += remainder
+                for ev in active_epics:
+                    ev["value"] += per_active_epic
 
                 # reset in case some have finished
                 active_epics = filter_active_epics(trial_values)
 
-        if steps == max_iterations:
-            logger.warning(
-                "Trial %d did not complete after %d weeks, aborted."
-                % (
-                    trial,
-                    max_iterations,
+                # apply remainder to a randomly picked epic
+                # if sample didn't evenly divide
+                if len(active_epics) > 0 and remainder > 0:
+                    lucky_epic = int(rng.random() * len(active_epics))
+                    active_epics[lucky_epic]["value"] += remainder
+
+                    # reset in case some have finished
+                    active_epics = filter_active_epics(trial_values)
+
+            if steps == max_iterations:
+                logger.warning(
+                    "Trial %d did not complete after %d weeks, aborted."
+                    % (
+                        trial,
+                        max_iterations,
+                    )
                 )
-            )
 
-        # record this trial
-        for ev in trial_values:
-            epic_trials[ev["epic"].key].iat[trial] = ev["weeks"]
+            # record this trial
+            for ev in trial_values:
+                epic_trials[ev["epic"].key].append(ev["weeks"])
+            batch.append([ev["weeks"] for ev in trial_values])
+            trial += 1
+
+        if convergence is None or convergence.add(batch):
+            break
 
     for epic in epics:
-        trials = epic_trials[epic.key].dropna()
+        trials = pd.Series(epic_trials[epic.key], dtype=float)
 
         if any(
             trials
@@ -878,7 +958,7 @@ def forecast_to_complete(
                 # ...and what trial quantile does that correspond
                 # to (higher = more confident)
                 deadline_quantile = (
-                    scipy.stats.percentileofscore(
+                    scipy_stats.percentileofscore(
                         trials, weeks_to_deadline, kind="weak"
                     )
                     / 100
@@ -892,9 +972,16 @@ def forecast_to_complete(
             epic.forecast = None
 
 
-def calculate_epic_target(epic):
-    return random.randint(
-        max(epic.min_stories, 0), max(epic.min_stories, epic.max_stories, 1)
+def calculate_epic_target(epic, rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
+
+    return int(
+        rng.integers(
+            max(epic.min_stories, 0),
+            max(epic.min_stories, epic.max_stories, 1),
+            endpoint=True,
+        )
     )
 
 
@@ -934,7 +1021,7 @@ def plot_cfd(
     fig, ax = plt.subplots()
     fig.autofmt_xdate()
 
-    transform_horizontal = matplotlib.transforms.blended_transform_factory(
+    transform_horizontal = mtransforms.blended_transform_factory(
         ax.transAxes, ax.transData
     )
 
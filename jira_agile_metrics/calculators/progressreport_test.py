@@ -1,5 +1,6 @@
 import random
 import pytest
+import numpy as np
 import pandas as pd
 from datetime import datetime, date, timedelta
 from ..conftest import (
@@ -12,6 +13,7 @@ from ..conftest import (
 from ..querymanager import QueryManager
 from ..utils import extend_dict
 
+from .forecast import TrialConvergence
 from .progressreport import (
     throughput_range_sampler,
     update_team_sampler,
@@ -83,6 +85,8 @@ def settings(custom_settings):
         custom_settings,
         {
             "quantiles": [0.1, 0.3, 0.5],
+            "forecast_tolerance": None,
+            "forecast_max_trials": 100000,
             "progress_report": "progress.html",
             "progress_report_title": "Test progress report",
             "progress_report_epic_query_template": (
@@ -638,6 +642,16 @@ def test_throughput_range_sampler():
     for i in range(10):
         assert 5 <= sampler() <= 10
 
+    # The same generator seed draws the same samples
+    samples = [
+        [sampler() for i in range(200)]
+        for sampler in [
+            throughput_range_sampler(5, 10, rng=np.random.default_rng(1)),
+            throughput_range_sampler(5, 10, rng=np.random.default_rng(1)),
+        ]
+    ]
+    assert samples[0] == samples[1]
+
 
 def test_calculate_epic_target():
     assert (
@@ -1281,6 +1295,52 @@ def test_forecast_to_complete_wip_1():
     )  # deadline is after worst case scenario
 
 
+def test_forecast_to_complete_convergence():
+
+    team = Team(
+        name="Team 1",
+        wip=1,
+        sampler=throughput_range_sampler(1, 3),
+    )
+
+    epics = [
+        Epic(
+            key="E-1",
+            summary="Epic 1",
+            status="in-progress",
+            resolution=None,
+            resolution_date=None,
+            min_stories=10,
+            max_stories=20,
+            team_name="Team 1",
+            deadline=None,
+            team=team,
+            stories_raised=10,
+            stories_in_backlog=10,
+            stories_in_progress=0,
+            stories_done=0,
+        ),
+    ]
+
+    convergence = TrialConvergence([0.5, 0.9], 0.05, 2000, batch_size=50)
+    forecast_to_complete(
+        team,
+        epics,
+        [0.5, 0.9],
+        now=datetime(2018, 1, 10),
+        convergence=convergence,
+    )
+
+    assert 500 <= convergence.trials <= 2000
+    assert convergence.trials % 50 == 0
+
+    # between 10 stories at 3/wk and 20 stories at 1/wk
+    assert 4 <= epics[0].forecast.quantiles[0][1] <= 20
+    assert (
+        epics[0].forecast.quantiles[0][1] <= epics[0].forecast.quantiles[1][1]
+    )
+
+
 def test_forecast_to_complete_wip_2():
 
     # double the wip, but also double the throughput of wip=1 test
@@ -1536,6 +1596,38 @@ def test_calculator(query_manager, settings, results):
     # calculator.write()
 
 
+def test_calculator_team_streams(
+    query_manager, settings, results, monkeypatch
+):
+    settings = extend_dict(
+        settings,
+        {
+            "simulation_seed": 1234,
+            "progress_report_teams": settings["progress_report_teams"]
+            + [dict(settings["progress_report_teams"][0], name="TEAM 1")],
+        },
+    )
+
+    rngs = {}
+
+    def record_rng(team, rng, **kwargs):
+        rngs[team.name] = rng
+        return update_team_sampler(team=team, rng=rng, **kwargs)
+
+    monkeypatch.setattr(
+        "jira_agile_metrics.calculators.progressreport.update_team_sampler",
+        record_rng,
+    )
+
+    calculator = ProgressReportCalculator(query_manager, settings, results)
+    calculator.run(trials=10, now=datetime(2018, 1, 10))
+
+    # Teams whose names differ only in case still have their own streams
+    assert len(rngs) == 3
+    assert rngs["Team 1"] is not rngs["TEAM 1"]
+    assert rngs["Team 1"] is not rngs["Team 2"]
+
+
 def test_calculator_no_outcomes(query_manager, settings, results):
     settings = extend_dict(
         settings,
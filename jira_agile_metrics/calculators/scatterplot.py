@@ -1,13 +1,22 @@
 import logging
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 
 from ..calculator import Calculator
-from ..utils import get_extension, set_chart_style
+from ..chartcache import Chart
+from ..utils import (
+    LazyModule,
+    apply_chart_context,
+    get_extension,
+    write_arrow_file,
+    arrow_category_columns,
+    ARROW_EXTENSIONS,
+)
 
 from .cycletime import CycleTimeCalculator
 
+plt = LazyModule("matplotlib.pyplot", on_import=apply_chart_context)
+mdates = LazyModule("matplotlib.dates")
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,6 +45,9 @@ class ScatterplotCalculator(Calculator):
         else:
             logger.debug("No output file specified for scatterplot chart")
 
+    def write_sheets(self, workbook):
+        workbook.add_sheet("Scatter", self.get_result(), index=False)
+
     def write_file(self, data, output_files):
         file_data = data.copy()
         file_data["completed_date"] = file_data["completed_date"].map(
@@ -47,6 +59,11 @@ class ScatterplotCalculator(Calculator):
             logger.info("Writing scatterplot data to %s", output_file)
             if output_extension == ".json":
                 file_data.to_json(output_file, date_format="iso")
+            elif output_extension in ARROW_EXTENSIONS:
+                # Keep the completed date as a timestamp
+                write_arrow_file(
+                    data, output_file, arrow_category_columns(self.settings)
+                )
             elif output_extension == ".xlsx":
                 file_data.to_excel(output_file, "Scatter", index=False)
             else:
@@ -88,6 +105,20 @@ class ScatterplotCalculator(Calculator):
             ", ".join(["%.2f" % (q * 100.0) for q in quantiles]),
         )
 
+        chart = Chart(
+            self,
+            output_file,
+            chart_data,
+            settings=[
+                "scatterplot_window",
+                "quantiles",
+                "scatterplot_chart_title",
+                "date_format",
+            ],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
         fig.autofmt_xdate()
 
@@ -122,12 +153,11 @@ class ScatterplotCalculator(Calculator):
                 ha="left",
             )
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing scatterplot chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing scatterplot chart to %s", chart.output_file)
+        chart.save(fig)
 
 
 def calculate_scatterplot_data(cycle_data):
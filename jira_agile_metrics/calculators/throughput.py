@@ -1,13 +1,21 @@
 import logging
 import pandas as pd
-import matplotlib.pyplot as plt
-import statsmodels.formula.api as sm
 
 from ..calculator import Calculator
-from ..utils import get_extension, set_chart_style
+from ..chartcache import Chart
+from ..utils import (
+    LazyModule,
+    apply_chart_context,
+    get_extension,
+    write_arrow_file,
+    ARROW_EXTENSIONS,
+)
 
 from .cycletime import CycleTimeCalculator
 
+plt = LazyModule("matplotlib.pyplot", on_import=apply_chart_context)
+sm = LazyModule("statsmodels.formula.api")
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,6 +48,9 @@ class ThroughputCalculator(Calculator):
         else:
             logger.debug("No output file specified for throughput chart")
 
+    def write_sheets(self, workbook):
+        workbook.add_sheet("Throughput", self.get_result())
+
     def write_file(self, data, output_files):
 
         for output_file in output_files:
@@ -48,6 +59,8 @@ class ThroughputCalculator(Calculator):
             logger.info("Writing throughput data to %s", output_file)
             if output_extension == ".json":
                 data.to_json(output_file, date_format="iso")
+            elif output_extension in ARROW_EXTENSIONS:
+                write_arrow_file(data, output_file)
             elif output_extension == ".xlsx":
                 data.to_excel(output_file, "Throughput", header=True)
             else:
@@ -62,6 +75,15 @@ class ThroughputCalculator(Calculator):
             )
             return
 
+        chart = Chart(
+            self,
+            output_file,
+            chart_data,
+            settings=["throughput_chart_title", "date_format"],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         if self.settings["throughput_chart_title"]:
@@ -109,12 +131,11 @@ class ThroughputCalculator(Calculator):
 
         ax.plot(chart_data.index, chart_data["fitted"], "--", linewidth=2)
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing throughput chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing throughput chart to %s", chart.output_file)
+        chart.save(fig)
 
 
 def calculate_throughput(cycle_data, frequency, window=None):
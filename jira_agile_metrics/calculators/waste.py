@@ -1,10 +1,12 @@
 import logging
 import dateutil
 import pandas as pd
-from matplotlib import pyplot as plt
 
 from ..calculator import Calculator
-from ..utils import set_chart_style
+from ..chartcache import Chart
+from ..utils import LazyModule, apply_chart_context
+
+plt = LazyModule("matplotlib.pyplot", on_import=apply_chart_context)
 
 logger = logging.getLogger(__name__)
 
@@ -52,7 +54,9 @@ class WasteCalculator(Calculator):
             "withdrawn_date": {"data": [], "dtype": "datetime64[ns]"},
         }
 
-        for issue in self.query_manager.find_issues(query):
+        for issue in self.query_manager.find_issues(
+            query, fields=self.query_manager.search_fields()
+        ):
 
             # Assume all waste items are resolved somehow
             if not issue.fields.resolution:
@@ -136,6 +140,15 @@ class WasteCalculator(Calculator):
             logger.warning("Cannot draw waste chart with zero items")
             return
 
+        chart = Chart(
+            self,
+            output_file,
+            breakdown,
+            settings=["waste_frequency", "waste_window", "waste_chart_title"],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         breakdown.plot.bar(ax=ax, stacked=True)
@@ -150,9 +163,8 @@ class WasteCalculator(Calculator):
         labels = [d.strftime("%b %y") for d in breakdown.index]
         ax.set_xticklabels(labels, rotation=90, size="small")
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing waste chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing waste chart to %s", chart.output_file)
+        chart.save(fig)
@@ -1,12 +1,14 @@
 import logging
-import matplotlib.pyplot as plt
 import pandas as pd
 
 from ..calculator import Calculator
-from ..utils import set_chart_style
+from ..chartcache import Chart
+from ..utils import LazyModule, apply_chart_context
 
 from .cfd import CFDCalculator
 
+plt = LazyModule("matplotlib.pyplot", on_import=apply_chart_context)
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,6 +38,20 @@ class WIPChartCalculator(Calculator):
             logger.warning("Cannot draw WIP chart with no completed items")
             return
 
+        chart = Chart(
+            self,
+            output_file,
+            chart_data,
+            settings=[
+                "wip_chart_title",
+                "wip_frequency",
+                "wip_window",
+                "date_format",
+            ],
+        )
+        if chart.restore():
+            return
+
         fig, ax = plt.subplots()
 
         if self.settings["wip_chart_title"]:
@@ -72,9 +88,8 @@ class WIPChartCalculator(Calculator):
         ax.set_xlabel("Period starting")
         ax.set_ylabel("WIP")
 
-        set_chart_style()
+        chart.set_style()
 
         # Write file
-        logger.info("Writing WIP chart to %s", output_file)
-        fig.savefig(output_file, bbox_inches="tight", dpi=300)
-        plt.close(fig)
+        logger.info("Writing WIP chart to %s", chart.output_file)
+        chart.save(fig)
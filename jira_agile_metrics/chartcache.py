@@ -0,0 +1,258 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import utils
+from .rendering import (
+    chart_output_file,
+    disable_antialiasing,
+    get_render_profile,
+)
+from .utils import LazyModule, get_extension, set_chart_style
+
+plt = LazyModule("matplotlib.pyplot")
+
+logger = logging.getLogger(__name__)
+
+
+class ChartCache(object):
+    """A directory of previously rendered charts, named after a hash of
+    everything used to draw them (see `Chart`). Files not used for
+    `max_age` days are removed, as are the least recently used files once
+    the directory holds more than `max_size` bytes.
+    """
+
+    version = 1
+
+    def __init__(self, directory, max_age=None, max_size=None):
+        self.directory = directory
+        self.max_age = max_age
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key, extension):
+        return os.path.join(self.directory, key + extension)
+
+    def restore(self, key, output_file):
+        """Copy the chart cached under `key` to `output_file`, if there is
+        one. Returns True if the chart was found.
+        """
+        path = self.path(key, get_extension(output_file))
+        try:
+            shutil.copyfile(path, output_file)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+
+        # Keep recently used charts when evicting
+        os.utime(path)
+        self.hits += 1
+        return True
+
+    def store(self, key, output_file):
+        """Save a copy of the chart in `output_file` under `key`"""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(output_file, temp_path)
+            os.replace(temp_path, self.path(key, get_extension(output_file)))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def evict(self, now=None):
+        """Remove charts that are too old, then the least recently used
+        charts until the cache is small enough
+        """
+        if now is None:
+            now = time.time()
+
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+
+        for mtime, size, path in entries:
+            too_old = (
+                self.max_age is not None
+                and now - mtime > self.max_age * 24 * 60 * 60
+            )
+            too_big = self.max_size is not None and total > self.max_size
+            if not (too_old or too_big):
+                continue
+
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        if removed:
+            logger.info("Removed %d charts from the chart cache", removed)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_chart_cache(settings):
+    """Return the `ChartCache` configured in `settings`, or None. The cache
+    is evicted the first time it is used in a process.
+    """
+
+    directory = settings.get("chart_cache")
+    if not directory:
+        return None
+
+    max_age = settings.get("chart_cache_max_age")
+    max_size = settings.get("chart_cache_max_size")
+    key = (os.path.abspath(directory), max_age, max_size)
+
+    with _caches_lock:
+        if key not in _caches:
+            cache = ChartCache(
+                key[0],
+                max_age=max_age,
+                max_size=max_size * 1024 * 1024 if max_size else None,
+            )
+            cache.evict()
+            _caches[key] = cache
+        return _caches[key]
+
+
+class Chart(object):
+    """A chart to be written to `output_file` by `calculator`, drawn from
+    `inputs` (usually data frames) and the calculator's settings named in
+    `settings`. Only those settings are part of the cache key, so list every
+    setting read when drawing the chart.
+
+    The chart is rendered with the profile for its output file setting (see
+    `get_render_profile()`), which may change the extension of
+    `self.output_file`.
+
+    If a chart cache is configured, `restore()` copies a chart previously
+    drawn from the same inputs and settings to `output_file`, so that
+    drawing can be skipped. Otherwise, draw the chart, call `set_style()`
+    and then `save()`.
+    """
+
+    def __init__(self, calculator, output_file, *inputs, settings=()):
+        self.profile = get_render_profile(
+            calculator.settings,
+            chart_setting(calculator.settings, output_file),
+        )
+        self.output_file = chart_output_file(output_file, self.profile)
+        self.cache = get_chart_cache(calculator.settings)
+        self.key = (
+            chart_key(
+                calculator.__class__.__name__,
+                get_extension(self.output_file),
+                utils._chart_context,
+                {name: calculator.settings.get(name) for name in settings},
+                self.profile,
+                *inputs
+            )
+            if self.cache is not None
+            else None
+        )
+
+    def restore(self):
+        if self.cache is None or not self.cache.restore(
+            self.key, self.output_file
+        ):
+            return False
+
+        logger.info("Reusing unchanged chart for %s", self.output_file)
+        return True
+
+    def set_style(self):
+        """Apply the seaborn style, unless the profile turns it off"""
+        if self.profile["style"]:
+            set_chart_style()
+
+    def save(self, fig, **kwargs):
+        """Save `fig` to the output file and close it"""
+        kwargs.setdefault("dpi", self.profile["dpi"])
+        if self.profile["tight_bbox"]:
+            kwargs.setdefault("bbox_inches", "tight")
+        if not self.profile["antialiased"]:
+            disable_antialiasing(fig)
+
+        fig.savefig(self.output_file, **kwargs)
+        plt.close(fig)
+
+        if self.cache is not None:
+            self.cache.store(self.key, self.output_file)
+
+
+def chart_setting(settings, output_file):
+    """Return the name of the chart output file setting with the value
+    `output_file`, if any
+    """
+
+    for key, value in settings.items():
+        if key.endswith("_chart") and value == output_file:
+            return key
+    return None
+
+
+def chart_key(*inputs):
+    """Return a hash of `inputs`"""
+
+    h = hashlib.sha256(str(ChartCache.version).encode())
+    for value in inputs:
+        h.update(b"\0")
+        update_hash(h, value)
+    return h.hexdigest()
+
+
+def update_hash(h, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        h.update(
+            repr(
+                (
+                    type(value).__name__,
+                    value.shape,
+                    value.index.names,
+                    getattr(value, "name", None),
+                    list(value.columns) if value.ndim == 2 else None,
+                    [
+                        str(d)
+                        for d in (
+                            value.dtypes if value.ndim == 2 else [value.dtype]
+                        )
+                    ],
+                )
+            ).encode()
+        )
+        try:
+            h.update(pd.util.hash_pandas_object(value).values.tobytes())
+        except TypeError:  # e.g. lists in cells
+            h.update(pickle.dumps(value))
+    elif isinstance(value, np.ndarray):
+        h.update(repr((value.shape, str(value.dtype))).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    else:
+        try:
+            h.update(json.dumps(value, sort_keys=True, default=repr).encode())
+        except TypeError:  # e.g. keys of different types
+            h.update(repr(value).encode())
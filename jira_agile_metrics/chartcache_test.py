@@ -0,0 +1,121 @@
+import os
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from .calculator import Calculator, run_calculators
+from .chartcache import Chart, ChartCache, chart_key, get_chart_cache
+
+
+class LineChart(Calculator):
+    def __init__(self, settings):
+        super().__init__(None, settings, {})
+        self.drawn = 0
+
+    def write_chart(self, data, output_file):
+        chart = Chart(self, output_file, data, settings=["title"])
+        if chart.restore():
+            return
+
+        self.drawn += 1
+        fig, ax = plt.subplots()
+        ax.plot(data.index, data["value"])
+        chart.save(fig, dpi=50)
+
+
+def test_chart_is_reused_until_data_or_settings_change(tmp_path):
+    settings = {"chart_cache": str(tmp_path / "cache"), "title": "One"}
+    output_file = str(tmp_path / "chart.png")
+    data = pd.DataFrame({"value": [1, 3, 2]})
+
+    calculator = LineChart(settings)
+    calculator.write_chart(data, output_file)
+    assert calculator.drawn == 1
+    with open(output_file, "rb") as f:
+        drawn = f.read()
+
+    os.unlink(output_file)
+    calculator.write_chart(data.copy(), output_file)
+    assert calculator.drawn == 1
+    with open(output_file, "rb") as f:
+        assert f.read() == drawn
+
+    calculator.write_chart(pd.DataFrame({"value": [1, 3, 3]}), output_file)
+    assert calculator.drawn == 2
+
+    calculator = LineChart(dict(settings, title="Two"))
+    calculator.write_chart(data, output_file)
+    assert calculator.drawn == 1
+
+    # Another format is drawn separately
+    calculator.write_chart(data, str(tmp_path / "chart.svg"))
+    assert calculator.drawn == 2
+
+    # Settings the chart does not read are ignored
+    calculator = LineChart(dict(settings, title="Two", other="Three"))
+    calculator.write_chart(data, output_file)
+    assert calculator.drawn == 0
+
+
+def test_chart_is_reused_between_runs_without_seed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    settings = {
+        "chart_cache": str(tmp_path / "cache"),
+        "line_chart": "chart.png",
+        "simulation_seed": None,
+    }
+
+    class LineChartCalculator(Calculator):
+        def run(self):
+            return pd.DataFrame({"value": [1, 3, 2]})
+
+        def write(self):
+            LineChart(self.settings).write_chart(
+                self.get_result(), self.settings["line_chart"]
+            )
+
+    run_calculators([LineChartCalculator], None, settings)
+    run_calculators([LineChartCalculator], None, settings)
+
+    cache = get_chart_cache(settings)
+    assert cache.misses == 1
+    assert cache.hits == 1
+
+
+def test_chart_without_cache(tmp_path):
+    calculator = LineChart({})
+    output_file = str(tmp_path / "chart.png")
+    data = pd.DataFrame({"value": [1, 3, 2]})
+
+    calculator.write_chart(data, output_file)
+    calculator.write_chart(data, output_file)
+    assert calculator.drawn == 2
+    assert os.listdir(str(tmp_path)) == ["chart.png"]
+
+
+def test_chart_key():
+    data = pd.DataFrame({"a": [1, 2], "b": [[1], [2]]})
+
+    assert chart_key(data, {"x": 1}) == chart_key(data.copy(), {"x": 1})
+    assert chart_key(data, {"x": 1}) != chart_key(data, {"x": 2})
+    assert chart_key(data) != chart_key(data.rename(columns={"a": "c"}))
+    assert chart_key(data["a"]) != chart_key(data["a"].rename("c"))
+
+
+def test_evict(tmp_path):
+    cache = ChartCache(str(tmp_path), max_age=10, max_size=250)
+    now = 100 * 24 * 60 * 60
+
+    for name, size, age in [
+        ("old.png", 10, 11),
+        ("used.png", 100, 1),
+        ("recent.png", 100, 2),
+        ("least-recent.png", 100, 3),
+    ]:
+        path = tmp_path / name
+        path.write_bytes(b"x" * size)
+        mtime = now - age * 24 * 60 * 60
+        os.utime(str(path), (mtime, mtime))
+
+    cache.evict(now=now)
+    assert sorted(os.listdir(str(tmp_path))) == ["recent.png", "used.png"]
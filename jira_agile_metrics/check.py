@@ -0,0 +1,264 @@
+import json
+import logging
+
+from jira.exceptions import JIRAError
+
+from .config import ConfigError
+from .querymanager import QueryManager
+
+logger = logging.getLogger(__name__)
+
+# Field settings that must be field names, by the setting that enables them
+NAMED_FIELDS = {
+    "debt_query": ["debt_priority_field"],
+    "defects_query": [
+        "defects_priority_field",
+        "defects_type_field",
+        "defects_environment_field",
+    ],
+}
+
+# Field settings that may be field names or ids
+PROGRESS_REPORT_FIELDS = [
+    "progress_report_epic_deadline_field",
+    "progress_report_epic_min_stories_field",
+    "progress_report_epic_max_stories_field",
+    "progress_report_epic_team_field",
+    "progress_report_outcome_deadline_field",
+]
+
+# Used to fill in query templates, so that the result can be parsed
+PLACEHOLDER = '"CHECK-1"'
+
+
+def check_options(jira, options, issue_store=None):
+    """Check the configuration `options` (from `config_to_options()`) with
+    `check_config()`. Only the configuration file itself can be checked for
+    connections other than JIRA.
+    """
+
+    if options["connection"]["type"] != "jira":
+        logger.info("Queries and fields are only checked for JIRA")
+        return []
+
+    return check_config(jira, options["settings"], issue_store)
+
+
+def check_config(jira, settings, issue_store=None):
+    """Check that the fields and queries in `settings` are valid for the
+    given JIRA instance, without fetching any issues. Returns a list of
+    problems found, which is empty if the configuration is valid.
+    """
+
+    # Resolve attributes one at a time below, to report all problems
+    query_manager = QueryManager(
+        jira, dict(settings, attributes={}), issue_store=issue_store
+    )
+
+    problems = []
+
+    for name, message in check_fields(query_manager, settings):
+        problems.append("%s: %s" % (name, message))
+
+    queries = []
+    for name, query in find_queries(settings):
+        if isinstance(query, ConfigError):
+            problems.append("%s: %s" % (name, query))
+        else:
+            queries.append((name, query))
+
+    errors = parse_jql(jira, [query for _, query in queries])
+    for (name, query), query_errors in zip(queries, errors):
+        for error in query_errors:
+            problems.append("%s `%s`: %s" % (name, query, error))
+
+    return problems
+
+
+def check_fields(query_manager, settings):
+    """Yield a tuple of the setting and problem for each field in `settings`
+    that does not exist in JIRA.
+    """
+
+    def resolve(name, field, allow_id=False):
+        if allow_id and field in query_manager.jira_fields_to_names:
+            return None
+        try:
+            query_manager.field_name_to_id(field)
+        except ConfigError as e:
+            return (name, str(e))
+        return None
+
+    # The cycle time calculator always reads the `Flagged` field
+    checks = [("Flagged field", "Flagged", False)]
+
+    checks.extend(
+        ("Attribute `%s`" % name, field, False)
+        for name, field in settings.get("attributes", {}).items()
+    )
+
+    for query_setting, field_settings in NAMED_FIELDS.items():
+        if settings.get(query_setting):
+            checks.extend(
+                (setting, settings[setting], False)
+                for setting in field_settings
+                if settings.get(setting)
+            )
+
+    if settings.get("progress_report"):
+        checks.extend(
+            (setting, settings[setting], True)
+            for setting in PROGRESS_REPORT_FIELDS
+            if settings.get(setting)
+        )
+
+    for name, field, allow_id in checks:
+        problem = resolve(name, field, allow_id)
+        if problem is not None:
+            yield problem
+
+
+def find_queries(settings):
+    """Yield a tuple of a description and the JQL of each query in
+    `settings`. Templates are filled in with a placeholder issue key. If a
+    template cannot be filled in, a `ConfigError` is yielded instead of
+    the JQL.
+    """
+
+    for query in settings.get("queries") or []:
+        if query["jql"]:
+            yield ("Query", query["jql"])
+
+    for setting in ("debt_query", "defects_query", "waste_query"):
+        if settings.get(setting):
+            yield (setting, settings[setting])
+
+    if not settings.get("progress_report"):
+        return
+
+    def fill(setting, template, **kwargs):
+        try:
+            return (setting, template.format(**kwargs))
+        except (KeyError, IndexError, ValueError) as e:
+            return (
+                setting,
+                ConfigError("Unable to fill in template: %s" % e),
+            )
+
+    if settings.get("progress_report_outcome_query"):
+        yield (
+            "progress_report_outcome_query",
+            settings["progress_report_outcome_query"],
+        )
+
+    if settings.get("progress_report_epic_query_template"):
+        yield fill(
+            "progress_report_epic_query_template",
+            settings["progress_report_epic_query_template"],
+            outcome=PLACEHOLDER,
+        )
+
+    if settings.get("progress_report_story_query_template"):
+        yield fill(
+            "progress_report_story_query_template",
+            settings["progress_report_story_query_template"],
+            epic=PLACEHOLDER,
+            team=PLACEHOLDER,
+            outcome=PLACEHOLDER,
+        )
+
+    for outcome in settings.get("progress_report_outcomes") or []:
+        if outcome["epic_query"]:
+            yield (
+                "Epic query for outcome `%s`"
+                % (outcome["name"] or outcome["key"]),
+                outcome["epic_query"],
+            )
+
+    for team in settings.get("progress_report_teams") or []:
+        if team["throughput_samples"]:
+            yield fill(
+                "Throughput samples for team `%s`" % team["name"],
+                team["throughput_samples"],
+                team=PLACEHOLDER,
+            )
+
+
+def parse_jql(jira, queries):
+    """Return a list of the errors JIRA finds in each of `queries`, using
+    the JQL parse endpoint. JIRA Server does not have this endpoint, so if
+    it is not found, each query is run as a search for no issues instead.
+    """
+
+    if not queries:
+        return []
+
+    try:
+        result = post_json(
+            jira,
+            "jql/parse",
+            {"queries": list(queries)},
+            params={"validation": "strict"},
+        )
+    except JIRAError as e:
+        if e.status_code != 404:
+            raise
+    else:
+        return [query.get("errors", []) for query in result["queries"]]
+
+    errors = []
+    for query in queries:
+        try:
+            jira._get_json(
+                "search",
+                params={
+                    "jql": query,
+                    "maxResults": 0,
+                    "fields": "key",
+                    "validateQuery": "strict",
+                },
+            )
+        except JIRAError as e:
+            if e.status_code != 400:
+                raise
+            errors.append(error_messages(e) or [e.text])
+        else:
+            errors.append([])
+
+    return errors
+
+
+def post_json(jira, path, data, params=None):
+    """POST `data` as JSON to the REST API `path` and return the decoded
+    response.
+    """
+
+    if hasattr(jira, "_post_json"):  # `AsyncJIRA`
+        return jira._post_json(path, data, params)
+
+    response = jira._session.post(
+        jira._get_url(path), params=params, data=json.dumps(data)
+    )
+    return response.json()
+
+
+def error_messages(e):
+    try:
+        return json.loads(e.text).get("errorMessages", [])
+    except (TypeError, ValueError, AttributeError):
+        return []
+
+
+def print_problems(config_file, problems):
+    """Print the `problems` found in `config_file` and return the exit
+    status.
+    """
+
+    if not problems:
+        print("%s: configuration is valid" % config_file)
+        return 0
+
+    print("%s: %d problem(s) found" % (config_file, len(problems)))
+    for problem in problems:
+        print("  " + problem)
+    return 1
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from jira.exceptions import JIRAError
+
+from .check import check_config
+from .conftest import FauxJIRA as JIRA
+from .utils import extend_dict
+
+
+@pytest.fixture
+def jira(custom_fields):
+    jira = JIRA(fields=custom_fields, issues=[])
+    jira.parsed = []
+
+    def post_json(path, data, params=None):
+        assert path == "jql/parse"
+        jira.parsed.extend(data["queries"])
+        return {
+            "queries": [
+                {"query": q, "errors": ["Bad query"] if "bad" in q else []}
+                for q in data["queries"]
+            ]
+        }
+
+    jira._post_json = post_json
+    return jira
+
+
+def test_check_valid_config(jira, custom_settings):
+    settings = extend_dict(
+        custom_settings,
+        {
+            "debt_query": "issuetype = Bug",
+            "debt_priority_field": "Size",
+            "progress_report": "progress.html",
+            "progress_report_epic_query_template": "issuetype = Epic",
+            "progress_report_story_query_template": "'Epic link' = {epic}",
+            "progress_report_epic_team_field": "customfield_001",
+        },
+    )
+
+    assert check_config(jira, settings) == []
+    assert jira.parsed == [
+        "(filter=123)",
+        "issuetype = Bug",
+        "issuetype = Epic",
+        "'Epic link' = \"CHECK-1\"",
+    ]
+
+    # Issues are never fetched
+    assert jira._issues == []
+
+
+def test_check_reports_all_problems(jira, custom_settings):
+    settings = extend_dict(
+        custom_settings,
+        {
+            "attributes": {"Team": "Teem", "Estimate": "Sise"},
+            "queries": [{"jql": "bad query", "value": None}],
+            "defects_query": "issuetype = Bug",
+            "defects_priority_field": "Priority",
+            "progress_report": "progress.html",
+            "progress_report_epic_query_template": "issuetype = Epic",
+            "progress_report_story_query_template": "'Epic link' = {epik}",
+        },
+    )
+
+    problems = check_config(jira, settings)
+    assert len(problems) == 5
+    assert problems[0].startswith("Attribute `Team`: JIRA field with name")
+    assert problems[1].startswith("Attribute `Estimate`: JIRA field")
+    assert problems[2].startswith("defects_priority_field: JIRA field")
+    assert problems[3] == (
+        "progress_report_story_query_template: "
+        "Unable to fill in template: 'epik'"
+    )
+    assert problems[4] == "Query `bad query`: Bad query"
+
+
+def test_check_without_jql_parse_endpoint(jira, custom_settings):
+    searches = []
+
+    def post_json(path, data, params=None):
+        raise JIRAError(status_code=404)
+
+    def get_json(path, params=None):
+        searches.append((path, params["jql"], params["maxResults"]))
+        if "bad" in params["jql"]:
+            raise JIRAError(
+                status_code=400,
+                text=json.dumps({"errorMessages": ["Bad query"]}),
+            )
+        return {"issues": [], "total": 0}
+
+    jira._post_json = post_json
+    jira._get_json = get_json
+
+    settings = extend_dict(custom_settings, {"waste_query": "bad query"})
+
+    assert check_config(jira, settings) == [
+        "waste_query `bad query`: Bad query"
+    ]
+    assert searches == [
+        ("search", "(filter=123)", 0),
+        ("search", "bad query", 0),
+    ]
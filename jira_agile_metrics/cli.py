@@ -2,13 +2,20 @@ import os
 import argparse
 import getpass
 import logging
+import signal
 
 from jira import JIRA
 
 from .config import config_to_options, CALCULATORS, ConfigError
-from .webapp.app import app as webapp
 from .querymanager import QueryManager
+from .replay import RecordingClient, ReplayClient
 from .calculator import run_calculators
+from .telemetry import write_prometheus_file
+from .profiling import profile
+from .check import check_options, print_problems
+from .batch import run_batch
+from .daemon import Daemon, DaemonTarget
+from .rendering import RENDER_PROFILES, set_chart_rendering
 from .utils import set_chart_context
 from .trello import TrelloClient
 
@@ -45,6 +52,13 @@ def configure_argument_parser():
         type=int,
         help="Only fetch N most recently updated issues",
     )
+    parser.add_argument(
+        "--query-workers",
+        metavar="N",
+        dest="query_workers",
+        type=int,
+        help="Run up to N of the configured queries in parallel",
+    )
 
     parser.add_argument(
         "--server",
@@ -56,6 +70,177 @@ def configure_argument_parser():
         ),
     )
 
+    # Recording and replaying JIRA responses
+    parser.add_argument(
+        "--record",
+        metavar="responses.json.gz",
+        help=(
+            "Save all responses received from JIRA to this file, "
+            "so that they can be used with --replay"
+        ),
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="responses.json.gz",
+        help=(
+            "Use responses previously saved with --record instead of "
+            "connecting to JIRA"
+        ),
+    )
+
+    # Metrics about the requests made to JIRA
+    parser.add_argument(
+        "--prometheus-file",
+        metavar="jira_agile_metrics.prom",
+        help=(
+            "Write statistics about the requests made to JIRA for each "
+            "query to this file, in the Prometheus text format"
+        ),
+    )
+
+    # Batch mode
+    parser.add_argument(
+        "--batch",
+        metavar="config.yml",
+        nargs="+",
+        help=(
+            "Process several configuration files in one go, sharing "
+            "connections and fetched issues between them. The outputs of "
+            "each file are written to a directory named after it, under the "
+            "output directory."
+        ),
+    )
+    parser.add_argument(
+        "--batch-workers",
+        metavar="N",
+        type=int,
+        default=1,
+        help="Calculate up to N of the --batch configuration files at once",
+    )
+    parser.add_argument(
+        "--batch-log",
+        metavar="filename",
+        help=(
+            "Also write the messages logged for each --batch configuration "
+            "file to this file in its output directory"
+        ),
+    )
+    parser.add_argument(
+        "--cache-directory",
+        metavar="directory",
+        type=os.path.abspath,
+        help=(
+            "Keep the cycle time cache in this directory rather than the "
+            "output directory. With --batch, each configuration file has "
+            "its own directory under it, named after the file."
+        ),
+    )
+
+    # Chart cache
+    parser.add_argument(
+        "--chart-cache",
+        metavar="directory",
+        type=os.path.abspath,
+        help=(
+            "Keep a copy of each chart drawn in this directory, and reuse it "
+            "instead of drawing the chart again if its data and settings "
+            "have not changed"
+        ),
+    )
+    parser.add_argument(
+        "--chart-cache-max-age",
+        metavar="DAYS",
+        type=int,
+        help=(
+            "Remove charts not used for DAYS days from the cache "
+            "(default 30)"
+        ),
+    )
+    parser.add_argument(
+        "--chart-cache-max-size",
+        metavar="MB",
+        type=int,
+        help=(
+            "Remove the least recently used charts once the cache is bigger "
+            "than MB megabytes (default 500)"
+        ),
+    )
+
+    # Chart rendering
+    parser.add_argument(
+        "--chart-profile",
+        choices=sorted(RENDER_PROFILES),
+        help=(
+            "Render charts with this profile: `default` for print quality, "
+            "or `fast` for quick, low resolution charts"
+        ),
+    )
+    parser.add_argument(
+        "--chart-dpi",
+        metavar="DPI",
+        type=int,
+        help="Resolution of PNG charts, in dots per inch",
+    )
+    parser.add_argument(
+        "--chart-format",
+        metavar="format",
+        help="Write charts in this format (e.g. png or svg)",
+    )
+
+    # Simulations
+    parser.add_argument(
+        "--simulation-seed",
+        metavar="SEED",
+        type=int,
+        help=(
+            "Seed the random numbers of the Monte Carlo forecasts with this "
+            "(non-negative) integer, so that they can be reproduced"
+        ),
+    )
+
+    # Daemon mode
+    parser.add_argument(
+        "--daemon",
+        metavar="SECONDS",
+        type=int,
+        help=(
+            "Keep running, and refresh the outputs every SECONDS seconds. "
+            "Only issues that have changed are fetched again, and only "
+            "outputs that have changed are written again."
+        ),
+    )
+
+    # Configuration checks
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help=(
+            "Check that the fields and queries in the configuration file "
+            "are valid for JIRA, without fetching any issues or writing any "
+            "files. Exits with a non-zero status if there are problems."
+        ),
+    )
+
+    # Profiling
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Profile the run, including the query and batch worker threads, "
+            "writing profile.pstats and profile.collapsed to the output "
+            "directory"
+        ),
+    )
+    parser.add_argument(
+        "--profile-output",
+        metavar="name",
+        default="profile",
+        help=(
+            "With --profile, write <name>.pstats and <name>.collapsed "
+            "instead"
+        ),
+    )
+
     # Output directory
     parser.add_argument(
         "--output-directory",
@@ -94,6 +279,14 @@ def configure_argument_parser():
             "to determine if some API calls are available"
         ),
     )
+    parser.add_argument(
+        "--backend",
+        choices=["sync", "async"],
+        help=(
+            "Use the standard JIRA client (sync) or send requests "
+            "concurrently using asyncio (async)"
+        ),
+    )
 
     return parser
 
@@ -104,11 +297,16 @@ def main():
 
     if args.server:
         run_server(parser, args)
+    elif args.profile:
+        return profile(run_command_line, args.profile_output, parser, args)
     else:
-        run_command_line(parser, args)
+        return run_command_line(parser, args)
 
 
 def run_server(parser, args):
+    # Flask is only needed for the web server
+    from .webapp.app import app as webapp
+
     host = None
     port = args.server
 
@@ -121,12 +319,16 @@ def run_server(parser, args):
 
 
 def run_command_line(parser, args):
-    if not args.config:
+    if not args.config and not args.batch:
         parser.print_usage()
         return
 
     logging.basicConfig(
-        format="[%(asctime)s %(levelname)s] %(message)s",
+        format=(
+            "[%(asctime)s %(levelname)s %(threadName)s] %(message)s"
+            if args.batch
+            else "[%(asctime)s %(levelname)s] %(message)s"
+        ),
         datefmt="%Y-%m-%d %H:%M:%S",
         level=(
             logging.DEBUG
@@ -137,6 +339,9 @@ def run_command_line(parser, args):
         ),
     )
 
+    if args.batch:
+        return run_batch_command_line(args)
+
     # Configuration and settings
     # (command line arguments override config file options)
 
@@ -150,8 +355,24 @@ def run_command_line(parser, args):
     override_options(options["connection"], args)
     override_options(options["settings"], args)
 
+    if args.check:
+        return run_check(args, options)
+
+    if args.daemon and args.replay:
+        raise ConfigError("--daemon cannot be used with --replay")
+
+    if args.record and options["connection"]["type"] == "trello":
+        raise ConfigError("--record cannot be used with Trello")
+
     # Set charting context, which determines how charts are rendered
-    set_chart_context("paper")
+    set_chart_rendering(options["settings"])
+
+    # Make recording paths relative to where we were run from
+    record = os.path.abspath(args.record) if args.record else None
+    replay = os.path.abspath(args.replay) if args.replay else None
+    prometheus_file = (
+        os.path.abspath(args.prometheus_file) if args.prometheus_file else None
+    )
 
     # Set output directory if required
     if args.output_directory:
@@ -159,20 +380,107 @@ def run_command_line(parser, args):
         os.chdir(args.output_directory)
 
     # Select data source
-    jira = None
+    jira = ReplayClient(replay) if replay else get_client(options)
+
+    if record:
+        jira = RecordingClient(jira)
 
-    if options["connection"]["type"] == "jira":
-        jira = get_jira_client(options["connection"])
-    elif options["connection"]["type"] == "trello":
-        jira = get_trello_client(
-            options["connection"], options["settings"]["type_mapping"]
-        )
-    else:
-        raise ConfigError("Unknown source")
     # Query JIRA and run calculators
     logger.info("Running calculators")
-    query_manager = QueryManager(jira, options["settings"])
-    run_calculators(CALCULATORS, query_manager, options["settings"])
+    try:
+        query_manager = QueryManager(jira, options["settings"])
+
+        if args.daemon:
+            run_daemon(
+                [DaemonTarget(query_manager, options["settings"], ".")],
+                args.daemon,
+                on_run=(
+                    lambda: write_prometheus_file(
+                        query_manager.telemetry, prometheus_file
+                    )
+                )
+                if prometheus_file
+                else None,
+            )
+        else:
+            run_calculators(CALCULATORS, query_manager, options["settings"])
+
+            if prometheus_file:
+                write_prometheus_file(query_manager.telemetry, prometheus_file)
+    finally:
+        if record:
+            jira.save(record)
+
+
+def run_check(args, options):
+    """Check the fields and queries in the configuration against JIRA
+    without fetching any issues. Prints any problems found and returns the
+    exit status.
+    """
+
+    if args.replay:
+        raise ConfigError("--check cannot be used with --replay")
+
+    jira = get_client(options)
+    try:
+        problems = check_options(jira, options)
+    finally:
+        if hasattr(jira, "close"):
+            jira.close()
+
+    return print_problems(args.config, problems)
+
+
+def run_daemon(targets, interval, on_run=None):
+    """Refresh the outputs of `targets` every `interval` seconds until the
+    process is interrupted or terminated.
+    """
+
+    daemon = Daemon(targets, interval, on_run=on_run)
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+
+    logger.info("Refreshing outputs every %d seconds", interval)
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        logger.info("Interrupted")
+
+
+def run_batch_command_line(args):
+    """Process all the configuration files given with `--batch` (and the
+    positional configuration file, if any) in one process. Returns the exit
+    status.
+    """
+
+    if args.record or args.replay or args.prometheus_file:
+        raise ConfigError(
+            "--record, --replay and --prometheus-file "
+            "cannot be used with --batch"
+        )
+
+    config_files = ([args.config] if args.config else []) + args.batch
+
+    def override(options):
+        override_options(options["connection"], args)
+        override_options(options["settings"], args)
+
+    set_chart_rendering(vars(args))
+
+    failed = run_batch(
+        config_files,
+        get_client,
+        output_directory=args.output_directory or ".",
+        workers=args.batch_workers,
+        override=override,
+        check=args.check,
+        log_file=args.batch_log,
+        run_daemon=(
+            (lambda targets: run_daemon(targets, args.daemon))
+            if args.daemon
+            else None
+        ),
+    )
+    return 1 if failed else 0
 
 
 def override_options(options, arguments):
@@ -184,6 +492,19 @@ def override_options(options, arguments):
             options[key] = getattr(arguments, key)
 
 
+def get_client(options):
+    """Return a client for the connection in `options`"""
+
+    if options["connection"]["type"] == "jira":
+        return get_jira_client(options["connection"])
+    elif options["connection"]["type"] == "trello":
+        return get_trello_client(
+            options["connection"], options["settings"]["type_mapping"]
+        )
+    else:
+        raise ConfigError("Unknown source")
+
+
 def get_jira_client(connection):
     url = connection["domain"]
     username = connection["username"]
@@ -214,6 +535,14 @@ def get_jira_client(connection):
 
     options.update(jira_client_options)
 
+    if connection["backend"] == "async":
+        # httpx is only needed for the async backend
+        from .asyncjira import AsyncJIRA
+
+        return AsyncJIRA(
+            options, basic_auth=(username, password), proxies=proxies
+        )
+
     return JIRA(
         options,
         basic_auth=(username, password),
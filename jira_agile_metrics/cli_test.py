@@ -1,12 +1,18 @@
 import json
+import subprocess
+import sys
 import tempfile
 
+import pytest
+
 from .cli import (
     override_options,
     run_command_line,
     configure_argument_parser,
     get_trello_client,
 )
+from .config import ConfigError
+from .conftest import FauxJIRA
 
 
 def test_override_options():
@@ -72,6 +78,48 @@ Output:
         mock_get_trello_client.assert_called_once()
 
 
+def test_run_command_line_record_with_trello_client(mocker, tmp_path):
+    config_file = tmp_path / "config.yml"
+    config_file.write_text(
+        """
+Connection:
+  Type: trello
+
+Query: project = "JLF"
+
+Workflow:
+  Backlog: Open
+  In Progress: In Progress
+  Done: Closed
+"""
+    )
+    mock_get_trello_client = mocker.patch(
+        "jira_agile_metrics.cli.get_trello_client"
+    )
+
+    parser = configure_argument_parser()
+    args = parser.parse_args(
+        ["--record", str(tmp_path / "record.json.gz"), str(config_file)]
+    )
+    with pytest.raises(ConfigError):
+        run_command_line(parser, args)
+    mock_get_trello_client.assert_not_called()
+
+
+def test_profile_arguments():
+    parser = configure_argument_parser()
+
+    args = parser.parse_args(["--profile", "config.yml"])
+    assert args.config == "config.yml"
+    assert args.profile is True
+    assert args.profile_output == "profile"
+
+    args = parser.parse_args(
+        ["--profile", "--profile-output", "slow-run", "config.yml"]
+    )
+    assert args.profile_output == "slow-run"
+
+
 def test_get_trello_client(mocker):
 
     mock_trello = mocker.patch("jira_agile_metrics.cli.TrelloClient")
@@ -81,3 +129,59 @@ def test_get_trello_client(mocker):
     )
 
     mock_trello.assert_called_once()
+
+
+def test_import_does_not_load_plotting_libraries():
+    # The plotting, statistics, web and async HTTP libraries are slow to
+    # import, so are only loaded when needed
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, jira_agile_metrics.cli; print(sorted("
+            "m for m in ('matplotlib', 'seaborn', 'scipy', 'statsmodels', "
+            "'flask', 'jinja2', 'httpx', 'jira_agile_metrics.asyncjira') "
+            "if m in sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.strip() == "[]"
+
+
+def test_run_command_line_check(mocker, tmp_path, capsys, minimal_fields):
+    config = """
+Connection:
+  Domain: https://example.org
+
+Query: project = A
+
+Attributes:
+  Team: Team
+
+Workflow:
+  Backlog: Open
+  In progress: In progress
+  Done: Closed
+"""
+    jira = FauxJIRA(fields=minimal_fields, issues=[])
+    jira._post_json = lambda path, data, params=None: {
+        "queries": [{"query": q, "errors": []} for q in data["queries"]]
+    }
+    mocker.patch("jira_agile_metrics.cli.get_jira_client", return_value=jira)
+    run_calculators = mocker.patch("jira_agile_metrics.cli.run_calculators")
+
+    config_file = tmp_path / "config.yml"
+    config_file.write_text(config)
+
+    parser = configure_argument_parser()
+    args = parser.parse_args([str(config_file), "--check"])
+    assert run_command_line(parser, args) == 1
+
+    output = capsys.readouterr().out
+    assert "1 problem(s) found" in output
+    assert "Attribute `Team`: JIRA field with name `Team` does not exist" in (
+        output
+    )
+    run_calculators.assert_not_called()
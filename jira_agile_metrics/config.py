@@ -21,6 +21,7 @@ from .calculators.debt import DebtCalculator
 from .calculators.defects import DefectsCalculator
 from .calculators.waste import WasteCalculator
 from .calculators.progressreport import ProgressReportCalculator
+from .rendering import RENDER_PROFILES
 
 CALCULATORS = (
     CycleTimeCalculator,  # should come first
@@ -176,6 +177,65 @@ def to_progress_report_outcomes_list(value):
     ]
 
 
+def force_chart_profile(key, value):
+    if value not in RENDER_PROFILES:
+        raise ConfigError(
+            "Unknown chart profile `%s` for key `%s`. Expected one of: %s"
+            % (
+                value,
+                expand_key(key),
+                ", ".join(RENDER_PROFILES),
+            )
+        )
+    return value
+
+
+def to_chart_profiles_dict(value, charts):
+    """Parse a mapping of chart names (as in `charts`) to either the name
+    of a chart profile or a mapping of rendering options
+    """
+
+    if not isinstance(value, dict):
+        raise ConfigError(
+            "`Chart profiles` must be a mapping of chart names to profiles"
+        )
+
+    profiles = {}
+    for name, val in value.items():
+        chart = str(name).lower().replace(" ", "_")
+        if chart not in charts:
+            raise ConfigError(
+                "Unknown chart `%s` in `Chart profiles`" % (name,)
+            )
+
+        if not isinstance(val, dict):
+            val = {"profile": val}
+
+        profiles[chart] = {
+            "profile": force_chart_profile(
+                "profile", val[expand_key("profile")]
+            )
+            if expand_key("profile") in val
+            else None,
+            "dpi": force_int("dpi", val[expand_key("dpi")])
+            if expand_key("dpi") in val
+            else None,
+            "format": val[expand_key("format")]
+            if expand_key("format") in val
+            else None,
+            "tight_bbox": bool(val[expand_key("tight_bbox")])
+            if expand_key("tight_bbox") in val
+            else None,
+            "style": bool(val[expand_key("style")])
+            if expand_key("style") in val
+            else None,
+            "antialiased": bool(val[expand_key("antialiased")])
+            if expand_key("antialiased") in val
+            else None,
+        }
+    return profiles
+
+
 def config_to_options(data, cwd=None, extended=False):
     try:
         config = ordered_load(data, yaml.SafeLoader)
@@ -197,10 +257,12 @@ def config_to_options(data, cwd=None, extended=False):
             "https_proxy": None,
             "jira_server_version_check": True,
             "jira_client_options": {},
+            "backend": "sync",
         },
         "settings": {
             "queries": [],
             "query_attribute": None,
+            "query_workers": None,
             "attributes": {},
             "known_values": {},
             "type_mapping": {},
@@ -243,6 +305,11 @@ def config_to_options(data, cwd=None, extended=False):
             "burnup_forecast_chart_trials": 100,
             "burnup_forecast_chart_throughput_window": 60,
             "burnup_forecast_chart_throughput_window_end": None,
+            "burnup_forecast_chart_summary": False,
+            "burnup_forecast_data": None,
+            "forecast_tolerance": None,
+            "forecast_max_trials": 100000,
+            "simulation_seed": None,
             "wip_frequency": "1W-MON",
             "wip_window": None,
             "wip_chart": None,
@@ -303,6 +370,17 @@ def config_to_options(data, cwd=None, extended=False):
             "progress_report_outcomes": None,
             "progress_report_outcome_query": None,
             "progress_report_outcome_deadline_field": None,
+            "run_report": None,
+            "cycle_time_cache": None,
+            "cache_directory": None,
+            "workbook": None,
+            "chart_cache": None,
+            "chart_cache_max_age": 30,
+            "chart_cache_max_size": 500,
+            "chart_profile": "default",
+            "chart_profiles": None,
+            "chart_dpi": None,
+            "chart_format": None,
         },
     }
 
@@ -378,6 +456,14 @@ def config_to_options(data, cwd=None, extended=False):
                 "connection"
             ]["jira server version check"]
 
+        if "backend" in config["connection"]:
+            backend = config["connection"]["backend"].lower()
+            if backend not in ("sync", "async"):
+                raise ConfigError(
+                    "`Backend` must be one of `sync` or `async`"
+                ) from None
+            options["connection"]["backend"] = backend
+
     # Parse and validate output options
     if "output" in config:
 
@@ -408,10 +494,13 @@ def config_to_options(data, cwd=None, extended=False):
             "burnup_forecast_chart_throughput_window",
             "burnup_forecast_chart_target",
             "burnup_forecast_chart_trials",
+            "forecast_max_trials",
+            "simulation_seed",
             "impediments_window",
             "defects_window",
             "debt_window",
             "waste_window",
+            "chart_dpi",
         ]:
             if expand_key(key) in config["output"]:
                 options["settings"][key] = force_int(
@@ -421,6 +510,7 @@ def config_to_options(data, cwd=None, extended=False):
         # float values
         for key in [
             "burnup_forecast_chart_deadline_confidence",
+            "forecast_tolerance",
         ]:
             if expand_key(key) in config["output"]:
                 options["settings"][key] = force_float(
@@ -459,6 +549,9 @@ def config_to_options(data, cwd=None, extended=False):
             "debt_age_chart",
             "waste_chart",
             "progress_report",
+            "run_report",
+            "cycle_time_cache",
+            "workbook",
         ]:
             if expand_key(key) in config["output"]:
                 options["settings"][key] = os.path.basename(
@@ -474,6 +567,7 @@ def config_to_options(data, cwd=None, extended=False):
             "throughput_data",
             "percentiles_data",
             "impediments_data",
+            "burnup_forecast_data",
         ]:
             if expand_key(key) in config["output"]:
                 options["settings"][key] = list(
@@ -541,10 +635,41 @@ def config_to_options(data, cwd=None, extended=False):
             "progress_report_epic_team_field",
             "progress_report_outcome_query",
             "progress_report_outcome_deadline_field",
+            "chart_format",
         ]:
             if expand_key(key) in config["output"]:
                 options["settings"][key] = config["output"][expand_key(key)]
 
+        # boolean values
+        for key in [
+            "burnup_forecast_chart_summary",
+        ]:
+            if expand_key(key) in config["output"]:
+                options["settings"][key] = bool(
+                    config["output"][expand_key(key)]
+                )
+
+        # Chart rendering
+        if expand_key("chart_profile") in config["output"]:
+            options["settings"]["chart_profile"] = force_chart_profile(
+                "chart_profile", config["output"][expand_key("chart_profile")]
+            )
+        if expand_key("chart_profiles") in config["output"]:
+            options["settings"]["chart_profiles"] = to_chart_profiles_dict(
+                config["output"][expand_key("chart_profiles")],
+                [key for key in options["settings"] if key.endswith("_chart")],
+            )
+
+        # Simulations
+        if (options["settings"]["simulation_seed"] or 0) < 0:
+            raise ConfigError(
+                "Value `%s` for key `%s` must not be negative"
+                % (
+                    options["settings"]["simulation_seed"],
+                    expand_key("simulation_seed"),
+                )
+            )
+
         # Special objects for progress reports
         if expand_key("progress_report_teams") in config["output"]:
             options["settings"][
@@ -573,6 +698,11 @@ def config_to_options(data, cwd=None, extended=False):
             for q in config["queries"]["criteria"]
         ]
 
+        if "workers" in config["queries"]:
+            options["settings"]["query_workers"] = force_int(
+                "query_workers", config["queries"]["workers"]
+            )
+
     if "query" in config:
         options["settings"]["queries"] = [
             {
@@ -61,9 +61,11 @@ Connection:
     Type: trello
     HTTP Proxy: https://proxy1.local
     HTTPS Proxy: https://proxy2.local
+    Backend: Async
 
 Queries:
     Attribute: Team
+    Workers: 2
     Criteria:
         - Value: Team 1
           JQL: (filter=123)
@@ -141,6 +143,11 @@ Output:
     Burnup forecast chart trials: 50
     Burnup forecast chart throughput window: 30
     Burnup forecast chart throughput window end: 2018-03-01
+    Burnup forecast chart summary: true
+    Burnup forecast data: burnup-forecast.csv
+    Forecast tolerance: 0.01
+    Forecast max trials: 50000
+    Simulation seed: 1234
 
     WIP frequency: 3D
     WIP window: 3
@@ -240,6 +247,19 @@ ABC AND type = Story AND team = "Team two" AND resolution = "Done"'
     Progress report outcome deadline field: Due date
     Progress report outcome query: "project = \
 ABC AND type = Outcome AND resolution IS EMPTY"
+
+    Run report: run-report.json
+    Cycle time cache: cycletime.cache
+    Workbook: metrics.xlsx
+
+    Chart profile: fast
+    Chart DPI: 150
+    Chart format: svg
+    Chart profiles:
+        CFD chart: default
+        Scatterplot chart:
+            DPI: 300
+            Tight bbox: true
 """
     )
 
@@ -254,6 +274,7 @@ ABC AND type = Outcome AND resolution IS EMPTY"
         "http_proxy": "https://proxy1.local",
         "https_proxy": "https://proxy2.local",
         "jira_server_version_check": True,
+        "backend": "async",
     }
 
     assert options["settings"] == {
@@ -274,6 +295,7 @@ ABC AND type = Outcome AND resolution IS EMPTY"
             {"jql": "(filter=124)", "value": "Team 2"},
         ],
         "query_attribute": "Team",
+        "query_workers": 2,
         "backlog_column": "Backlog",
         "committed_column": "Committed",
         "done_column": "Done",
@@ -296,6 +318,11 @@ ABC AND type = Outcome AND resolution IS EMPTY"
         ),
         "burnup_forecast_chart_title": "Burn-up forecast",
         "burnup_forecast_chart_trials": 50,
+        "burnup_forecast_chart_summary": True,
+        "burnup_forecast_data": ["burnup-forecast.csv"],
+        "forecast_tolerance": 0.01,
+        "forecast_max_trials": 50000,
+        "simulation_seed": 1234,
         "cfd_window": 30,
         "cfd_chart": "cfd.png",
         "cfd_chart_title": "Cumulative Flow Diagram",
@@ -413,6 +440,34 @@ ABC AND type = Outcome AND resolution IS EMPTY"
         "progress_report_outcome_query": (
             "project = ABC AND type = Outcome AND resolution IS EMPTY"
         ),
+        "run_report": "run-report.json",
+        "cycle_time_cache": "cycletime.cache",
+        "cache_directory": None,
+        "workbook": "metrics.xlsx",
+        "chart_cache": None,
+        "chart_cache_max_age": 30,
+        "chart_cache_max_size": 500,
+        "chart_profile": "fast",
+        "chart_profiles": {
+            "cfd_chart": {
+                "profile": "default",
+                "dpi": None,
+                "format": None,
+                "tight_bbox": None,
+                "style": None,
+                "antialiased": None,
+            },
+            "scatterplot_chart": {
+                "profile": None,
+                "dpi": 300,
+                "format": None,
+                "tight_bbox": True,
+                "style": None,
+                "antialiased": None,
+            },
+        },
+        "chart_dpi": 150,
+        "chart_format": "svg",
     }
 
 
@@ -626,3 +681,71 @@ Workflow:
 
     assert options["connection"]["domain"] == "https://foo.com"
     assert options["connection"]["jira_server_version_check"] is False
+
+
+def test_config_to_options_invalid_backend():
+
+    try:
+        config_to_options(
+            """\
+Connection:
+    Domain: https://foo.com
+    Backend: threads
+
+Query: (filter=123)
+
+Workflow:
+    Backlog: Backlog
+    In progress: Build
+    Done: Done
+"""
+        )
+    except ConfigError:
+        assert True
+    else:
+        assert False
+
+
+def test_config_to_options_invalid_chart_profile():
+
+    try:
+        config_to_options(
+            """\
+Query: (filter=123)
+
+Workflow:
+    Backlog: Backlog
+    In progress: Build
+    Done: Done
+
+Output:
+    Chart profiles:
+        CFD chart: slow
+"""
+        )
+    except ConfigError:
+        assert True
+    else:
+        assert False
+
+
+def test_config_to_options_negative_simulation_seed():
+
+    try:
+        config_to_options(
+            """\
+Query: (filter=123)
+
+Workflow:
+    Backlog: Backlog
+    In progress: Build
+    Done: Done
+
+Output:
+    Simulation seed: -1
+"""
+        )
+    except ConfigError:
+        assert True
+    else:
+        assert False
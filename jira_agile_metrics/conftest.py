@@ -1,3 +1,7 @@
+import datetime
+from random import Random
+
+import numpy as np
 import pytest
 from pandas import DataFrame, Timestamp, NaT
 
@@ -90,6 +94,135 @@ class FauxJIRA(object):
         )
 
 
+# Generate large, realistic looking sets of fake issues, e.g. for benchmarks
+
+SYNTHETIC_ISSUE_TYPES = ["Epic", "Story", "Defect"]
+SYNTHETIC_TEAMS = ["Team 1", "Team 2", "Team 3"]
+
+
+def synthetic_fields(minimal_fields):
+    """A `fields` list for the custom fields set by `generate_issues()`"""
+    return minimal_fields + [
+        {"id": "updated", "name": "Updated"},
+        {"id": "resolutiondate", "name": "Resolved"},
+        {"id": "priority", "name": "Priority"},
+        {"id": "customfield_001", "name": "Team"},
+        {"id": "customfield_200", "name": "Epic link"},
+    ]
+
+
+def generate_issues(
+    count,
+    cycle,
+    seed=0,
+    start=datetime.datetime(2018, 1, 1),
+    days=365,
+    type_weights=(0.05, 0.75, 0.2),
+    done_probability=0.5,
+    backward_probability=0.1,
+    flagged_probability=0.2,
+    mean_days_in_status=2.0,
+):
+    """Generate `count` issues of the types in `SYNTHETIC_ISSUE_TYPES`,
+    created over `days` days from `start`. Each issue moves through the
+    statuses in `cycle` (a `cycle` setting), sometimes moving backwards
+    and sometimes being flagged as impeded for a while. Stories and defects
+    belong to a random epic. The same `seed` always produces the same
+    issues.
+    """
+    rng = np.random.default_rng(seed)
+
+    issue_types = rng.choice(
+        SYNTHETIC_ISSUE_TYPES, size=count, p=list(type_weights)
+    ).tolist()
+    created_days = np.sort(rng.uniform(0, days, size=count)).tolist()
+    teams = rng.choice(SYNTHETIC_TEAMS, size=count).tolist()
+    priorities = rng.choice(["High", "Medium", "Low"], size=count).tolist()
+    flagged = (rng.random(count) < flagged_probability).tolist()
+
+    # Issues are either done, or left somewhere before the last step
+    last_stages = np.where(
+        rng.random(count) < done_probability,
+        len(cycle) - 1,
+        rng.integers(0, len(cycle) - 1, size=count),
+    ).tolist()
+
+    epic_keys = [
+        "A-%d" % (i + 1)
+        for i in range(count)
+        if issue_types[i] == SYNTHETIC_ISSUE_TYPES[0]
+    ]
+
+    # Per-issue random choices are much faster with the standard library
+    random = Random(int(rng.integers(2**32)))
+
+    def format_date(value):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+
+    issues = []
+    for i in range(count):
+        created = start + datetime.timedelta(days=created_days[i])
+        date = created
+        stage = 0
+        status = random.choice(cycle[0]["statuses"])
+        changes = []
+
+        while stage < last_stages[i]:
+            if stage > 1 and random.random() < backward_probability:
+                next_stage = stage - 1
+            else:
+                next_stage = stage + 1
+
+            next_status = random.choice(cycle[next_stage]["statuses"])
+            date += datetime.timedelta(
+                days=random.expovariate(1 / mean_days_in_status)
+            )
+            changes.append(
+                FauxChange(
+                    format_date(date), [("status", status, next_status)]
+                )
+            )
+            stage, status = next_stage, next_status
+
+        if flagged[i] and len(changes) > 0:
+            flag_start = created + (date - created) * random.random()
+            flag_end = flag_start + datetime.timedelta(
+                days=random.expovariate(1 / mean_days_in_status)
+            )
+            changes.append(
+                FauxChange(
+                    format_date(flag_start),
+                    [("Flagged", None, "Impediment")],
+                )
+            )
+            changes.append(
+                FauxChange(
+                    format_date(flag_end), [("Flagged", "Impediment", "")]
+                )
+            )
+
+        done = stage == len(cycle) - 1
+        fields = dict(
+            summary="Synthetic issue A-%d" % (i + 1),
+            issuetype=FauxFieldValue(issue_types[i], issue_types[i]),
+            status=FauxFieldValue(status, status),
+            resolution=FauxFieldValue("Done", "Done") if done else None,
+            resolutiondate=format_date(date) if done else None,
+            created=format_date(created),
+            updated=format_date(date),
+            priority=FauxFieldValue(priorities[i], priorities[i]),
+            customfield_001=teams[i],
+            customfield_100=None,
+            customfield_200=random.choice(epic_keys)
+            if epic_keys and issue_types[i] != SYNTHETIC_ISSUE_TYPES[0]
+            else None,
+        )
+
+        issues.append(FauxIssue("A-%d" % (i + 1), changes, **fields))
+
+    return issues
+
+
 # Fixtures
 
 
@@ -111,7 +244,10 @@ def minimal_settings():
             {"name": "Done", "statuses": ["Done"]},
         ],
         "query_attribute": None,
+        "query_workers": None,
         "queries": [{"jql": "(filter=123)", "value": None}],
+        "cycle_time_cache": None,
+        "cache_directory": None,
         "backlog_column": "Backlog",
         "committed_column": "Committed",
         "done_column": "Done",
@@ -0,0 +1,200 @@
+import datetime
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .calculator import calculate, write_outputs
+from .config import CALCULATORS
+from .utils import thread_name
+
+logger = logging.getLogger(__name__)
+
+
+class DaemonTarget(object):
+    """A configuration kept up to date by a `Daemon`: a query manager, its
+    settings and the directory its outputs are written to, along with the
+    results of the last run.
+    """
+
+    def __init__(self, query_manager, settings, output_directory, name=None):
+        self.query_manager = query_manager
+        self.settings = settings
+        self.output_directory = os.path.abspath(output_directory)
+        self.name = name or os.path.basename(self.output_directory)
+
+        self.results = None
+        # Calculator class -> classes whose results its outputs were
+        # written from
+        self.dependencies = {}
+        self.day = None
+
+
+class Daemon(object):
+    """Keeps the issues and results of one or more configurations in
+    memory, and refreshes them every `interval` seconds.
+
+    On each refresh, only issues created or updated since the last refresh
+    are fetched (see `QueryManager.refresh()`). If no issues have changed
+    and it is still the same day, nothing is recalculated. Otherwise, the
+    calculators are run again, and only the outputs of calculators whose
+    results (or the results they read) have changed are written again.
+    """
+
+    def __init__(
+        self, targets, interval, calculators=CALCULATORS, on_run=None
+    ):
+        self.targets = targets
+        self.interval = interval
+        self.calculators = calculators
+        self.on_run = on_run
+
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Stop after the current refresh"""
+        self._stop.set()
+
+    def run(self, max_runs=None):
+        """Refresh every `interval` seconds until `stop()` is called, or
+        `max_runs` refreshes have been run.
+        """
+
+        runs = 0
+        while not self._stop.is_set():
+            start = time.monotonic()
+
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Refresh failed. Trying again next time.")
+
+            runs += 1
+            if max_runs is not None and runs >= max_runs:
+                break
+
+            delay = max(0, self.interval - (time.monotonic() - start))
+            logger.info("Next refresh in %d seconds", delay)
+            self._stop.wait(delay)
+
+    def run_once(self):
+        """Refresh the issues of all targets, then recalculate and write the
+        outputs that have changed. Returns a dict of the names of the
+        calculators whose outputs were written, by target name.
+        """
+
+        today = datetime.date.today()
+
+        # Refresh each issue store once, even if it is shared
+        changed = {}
+        for target in self.targets:
+            store = target.query_manager.issue_store
+            if target.results is not None and id(store) not in changed:
+                changed[id(store)] = target.query_manager.refresh()
+
+        written = {}
+        for target in self.targets:
+            with thread_name(target.name):
+                if (
+                    target.results is not None
+                    and not changed[id(target.query_manager.issue_store)]
+                    and target.day == today
+                ):
+                    logger.info("No changes for %s", target.name)
+                    written[target.name] = []
+                    continue
+
+                written[target.name] = self.run_target(target)
+                target.day = today
+
+        if self.on_run is not None:
+            self.on_run()
+
+        return written
+
+    def run_target(self, target):
+        logger.info("Calculating metrics for %s", target.name)
+
+        calculators, results, report = calculate(
+            self.calculators, target.query_manager, target.settings
+        )
+
+        # An output only needs to be written again if it has not been
+        # written successfully, or the results read when it was last written
+        # have changed
+        to_write = [
+            c
+            for c in calculators
+            if target.results is None
+            or c.__class__ not in target.dependencies
+            or any(
+                not results_equal(
+                    target.results.get(dependency), results.get(dependency)
+                )
+                for dependency in target.dependencies[c.__class__]
+            )
+        ]
+
+        logger.info(
+            "Writing %d of %d outputs for %s",
+            len(to_write),
+            len(calculators),
+            target.name,
+        )
+
+        for c in to_write:
+            c.dependencies = {c.__class__}
+
+        cwd = os.getcwd()
+        try:
+            os.makedirs(target.output_directory, exist_ok=True)
+            os.chdir(target.output_directory)
+            write_outputs(
+                calculators,
+                report,
+                target.query_manager,
+                target.settings,
+                only=to_write,
+            )
+        finally:
+            os.chdir(cwd)
+
+        target.results = results
+        for c in to_write:
+            if report[c.__class__.__name__]["write"].get("failed"):
+                # Try again next time
+                target.dependencies.pop(c.__class__, None)
+            else:
+                target.dependencies[c.__class__] = c.dependencies
+
+        return [c.__class__.__name__ for c in to_write]
+
+
+def results_equal(a, b):
+    """Return True if the calculator results `a` and `b` are the same"""
+
+    if a is b:
+        return True
+    if type(a) is not type(b):
+        return False
+
+    if isinstance(a, (pd.DataFrame, pd.Series)):
+        return a.equals(b)
+    if isinstance(a, np.ndarray):
+        return a.shape == b.shape and bool(np.all((a == b) | (a != a)))
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(
+            results_equal(a[k], b[k]) for k in a
+        )
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(
+            results_equal(x, y) for x, y in zip(a, b)
+        )
+
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
@@ -0,0 +1,92 @@
+import copy
+
+import pandas as pd
+
+from .calculators.cfd import CFDCalculator
+from .calculators.cycletime import CycleTimeCalculator
+from .config import config_to_options
+from .conftest import FauxJIRA, generate_issues, synthetic_fields
+from .daemon import Daemon, DaemonTarget, results_equal
+from .querymanager import QueryManager
+
+CONFIG = """
+Connection:
+    Domain: https://example.org
+
+Query: project = A
+
+Workflow:
+    Backlog: Backlog
+    Committed: Next
+    Build: Build
+    Test:
+        - Code review
+        - QA
+    Done: Done
+
+Output:
+    Cycle time data: cycletime.csv
+    CFD data: cfd.csv
+"""
+
+
+def test_daemon_writes_only_changed_outputs(tmp_path, minimal_fields):
+    settings = config_to_options(CONFIG)["settings"]
+
+    jira = FauxJIRA(
+        fields=synthetic_fields(minimal_fields),
+        issues=generate_issues(20, settings["cycle"]),
+        filter=lambda issue, jql: (
+            not jql.startswith("key in") or issue.key in jql[8:-1].split(",")
+        ),
+    )
+    query_manager = QueryManager(jira, settings)
+
+    runs = []
+    daemon = Daemon(
+        [DaemonTarget(query_manager, settings, str(tmp_path), name="test")],
+        60,
+        calculators=[CycleTimeCalculator, CFDCalculator],
+        on_run=lambda: runs.append(True),
+    )
+
+    assert daemon.run_once() == {
+        "test": ["CycleTimeCalculator", "CFDCalculator"]
+    }
+    assert (tmp_path / "cycletime.csv").exists()
+    assert (tmp_path / "cfd.csv").exists()
+
+    # Nothing has changed, so nothing is recalculated
+    assert daemon.run_once() == {"test": []}
+
+    # A new summary changes the cycle time data, but not the CFD
+    issue = copy.deepcopy(jira._issues[4])
+    issue.fields.summary = "A new summary"
+    issue.fields.updated = "2019-01-01 01:01:01"
+    jira._issues[4] = issue
+
+    assert daemon.run_once() == {"test": ["CycleTimeCalculator"]}
+    assert "A new summary" in (tmp_path / "cycletime.csv").read_text()
+    assert len(runs) == 3
+
+
+def test_daemon_run_stops(tmp_path):
+    daemon = Daemon([], 60)
+    daemon.stop()
+    daemon.run()
+
+    runs = []
+    daemon = Daemon([], 0, on_run=lambda: runs.append(True))
+    daemon.run(max_runs=2)
+    assert len(runs) == 2
+
+
+def test_results_equal():
+    df = pd.DataFrame({"a": [1.0, None]})
+
+    assert results_equal(df, df.copy())
+    assert not results_equal(df, df.fillna(0))
+    assert results_equal({"a": [df, 1]}, {"a": [df.copy(), 1]})
+    assert not results_equal({"a": 1}, {"a": 2})
+    assert not results_equal(df, None)
+    assert results_equal(None, None)
@@ -0,0 +1,135 @@
+import collections
+import cProfile
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class StackSampler(object):
+    """Samples the call stacks of all threads (or just `thread`) at regular
+    intervals, counting how often each distinct stack is seen. Each stack
+    starts with the name of its thread, so that worker threads show up
+    separately. Unlike `cProfile`, this adds very little overhead, and shows
+    where time is spent including calls into C extensions such as pandas.
+    """
+
+    interval = 0.005
+
+    def __init__(self, thread=None, interval=None):
+        self.thread_id = thread.ident if thread is not None else None
+        if interval is not None:
+            self.interval = interval
+
+        self.samples = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample, name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (
+                    self.thread_id is not None and thread_id != self.thread_id
+                ):
+                    continue
+
+                # Group the threads of a pool, e.g. `ThreadPoolExecutor-0_3`
+                name = re.sub(r"_\d+$", "", names.get(thread_id, "thread"))
+                self.samples[(name,) + stack(frame)] += 1
+
+    def write_collapsed(self, output_file):
+        """Write the samples in the "collapsed" format used by
+        `flamegraph.pl`, speedscope and other flame graph tools: one line
+        per stack, with frames separated by semicolons, followed by the
+        number of samples.
+        """
+        with open(output_file, "w") as f:
+            for frames, count in sorted(self.samples.items()):
+                f.write("%s %d\n" % (";".join(frames), count))
+
+
+def stack(frame):
+    """Return a tuple of frame names for the stack ending at `frame`,
+    outermost first.
+    """
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(
+            "%s (%s:%d)"
+            % (
+                code.co_name,
+                os.path.basename(code.co_filename),
+                code.co_firstlineno,
+            )
+        )
+        frame = frame.f_back
+    return tuple(reversed(frames))
+
+
+def profile(func, output_prefix, *args, **kwargs):
+    """Call `func` with `args` and `kwargs` under `cProfile` and a
+    `StackSampler`, and return its result. The profile is written to
+    `<output_prefix>.pstats`, which can be read with `pstats` or viewers
+    like snakeviz, and the sampled stacks to `<output_prefix>.collapsed`,
+    for flame graph tools. The files are written even if `func` fails.
+
+    Threads started by `func` (such as query workers) are profiled too, and
+    their profiles added to the main thread's. Threads that were already
+    running only appear in the sampled stacks.
+
+    `output_prefix` is resolved when `func` returns, so a relative path is
+    relative to the working directory `func` leaves behind (for the command
+    line tool, the output directory).
+    """
+
+    profiler = cProfile.Profile()
+    thread_profilers = []
+    sampler = StackSampler()
+
+    def profile_thread(*args):
+        # Called on the first event in each new thread, and replaced there
+        thread_profiler = cProfile.Profile()
+        thread_profilers.append(thread_profiler)
+        thread_profiler.enable()
+
+    sampler.start()
+    threading.setprofile(profile_thread)
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        threading.setprofile(None)
+        sampler.stop()
+
+        pstats_file = output_prefix + ".pstats"
+        collapsed_file = output_prefix + ".collapsed"
+
+        logger.info(
+            "Writing profile to %s and %s",
+            os.path.abspath(pstats_file),
+            os.path.abspath(collapsed_file),
+        )
+        stats = pstats.Stats(profiler)
+        for thread_profiler in thread_profilers:
+            stats.add(thread_profiler)
+        stats.dump_stats(pstats_file)
+        sampler.write_collapsed(collapsed_file)
@@ -0,0 +1,67 @@
+import pstats
+import threading
+import time
+
+import pytest
+
+from .profiling import profile
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return "done"
+
+
+def test_profile(tmp_path):
+    prefix = str(tmp_path / "profile")
+    assert profile(busy, prefix, 0.1) == "done"
+
+    stats = pstats.Stats(prefix + ".pstats")
+    assert any(name == "busy" for _, _, name in stats.stats)
+
+    with open(prefix + ".collapsed") as f:
+        lines = f.read().splitlines()
+
+    assert len(lines) > 0
+    for line in lines:
+        frames, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+    assert any(
+        "test_profile (profiling_test.py:" in line and "busy (" in line
+        for line in lines
+    )
+
+
+def test_profile_writes_files_on_error(tmp_path):
+    def fail():
+        busy(0.01)
+        raise ValueError()
+
+    prefix = str(tmp_path / "profile")
+    with pytest.raises(ValueError):
+        profile(fail, prefix)
+
+    assert (tmp_path / "profile.pstats").exists()
+    assert (tmp_path / "profile.collapsed").exists()
+
+
+def test_profile_worker_threads(tmp_path):
+    def run_in_thread():
+        thread = threading.Thread(target=busy, args=(0.1,), name="worker")
+        thread.start()
+        thread.join()
+
+    prefix = str(tmp_path / "profile")
+    profile(run_in_thread, prefix)
+
+    stats = pstats.Stats(prefix + ".pstats")
+    assert any(name == "busy" for _, _, name in stats.stats)
+
+    with open(prefix + ".collapsed") as f:
+        lines = f.read().splitlines()
+
+    assert any(
+        line.startswith("worker;") and "busy (" in line for line in lines
+    )
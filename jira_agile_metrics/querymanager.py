@@ -1,10 +1,17 @@
 import json
 import itertools
 import logging
+import time
+import threading
+import concurrent.futures
 import dateutil.parser
 import dateutil.tz
 
+from jira.exceptions import JIRAError
+from jira.resources import dict2resource
+
 from .config import ConfigError
+from .telemetry import Telemetry
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +63,133 @@ class IssueSnapshot(object):
         )
 
 
+class IssueStore(object):
+    """Issues fetched from JIRA during a run, shared by all queries.
+
+    Search results are remembered by JQL, so a query that has already been
+    run (for example by another calculator) is answered without contacting
+    JIRA again. Issues returned by more than one query are stored once per
+    issue key and `updated` timestamp, and each changelog is parsed and
+    sorted only once.
+
+    A store can be shared by several query managers using the same JIRA
+    client, including from different threads. The JIRA field list is then
+    only fetched once, and a query being run by one query manager is not
+    run again by another at the same time.
+    """
+
+    def __init__(self):
+        self.issues = {}  # key -> (updated, expand, fields, issue)
+        self.searches = {}  # (jql, max_results) -> [(expand, fields, [issue])]
+        self.changelogs = {}  # (key, updated) -> [(date, change)]
+        self.jira_fields = None
+
+        self._lock = threading.Lock()
+        self._search_locks = {}  # (jql, max_results) -> Lock
+
+    def search_lock(self, jql, max_results):
+        """Return a lock to hold while running `jql`"""
+        with self._lock:
+            return self._search_locks.setdefault(
+                (jql, max_results), threading.Lock()
+            )
+
+    def find(self, jql, expand, max_results, fields=None):
+        """Return the issues previously fetched for `jql` with at least the
+        given `expand` options and `fields`, or None if the query has not
+        been run.
+        """
+        for cached_expand, cached_fields, issues in self.searches.get(
+            (jql, max_results), []
+        ):
+            if expand_covers(cached_expand, expand) and fields_cover(
+                cached_fields, fields
+            ):
+                return list(issues)
+        return None
+
+    def add(self, jql, expand, max_results, issues, fields=None):
+        """Remember the `issues` fetched for `jql`, replacing any issues
+        previously stored for the same search. Returns the list of issues,
+        using previously stored objects for any issue that has not been
+        updated since it was last fetched.
+        """
+        stored_issues = []
+        for issue in issues:
+            updated = getattr(issue.fields, "updated", None)
+            stored = self.issues.get(issue.key)
+
+            if (
+                stored is not None
+                and updated is not None
+                and stored[0] == updated
+                and expand_covers(stored[1], expand)
+                and fields_cover(stored[2], fields)
+            ):
+                issue = stored[3]
+            else:
+                if stored is not None and stored[0] != updated:
+                    # The changelog of the old version is no longer needed
+                    self.changelogs.pop((issue.key, stored[0]), None)
+                self.issues[issue.key] = (updated, expand, fields, issue)
+
+            stored_issues.append(issue)
+
+        searches = [
+            search
+            for search in self.searches.get((jql, max_results), [])
+            if (search[0], search[1]) != (expand, fields)
+        ]
+        searches.append((expand, fields, stored_issues))
+        self.searches[(jql, max_results)] = searches
+
+        return list(stored_issues)
+
+    def changelog(self, issue):
+        """Return a list of `(date, change)` tuples for the changes in the
+        issue's changelog, in chronological order. `date` is a naive
+        datetime.
+        """
+        updated = getattr(issue.fields, "updated", None)
+        cache_key = (issue.key, updated)
+
+        if updated is not None and cache_key in self.changelogs:
+            return self.changelogs[cache_key]
+
+        changes = [
+            (dateutil.parser.parse(change.created, ignoretz=True), change)
+            for change in sorted(
+                issue.changelog.histories,
+                key=lambda c: dateutil.parser.parse(c.created),
+            )
+        ]
+
+        if updated is not None:
+            self.changelogs[cache_key] = changes
+
+        return changes
+
+
+def expand_covers(expand, requested):
+    """Return True if issues fetched with the `expand` option contain
+    everything asked for in the `requested` expand option.
+    """
+    have = set(filter(None, (expand or "").split(",")))
+    want = set(filter(None, (requested or "").split(",")))
+    return want <= have
+
+
+def fields_cover(fields, requested):
+    """Return True if issues fetched with the list of `fields` contain all
+    of the `requested` fields. `None` means all fields.
+    """
+    if fields is None:
+        return True
+    if requested is None:
+        return False
+    return set(requested) <= set(fields)
+
+
 class QueryManager(object):
     """Manage and execute queries"""
 
@@ -63,19 +197,42 @@ class QueryManager(object):
         attributes={},
         known_values={},
         max_results=False,
+        changelog_workers=8,
+    )
+
+    # Fields used for every issue, whichever calculator fetched it
+    base_fields = (
+        "summary",
+        "issuetype",
+        "status",
+        "resolution",
+        "resolutiondate",
+        "created",
+        "updated",
     )
 
-    def __init__(self, jira, settings):
+    def __init__(self, jira, settings, issue_store=None):
         self.jira = jira
         self.settings = self.settings.copy()
         self.settings.update(settings)
 
+        self.issue_store = (
+            issue_store if issue_store is not None else IssueStore()
+        )
+
         self.attributes_to_fields = {}
         self.fields_to_attributes = {}
 
+        # Record the requests made to JIRA for each query
+        self.telemetry = Telemetry()
+        self.telemetry.watch(self.jira)
+
         # Look up fields in JIRA and resolve attributes to fields
-        logger.debug("Resolving JIRA fields")
-        self.jira_fields = self.jira.fields()
+        if self.issue_store.jira_fields is None:
+            logger.debug("Resolving JIRA fields")
+            with self.telemetry.for_query(self.telemetry.other):
+                self.issue_store.jira_fields = self.jira.fields()
+        self.jira_fields = self.issue_store.jira_fields
 
         if len(self.jira_fields) == 0:
             raise ConfigError(
@@ -122,6 +279,27 @@ class QueryManager(object):
                 "(did you try to use the field id instead?)" % name
             ) from None
 
+    def search_fields(self, *field_ids, attributes=False):
+        """Return the list of JIRA field ids to fetch for a search whose
+        results are read using the given `field_ids` (which may be `None`)
+        and the fields every issue needs. If `attributes` is True, the fields
+        mapped to the configured attributes are included too.
+        """
+        if attributes:
+            field_ids = tuple(self.attributes_to_fields.values()) + field_ids
+
+        fields = list(self.base_fields)
+        for field_id in field_ids:
+            if not field_id:
+                continue
+
+            # Only the top level field can be requested from JIRA
+            field_id = field_id.split(".")[0]
+            if field_id not in fields:
+                fields.append(field_id)
+
+        return fields
+
     def resolve_attribute_value(self, issue, attribute_name):
         """Given an attribute name (i.e. one named in the config file and
         mapped to a field in JIRA), return its value from the given issue.
@@ -193,6 +371,8 @@ class QueryManager(object):
         `['status']`.
         """
 
+        changes = self.issue_store.changelog(issue)
+
         for field in fields:
             initial_value = self.resolve_field_value(
                 issue, self.field_name_to_id(field)
@@ -202,15 +382,7 @@ class QueryManager(object):
                     filter(
                         lambda h: h.field == field,
                         itertools.chain.from_iterable(
-                            [
-                                c.items
-                                for c in sorted(
-                                    issue.changelog.histories,
-                                    key=lambda c: dateutil.parser.parse(
-                                        c.created
-                                    ),
-                                )
-                            ]
+                            [c.items for _, c in changes]
                         ),
                     )
                 ).fromString
@@ -225,12 +397,7 @@ class QueryManager(object):
                 to_string=initial_value,
             )
 
-        for change in sorted(
-            issue.changelog.histories,
-            key=lambda c: dateutil.parser.parse(c.created),
-        ):
-            change_date = dateutil.parser.parse(change.created, ignoretz=True)
-
+        for change_date, change in changes:
             for item in change.items:
                 if item.field in fields:
                     yield IssueSnapshot(
@@ -243,19 +410,224 @@ class QueryManager(object):
 
     # Basic queries
 
-    def find_issues(self, jql, expand="changelog"):
+    def find_issues(self, jql, expand="changelog", fields=None):
         """Return a list of issues with changelog metadata for the given
-        JQL.
+        JQL. If `fields` is given (see `search_fields()`), only those fields
+        are fetched, otherwise all fields are. Queries that have already been
+        run are answered from the issue store.
         """
 
         max_results = self.settings["max_results"]
 
+        stats = self.telemetry.query(jql)
+        stats.searches += 1
+
+        # Wait for another thread running the same query, then use its results
+        with self.issue_store.search_lock(jql, max_results):
+            issues = self.issue_store.find(jql, expand, max_results, fields)
+            if issues is not None:
+                stats.cache_hits += 1
+                logger.info(
+                    "Using %d previously fetched issues for query `%s`",
+                    len(issues),
+                    jql,
+                )
+                return issues
+
+            return self.fetch_issues(jql, expand, max_results, fields, stats)
+
+    def fetch_issues(self, jql, expand, max_results, fields, stats):
+        """Fetch the issues for `jql` from JIRA and add them to the issue
+        store, recording the requests made in `stats`.
+        """
+
         logger.info("Fetching issues with query `%s`", jql)
         if max_results:
             logger.info("Limiting to %d results", max_results)
 
-        issues = self.jira.search_issues(
-            jql, expand=expand, maxResults=max_results
+        start = time.perf_counter()
+        with self.telemetry.for_query(stats):
+            issues = self.jira.search_issues(
+                jql,
+                expand=expand,
+                maxResults=max_results,
+                fields=",".join(fields) if fields is not None else None,
+            )
+            logger.info("Fetched %d issues", len(issues))
+            issues = self.issue_store.add(
+                jql, expand, max_results, issues, fields
+            )
+
+            if expand_covers(expand, "changelog"):
+                self.complete_changelogs(issues)
+
+        duration = time.perf_counter() - start
+        stats.duration += duration
+        stats.issues += len(issues)
+
+        logger.info(
+            "Query took %.2fs. In total, %d requests, %d pages, %d bytes and "
+            "%d retries",
+            duration,
+            stats.requests,
+            stats.pages,
+            stats.bytes,
+            stats.retries,
         )
-        logger.info("Fetched %d issues", len(issues))
+
+        return issues
+
+    def refresh(self):
+        """Bring the results of every query in the issue store up to date.
+        The issues matching each query are listed with only their `updated`
+        field, and only issues that are new or have been updated since they
+        were fetched are fetched again. Returns True if the results of any
+        query changed.
+        """
+
+        changed = False
+        for jql, max_results in list(self.issue_store.searches.keys()):
+            with self.issue_store.search_lock(jql, max_results):
+                stats = self.telemetry.query(jql)
+                start = time.perf_counter()
+
+                with self.telemetry.for_query(stats):
+                    if self.refresh_search(jql, max_results):
+                        changed = True
+
+                stats.duration += time.perf_counter() - start
+
+        return changed
+
+    def refresh_search(self, jql, max_results):
+        logger.info("Checking for changes to issues in query `%s`", jql)
+
+        listing = [
+            (issue.key, getattr(issue.fields, "updated", None))
+            for issue in self.jira.search_issues(
+                jql, maxResults=max_results, fields="updated", expand=None
+            )
+        ]
+        keys = [key for key, _ in listing]
+
+        changed = False
+        for expand, fields, issues in self.issue_store.searches[
+            (jql, max_results)
+        ]:
+            current = {issue.key: issue for issue in issues}
+            stale = [
+                key
+                for key, updated in listing
+                if key not in current
+                or updated is None
+                or getattr(current[key].fields, "updated", None) != updated
+            ]
+
+            if not stale and keys == [issue.key for issue in issues]:
+                continue
+
+            logger.info("Fetching %d new or updated issues", len(stale))
+            fetched = {
+                issue.key: issue
+                for issue in self.fetch_keys(stale, expand, fields)
+            }
+            issues = self.issue_store.add(
+                jql,
+                expand,
+                max_results,
+                [
+                    fetched[key] if key in fetched else current[key]
+                    for key in keys
+                    if key in fetched or (key in current and key not in stale)
+                ],
+                fields,
+            )
+
+            if expand_covers(expand, "changelog"):
+                self.complete_changelogs(issues)
+
+            changed = True
+
+        return changed
+
+    def fetch_keys(self, keys, expand, fields, batch_size=100):
+        """Fetch the issues with the given keys"""
+        issues = []
+        for i in range(0, len(keys), batch_size):
+            issues.extend(
+                self.jira.search_issues(
+                    "key in (%s)" % ",".join(keys[i : i + batch_size]),
+                    expand=expand,
+                    maxResults=False,
+                    fields=",".join(fields) if fields is not None else None,
+                )
+            )
         return issues
+
+    def complete_changelogs(self, issues):
+        """Search results only include the first page (usually 100 entries)
+        of each issue's changelog. Fetch the rest of the changelog for any
+        issue where it was truncated, several issues at a time.
+        """
+        truncated = [
+            issue
+            for issue in issues
+            if getattr(issue.changelog, "total", 0)
+            > len(issue.changelog.histories)
+        ]
+
+        if not truncated:
+            return
+
+        logger.info(
+            "Fetching complete change history for %d issues", len(truncated)
+        )
+
+        # Attribute requests made by the worker threads to the current query
+        stats = self.telemetry.current()
+
+        def fetch_changelog(issue):
+            with self.telemetry.for_query(stats):
+                return self.fetch_changelog(issue)
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.settings["changelog_workers"]
+        ) as executor:
+            for issue, histories in zip(
+                truncated, executor.map(fetch_changelog, truncated)
+            ):
+                issue.changelog.histories = histories
+
+    def fetch_changelog(self, issue):
+        """Return the complete list of changes in the changelog for `issue`,
+        fetched page by page from the issue changelog endpoint.
+        """
+        histories = []
+
+        try:
+            while True:
+                page = self.jira._get_json(
+                    "issue/%s/changelog" % issue.key,
+                    params={"startAt": len(histories), "maxResults": 100},
+                )
+                values = page.get("values", [])
+                histories.extend(values)
+
+                if (
+                    page.get("isLast", False)
+                    or len(values) == 0
+                    or len(histories) >= page.get("total", 0)
+                ):
+                    break
+        except JIRAError as e:
+            if e.status_code != 404:
+                raise
+
+            # JIRA Server does not have the changelog endpoint, but returns
+            # the whole changelog when a single issue is fetched.
+            histories = self.jira._get_json(
+                "issue/%s" % issue.key,
+                params={"expand": "changelog", "fields": "created"},
+            )["changelog"]["histories"]
+
+        return [dict2resource(history) for history in histories]
@@ -1,6 +1,8 @@
 import pytest
 import datetime
 
+from jira.exceptions import JIRAError
+
 from .conftest import (
     FauxJIRA as JIRA,
     FauxIssue as Issue,
@@ -8,7 +10,7 @@ from .conftest import (
     FauxFieldValue as Value,
 )
 
-from .querymanager import QueryManager, IssueSnapshot
+from .querymanager import QueryManager, IssueSnapshot, IssueStore
 from .utils import extend_dict
 
 
@@ -177,3 +179,264 @@ def test_iter_changes(jira, settings):
             to_string="QA",
         ),
     ]
+
+
+def test_find_issues_reuses_previous_search(jira, settings):
+    searches = []
+    search_issues = jira.search_issues
+
+    def counting_search_issues(jql, *args, **kwargs):
+        searches.append((jql, kwargs.get("expand")))
+        return search_issues(jql, *args, **kwargs)
+
+    jira.search_issues = counting_search_issues
+    qm = QueryManager(jira, settings)
+
+    issues = qm.find_issues("(filter=123)")
+    assert qm.find_issues("(filter=123)") == issues
+    assert qm.find_issues("(filter=123)", expand=None) == issues
+    assert searches == [("(filter=123)", "changelog")]
+
+    qm.find_issues("(filter=456)", expand=None)
+    qm.find_issues("(filter=456)")
+    assert searches == [
+        ("(filter=123)", "changelog"),
+        ("(filter=456)", None),
+        ("(filter=456)", "changelog"),
+    ]
+
+
+def test_issue_store_shares_unchanged_issues():
+    store = IssueStore()
+
+    def make_issue(updated):
+        return Issue(
+            "A-1",
+            summary="Issue A-1",
+            created="2018-01-01 01:01:01",
+            updated=updated,
+            changes=[
+                Change("2018-01-03 01:01:01", [("status", "Next", "Done")]),
+                Change("2018-01-02 01:01:01", [("status", "Backlog", "Next")]),
+            ],
+        )
+
+    first = make_issue("2018-01-03 01:01:01")
+    assert store.add("project=A", "changelog", None, [first]) == [first]
+
+    # The same version of the issue from another query is shared
+    assert store.add(
+        "project=B", "changelog", None, [make_issue("2018-01-03 01:01:01")]
+    ) == [first]
+
+    changes = store.changelog(first)
+    assert [d for d, _ in changes] == [
+        datetime.datetime(2018, 1, 2, 1, 1, 1),
+        datetime.datetime(2018, 1, 3, 1, 1, 1),
+    ]
+    assert store.changelog(first) is changes
+
+    # A newer version replaces the stored issue
+    updated = make_issue("2018-01-04 01:01:01")
+    assert store.add("project=C", "changelog", None, [updated]) == [updated]
+    assert store.changelog(updated) is not changes
+
+    # Only the changelog of the current version is kept
+    assert list(store.changelogs) == [("A-1", "2018-01-04 01:01:01")]
+
+
+def test_search_fields(jira, settings):
+    qm = QueryManager(jira, settings)
+
+    assert qm.search_fields() == [
+        "summary",
+        "issuetype",
+        "status",
+        "resolution",
+        "resolutiondate",
+        "created",
+        "updated",
+    ]
+
+    assert sorted(
+        qm.search_fields(
+            "customfield_100", None, "customfield_002.value", attributes=True
+        )[7:]
+    ) == [
+        "customfield_001",
+        "customfield_002",
+        "customfield_003",
+        "customfield_100",
+    ]
+
+
+def test_find_issues_requests_fields(jira, settings):
+    searches = []
+    search_issues = jira.search_issues
+
+    def recording_search_issues(jql, *args, **kwargs):
+        searches.append(kwargs.get("fields"))
+        return search_issues(jql, *args, **kwargs)
+
+    jira.search_issues = recording_search_issues
+    qm = QueryManager(jira, settings)
+
+    qm.find_issues("(filter=123)", fields=["summary", "customfield_001"])
+    qm.find_issues("(filter=123)", fields=["summary"])
+    qm.find_issues("(filter=123)", fields=["summary", "customfield_002"])
+    qm.find_issues("(filter=123)")
+    qm.find_issues("(filter=123)", fields=["customfield_003"])
+
+    assert searches == [
+        "summary,customfield_001",
+        "summary,customfield_002",
+        None,
+    ]
+
+
+def test_find_issues_completes_truncated_changelogs(jira, settings):
+    def history(n):
+        return {
+            "created": "2018-01-%02d 01:01:01" % (n + 1),
+            "items": [
+                {"field": "Team", "fromString": str(n), "toString": str(n + 1)}
+            ],
+        }
+
+    requests = []
+
+    def get_json(path, params=None):
+        requests.append((path, params["startAt"]))
+        start_at = params["startAt"]
+        return {
+            "startAt": start_at,
+            "total": 5,
+            "isLast": start_at + 2 >= 5,
+            "values": [history(n) for n in range(start_at, 5)][:2],
+        }
+
+    truncated = jira._issues[0]
+    truncated.changelog.total = 5
+    jira._issues.append(Issue("A-2", summary="Issue A-2", changes=[]))
+    jira._get_json = get_json
+
+    qm = QueryManager(jira, settings)
+    qm.find_issues("(filter=123)")
+
+    assert requests == [
+        ("issue/A-1/changelog", 0),
+        ("issue/A-1/changelog", 2),
+        ("issue/A-1/changelog", 4),
+    ]
+    assert [
+        (c.date.day, c.to_string) for c in qm.iter_changes(truncated, ["Team"])
+    ][1:] == [(1, "1"), (2, "2"), (3, "3"), (4, "4"), (5, "5")]
+
+
+def test_find_issues_completes_changelogs_without_endpoint(jira, settings):
+    def get_json(path, params=None):
+        if path.endswith("/changelog"):
+            raise JIRAError(status_code=404)
+
+        assert path == "issue/A-1"
+        return {
+            "changelog": {
+                "histories": [
+                    {
+                        "created": "2018-01-02 01:01:01",
+                        "items": [
+                            {
+                                "field": "status",
+                                "fromString": "Backlog",
+                                "toString": "Next",
+                            }
+                        ],
+                    }
+                ]
+            }
+        }
+
+    truncated = jira._issues[0]
+    truncated.changelog.total = 10
+    jira._get_json = get_json
+
+    qm = QueryManager(jira, settings)
+    qm.find_issues("(filter=123)")
+
+    assert len(truncated.changelog.histories) == 1
+    assert truncated.changelog.histories[0].items[0].toString == "Next"
+
+
+def test_find_issues_records_telemetry(jira, settings):
+    def get_json(path, params=None):
+        for hook in jira.response_hooks:
+            hook("https://example.org/rest/api/2/" + path, 200, 0.1, 100)
+        return {"startAt": 0, "total": 0, "isLast": True, "values": []}
+
+    changelog = jira._issues[0].changelog
+    changelog.total = len(changelog.histories) + 1
+    jira._get_json = get_json
+    jira.response_hooks = []
+
+    qm = QueryManager(jira, settings)
+    qm.find_issues("(filter=123)")
+    qm.find_issues("(filter=123)")
+
+    stats = qm.telemetry.queries["(filter=123)"]
+    assert stats.searches == 2
+    assert stats.cache_hits == 1
+    assert stats.issues == len(jira._issues)
+
+    # The changelog request was made by a worker thread, but is still
+    # attributed to the query
+    assert stats.requests == 1
+    assert stats.bytes == 100
+    assert qm.telemetry.other.requests == 0
+
+
+def test_refresh_fetches_only_changed_issues(custom_fields, settings):
+    def make_issue(key, updated):
+        return Issue(
+            key,
+            summary="Issue %s" % key,
+            created="2018-01-01 01:01:01",
+            updated=updated,
+            changes=[],
+        )
+
+    searches = []
+
+    def search_filter(issue, jql):
+        searches.append(jql)
+        return not jql.startswith("key in") or issue.key in jql
+
+    jira = JIRA(
+        fields=custom_fields,
+        issues=[
+            make_issue("A-1", "2018-01-02 01:01:01"),
+            make_issue("A-2", "2018-01-02 01:01:01"),
+            make_issue("A-3", "2018-01-02 01:01:01"),
+        ],
+        filter=search_filter,
+    )
+    qm = QueryManager(jira, settings)
+    first = qm.find_issues("(filter=123)")
+
+    # Nothing has changed
+    assert qm.refresh() is False
+
+    # A-1 is removed, A-3 is updated and A-4 is added
+    jira._issues = [
+        make_issue("A-2", "2018-01-02 01:01:01"),
+        make_issue("A-3", "2018-01-03 01:01:01"),
+        make_issue("A-4", "2018-01-03 01:01:01"),
+    ]
+    del searches[:]
+
+    assert qm.refresh() is True
+    assert set(searches) == {"(filter=123)", "key in (A-3,A-4)"}
+
+    issues = qm.find_issues("(filter=123)")
+    assert [i.key for i in issues] == ["A-2", "A-3", "A-4"]
+    assert issues[0] is first[1]
+    assert issues[1].fields.updated == "2018-01-03 01:01:01"
@@ -0,0 +1,116 @@
+import os.path
+
+from .utils import set_chart_context
+
+# Options that control how charts are rendered:
+#
+# - `dpi`: resolution of bitmap (e.g. PNG) charts
+# - `tight_bbox`: trim the chart to fit its contents, which takes an extra
+#   drawing pass
+# - `format`: file format (extension) to write charts in, instead of the
+#   one in the output file name
+# - `style`: apply the seaborn context and style
+# - `antialiased`: smooth the edges of lines, shapes and text
+# - `backend`: matplotlib backend, for the whole process only
+RENDER_OPTIONS = (
+    "dpi",
+    "tight_bbox",
+    "format",
+    "style",
+    "antialiased",
+    "backend",
+)
+
+RENDER_PROFILES = {
+    "default": {
+        "dpi": 300,
+        "tight_bbox": True,
+        "format": None,
+        "style": True,
+        "antialiased": True,
+        "backend": None,
+    },
+    "fast": {
+        "dpi": 96,
+        "tight_bbox": False,
+        "format": None,
+        "style": False,
+        "antialiased": False,
+        "backend": "agg",
+    },
+}
+
+
+def get_render_profile(settings, chart=None):
+    """Return a dict of the `RENDER_OPTIONS` for the chart written to the
+    output file setting `chart` (e.g. `"cfd_chart"`), or for all charts if
+    `chart` is None.
+
+    The options come from the profile named in `chart_profile`, overridden
+    by `chart_dpi` and `chart_format`, and then by the chart's entry in
+    `chart_profiles`, which may name a different profile.
+    """
+
+    name = settings.get("chart_profile") or "default"
+    overrides = {
+        "dpi": settings.get("chart_dpi"),
+        "format": settings.get("chart_format"),
+    }
+
+    if chart is not None:
+        chart_options = (settings.get("chart_profiles") or {}).get(chart, {})
+        name = chart_options.get("profile") or name
+        overrides.update(chart_options)
+
+    if name not in RENDER_PROFILES:
+        from .config import ConfigError
+
+        raise ConfigError(
+            "Unknown chart profile `%s`. Expected one of: %s"
+            % (name, ", ".join(RENDER_PROFILES))
+        )
+
+    profile = dict(RENDER_PROFILES[name])
+    profile.update(
+        {
+            key: value
+            for key, value in overrides.items()
+            if key in RENDER_OPTIONS and value is not None
+        }
+    )
+    return profile
+
+
+def set_chart_rendering(settings):
+    """Set up the process to render charts with the profile for all charts
+    in `settings`: select its backend, and the seaborn "paper" context
+    unless styling is turned off.
+    """
+
+    profile = get_render_profile(settings)
+
+    if profile["backend"]:
+        import matplotlib
+
+        matplotlib.use(profile["backend"])
+
+    set_chart_context("paper" if profile["style"] else None)
+
+
+def chart_output_file(output_file, profile):
+    """Return `output_file` with the extension for the profile's format"""
+
+    if not profile["format"]:
+        return output_file
+
+    return "%s.%s" % (
+        os.path.splitext(output_file)[0],
+        profile["format"].lstrip(".").lower(),
+    )
+
+
+def disable_antialiasing(fig):
+    """Turn off antialiasing for everything drawn in `fig`"""
+
+    for artist in fig.findobj(lambda a: hasattr(a, "set_antialiased")):
+        artist.set_antialiased(False)
@@ -0,0 +1,86 @@
+import os
+import struct
+
+import matplotlib.pyplot as plt
+import pytest
+
+from .calculator import Calculator
+from .chartcache import Chart
+from .config import ConfigError
+from .rendering import chart_output_file, get_render_profile
+
+
+def png_size(path):
+    with open(path, "rb") as f:
+        return struct.unpack(">II", f.read(24)[16:24])
+
+
+class LineChart(Calculator):
+    def write(self):
+        chart = Chart(self, self.settings["line_chart"])
+
+        fig, ax = plt.subplots(figsize=(4, 3))
+        ax.plot([1, 3, 2])
+        chart.set_style()
+        chart.save(fig)
+
+        return chart.output_file
+
+
+def test_get_render_profile():
+    settings = {
+        "chart_profile": "fast",
+        "chart_dpi": 150,
+        "chart_profiles": {
+            "cfd_chart": {"profile": "default", "format": "svg"},
+            "wip_chart": {"profile": None, "dpi": 72},
+        },
+    }
+
+    profile = get_render_profile(settings)
+    assert profile["dpi"] == 150
+    assert profile["tight_bbox"] is False
+    assert profile["backend"] == "agg"
+
+    profile = get_render_profile(settings, "cfd_chart")
+    assert profile["dpi"] == 150
+    assert profile["tight_bbox"] is True
+    assert profile["format"] == "svg"
+
+    profile = get_render_profile(settings, "wip_chart")
+    assert profile["dpi"] == 72
+    assert profile["antialiased"] is False
+
+    assert get_render_profile({}, "cfd_chart")["dpi"] == 300
+
+    with pytest.raises(ConfigError):
+        get_render_profile({"chart_profile": "slow"})
+
+
+def test_chart_output_file():
+    assert chart_output_file("cfd.png", {"format": None}) == "cfd.png"
+    assert chart_output_file("cfd.png", {"format": "SVG"}) == "cfd.svg"
+    assert chart_output_file("cfd", {"format": ".svg"}) == "cfd.svg"
+
+
+def test_chart_is_rendered_with_profile(tmp_path):
+    output_file = str(tmp_path / "line.png")
+
+    LineChart(None, {"line_chart": output_file}, {}).write()
+    assert png_size(output_file)[0] < 4 * 300
+
+    LineChart(
+        None, {"line_chart": output_file, "chart_profile": "fast"}, {}
+    ).write()
+    assert png_size(output_file) == (4 * 96, 3 * 96)
+
+    svg_file = LineChart(
+        None,
+        {
+            "line_chart": output_file,
+            "chart_profiles": {"line_chart": {"format": "svg"}},
+        },
+        {},
+    ).write()
+    assert svg_file == str(tmp_path / "line.svg")
+    assert os.path.exists(svg_file)
@@ -0,0 +1,170 @@
+import gzip
+import json
+import logging
+import threading
+
+from jira.exceptions import JIRAError
+from jira.resources import Issue
+
+from .config import ConfigError
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_VERSION = 1
+
+
+def search_key(jql, max_results, fields, expand):
+    """Return the key used to look up a recorded search"""
+    return json.dumps(
+        [
+            jql,
+            max_results or None,
+            ",".join(fields) if isinstance(fields, (list, tuple)) else fields,
+            expand,
+        ]
+    )
+
+
+def json_key(path, params):
+    """Return the key used to look up a recorded REST API response"""
+    return json.dumps([path, params], sort_keys=True)
+
+
+class RecordingClient(object):
+    """Wraps a JIRA client, recording the results of `fields()`,
+    `search_issues()` and `_get_json()` so that they can be saved to an
+    archive with `save()` and replayed later with `ReplayClient`.
+    """
+
+    def __init__(self, jira):
+        self.jira = jira
+        self._options = jira._options
+        self._lock = threading.Lock()
+
+        self.fields_result = None
+        self.searches = {}
+        self.responses = {}
+
+    @property
+    def _session(self):
+        # So that requests can be watched by `telemetry.Telemetry`
+        return getattr(self.jira, "_session", None)
+
+    @property
+    def response_hooks(self):
+        return getattr(self.jira, "response_hooks", None)
+
+    def fields(self):
+        result = self.jira.fields()
+        self.fields_result = result
+        return result
+
+    def search_issues(
+        self, jql_str, startAt=0, maxResults=50, fields=None, expand=None
+    ):
+        issues = self.jira.search_issues(
+            jql_str,
+            startAt=startAt,
+            maxResults=maxResults,
+            fields=fields,
+            expand=expand,
+        )
+
+        with self._lock:
+            self.searches[search_key(jql_str, maxResults, fields, expand)] = [
+                issue.raw for issue in issues
+            ]
+
+        return issues
+
+    def _get_json(self, path, params=None):
+        key = json_key(path, params)
+
+        try:
+            result = self.jira._get_json(path, params=params)
+        except JIRAError as e:
+            with self._lock:
+                self.responses[key] = {"error": e.status_code}
+            raise
+
+        with self._lock:
+            self.responses[key] = {"result": result}
+
+        return result
+
+    def save(self, filename):
+        """Write everything recorded so far to a gzip compressed JSON
+        archive.
+        """
+        logger.info(
+            "Saving %d recorded searches to %s", len(self.searches), filename
+        )
+
+        with gzip.open(filename, "wt", encoding="utf-8") as archive:
+            json.dump(
+                {
+                    "version": ARCHIVE_VERSION,
+                    "server": self._options["server"],
+                    "fields": self.fields_result,
+                    "searches": self.searches,
+                    "responses": self.responses,
+                },
+                archive,
+                separators=(",", ":"),
+            )
+
+
+class ReplayClient(object):
+    """A JIRA client that answers `fields()`, `search_issues()` and
+    `_get_json()` from an archive written by `RecordingClient`, without
+    contacting JIRA. Queries that were not recorded raise a `ConfigError`.
+    """
+
+    def __init__(self, filename):
+        try:
+            with gzip.open(filename, "rt", encoding="utf-8") as archive:
+                recording = json.load(archive)
+        except (OSError, ValueError) as e:
+            raise ConfigError(
+                "Unable to read recorded responses from %s" % filename
+            ) from e
+
+        if recording.get("version") != ARCHIVE_VERSION:
+            raise ConfigError(
+                "Recorded responses in %s were written by an incompatible "
+                "version" % filename
+            ) from None
+
+        self._options = {"server": recording["server"]}
+        self._fields = recording["fields"] or []
+        self._searches = recording["searches"]
+        self._responses = recording["responses"]
+
+    def fields(self):
+        return self._fields
+
+    def search_issues(
+        self, jql_str, startAt=0, maxResults=50, fields=None, expand=None
+    ):
+        key = search_key(jql_str, maxResults, fields, expand)
+
+        if key not in self._searches:
+            raise ConfigError(
+                "No recorded response for query `%s`. Record it again with "
+                "the current configuration." % jql_str
+            ) from None
+
+        return [
+            Issue(self._options, None, raw=raw) for raw in self._searches[key]
+        ]
+
+    def _get_json(self, path, params=None):
+        response = self._responses.get(json_key(path, params))
+
+        if response is None:
+            raise ConfigError("No recorded response for `%s`" % path) from None
+
+        if "error" in response:
+            raise JIRAError(status_code=response["error"], url=path)
+
+        return response["result"]
@@ -0,0 +1,126 @@
+import os.path
+
+import pytest
+from jira.exceptions import JIRAError
+from jira.resources import Issue
+from pandas.testing import assert_frame_equal
+
+from .calculators.cycletime import CycleTimeCalculator
+from .config import ConfigError
+from .conftest import FauxJIRA as JIRA
+from .querymanager import QueryManager
+from .replay import RecordingClient, ReplayClient
+
+
+def make_issue(key, changes):
+    return Issue(
+        {"server": "https://example.org"},
+        None,
+        raw={
+            "key": key,
+            "fields": {
+                "summary": "Issue %s" % key,
+                "issuetype": {"name": "Story"},
+                "status": {"name": "Done"},
+                "resolution": {"name": "Done"},
+                "resolutiondate": "2018-01-06 01:01:01",
+                "created": "2018-01-01 01:01:01",
+                "updated": "2018-01-06 01:01:01",
+            },
+            "changelog": {
+                "total": len(changes),
+                "histories": [
+                    {
+                        "created": created,
+                        "items": [
+                            {
+                                "field": "status",
+                                "fromString": from_string,
+                                "toString": to_string,
+                            }
+                        ],
+                    }
+                    for created, from_string, to_string in changes
+                ],
+            },
+        },
+    )
+
+
+@pytest.fixture
+def jira(minimal_fields):
+    jira = JIRA(
+        fields=minimal_fields,
+        issues=[
+            make_issue(
+                "A-1",
+                [
+                    ("2018-01-02 01:01:01", "Backlog", "Next"),
+                    ("2018-01-03 01:01:01", "Next", "Build"),
+                    ("2018-01-06 01:01:01", "Build", "Done"),
+                ],
+            ),
+            make_issue("A-2", [("2018-01-04 01:01:01", "Backlog", "Next")]),
+        ],
+    )
+
+    def get_json(path, params=None):
+        raise JIRAError(status_code=404)
+
+    jira._get_json = get_json
+    return jira
+
+
+def run_cycle_time(jira, settings):
+    query_manager = QueryManager(jira, settings)
+    results = {}
+    calculator = CycleTimeCalculator(query_manager, settings, results)
+    return calculator.run()
+
+
+def test_record_and_replay(jira, minimal_settings, tmp_path):
+    archive = os.path.join(str(tmp_path), "responses.json.gz")
+
+    recorder = RecordingClient(jira)
+    recorded = run_cycle_time(recorder, minimal_settings)
+
+    with pytest.raises(JIRAError):
+        recorder._get_json("issue/A-1/changelog", {"startAt": 0})
+
+    recorder.save(archive)
+
+    replay = ReplayClient(archive)
+    assert replay._options == {"server": "https://example.org"}
+    assert replay.fields() == jira.fields()
+
+    replayed = run_cycle_time(replay, minimal_settings)
+    assert_frame_equal(replayed, recorded)
+    assert list(replayed["key"]) == ["A-1", "A-2"]
+
+    with pytest.raises(JIRAError) as e:
+        replay._get_json("issue/A-1/changelog", {"startAt": 0})
+    assert e.value.status_code == 404
+
+
+def test_replay_unrecorded_query(jira, minimal_settings, tmp_path):
+    archive = os.path.join(str(tmp_path), "responses.json.gz")
+
+    recorder = RecordingClient(jira)
+    recorder.fields()
+    recorder.save(archive)
+
+    replay = ReplayClient(archive)
+    with pytest.raises(ConfigError):
+        replay.search_issues("(filter=456)")
+
+    with pytest.raises(ConfigError):
+        replay._get_json("field")
+
+
+def test_replay_invalid_archive(tmp_path):
+    archive = os.path.join(str(tmp_path), "responses.json.gz")
+    with open(archive, "w") as f:
+        f.write("not an archive")
+
+    with pytest.raises(ConfigError):
+        ReplayClient(archive)
@@ -0,0 +1,64 @@
+import logging
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SimulationRandom(object):
+    """The source of random numbers for the Monte Carlo simulations, seeded
+    with `seed` (an integer), or with fresh entropy if it is None.
+
+    Each simulation draws from its own stream, derived from the seed and the
+    simulation's name, so that the same seed always gives the same results
+    whichever other simulations are run. A stream can be split with
+    `generators()` into independent streams for parallel workers.
+    """
+
+    def __init__(self, seed=None):
+        self.seed = np.random.SeedSequence(seed).entropy
+
+        if seed is None:
+            logger.info(
+                "Running simulations with seed %d. Set `Simulation seed` to "
+                "the same value to reproduce them.",
+                self.seed,
+            )
+
+    def seed_sequence(self, name):
+        """Return the `SeedSequence` of the simulation `name`"""
+        return np.random.SeedSequence(
+            self.seed, spawn_key=(zlib.crc32(name.encode("utf-8")),)
+        )
+
+    def generator(self, name):
+        """Return a NumPy `Generator` for the simulation `name`"""
+        return np.random.default_rng(self.seed_sequence(name))
+
+    def generators(self, name, count):
+        """Return `count` independent NumPy `Generator`s for the simulation
+        `name`, e.g. one for each team or process.
+        """
+        return [
+            np.random.default_rng(s)
+            for s in self.seed_sequence(name).spawn(count)
+        ]
+
+
+def get_simulation_random(settings):
+    """Return a `SimulationRandom` seeded with the `simulation_seed` in
+    `settings`
+    """
+    return SimulationRandom(settings.get("simulation_seed"))
+
+
+def resolve_simulation_seed(settings):
+    """Return `settings` with a `simulation_seed`, drawing (and logging) one
+    from fresh entropy if none is set, so that every simulation in a run is
+    derived from the same seed. `settings` itself is not changed.
+    """
+    if settings.get("simulation_seed") is not None:
+        return settings
+
+    return dict(settings, simulation_seed=SimulationRandom().seed)
@@ -0,0 +1,76 @@
+from .simulation import (
+    SimulationRandom,
+    get_simulation_random,
+    resolve_simulation_seed,
+)
+
+
+def test_generator_is_reproducible():
+    random = SimulationRandom(1234)
+
+    draws = random.generator("forecast").integers(1000, size=10)
+    assert (
+        SimulationRandom(1234).generator("forecast").integers(1000, size=10)
+        == draws
+    ).all()
+    assert (
+        get_simulation_random({"simulation_seed": 1234})
+        .generator("forecast")
+        .integers(1000, size=10)
+        == draws
+    ).all()
+
+    # Other simulations and seeds have their own streams
+    assert not (
+        random.generator("progress").integers(1000, size=10) == draws
+    ).all()
+    assert not (
+        SimulationRandom(4321).generator("forecast").integers(1000, size=10)
+        == draws
+    ).all()
+
+
+def test_unseeded_generator_can_be_reproduced():
+    random = get_simulation_random({})
+
+    draws = random.generator("forecast").integers(1000, size=10)
+    assert (
+        SimulationRandom(random.seed)
+        .generator("forecast")
+        .integers(1000, size=10)
+        == draws
+    ).all()
+
+
+def test_generators_are_independent():
+    generators = SimulationRandom(1234).generators("progress", 3)
+    draws = [g.integers(1000, size=10).tolist() for g in generators]
+
+    assert len(draws) == 3
+    assert draws[0] != draws[1] != draws[2]
+    assert draws == [
+        g.integers(1000, size=10).tolist()
+        for g in SimulationRandom(1234).generators("progress", 3)
+    ]
+
+
+def test_resolve_simulation_seed():
+    settings = {"simulation_seed": None}
+
+    resolved = resolve_simulation_seed(settings)
+    assert resolved["simulation_seed"] is not None
+    assert settings["simulation_seed"] is None
+
+    # Every stream is derived from the one seed
+    assert (
+        get_simulation_random(resolved)
+        .generator("forecast")
+        .integers(1000, size=10)
+        == get_simulation_random(resolved)
+        .generator("forecast")
+        .integers(1000, size=10)
+    ).all()
+
+    # A configured seed is kept
+    settings = {"simulation_seed": 1234}
+    assert resolve_simulation_seed(settings) is settings
@@ -0,0 +1,254 @@
+import collections
+import contextlib
+import logging
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Responses with these status codes (rate limited, or temporarily
+# unavailable) are retried by the JIRA clients: `jira.JIRA`'s
+# `ResilientSession` and `AsyncJIRA`
+RETRY_STATUS_CODES = (429, 503)
+
+# The `(telemetry, stats)` that responses received in each thread are
+# attributed to. Shared by all `Telemetry` objects, so that several query
+# managers can watch the same client.
+_current = threading.local()
+
+
+class QueryStats(object):
+    """Statistics about the HTTP requests made to JIRA for one query.
+    Latency percentiles are calculated from the most recent
+    `max_latencies` requests, so that a long-running daemon does not
+    keep every latency it has seen.
+
+    A retry is counted when a request follows a response with one of the
+    `RETRY_STATUS_CODES` for the same URL, so a request that is given up
+    on is not counted.
+    """
+
+    max_latencies = 10000
+
+    def __init__(self, jql):
+        self.jql = jql
+        self.searches = 0
+        self.cache_hits = 0
+        self.requests = 0
+        self.pages = 0
+        self.issues = 0
+        self.bytes = 0
+        self.retries = 0
+        self.duration = 0.0
+        self.latency_sum = 0.0
+        self.latencies = collections.deque(maxlen=self.max_latencies)
+
+        # URLs whose last response may be retried
+        self._retryable = set()
+
+    def record_response(self, url, status_code, elapsed, size):
+        self.requests += 1
+        self.bytes += size
+        self.latency_sum += elapsed
+        self.latencies.append(elapsed)
+
+        if url in self._retryable:
+            self.retries += 1
+            self._retryable.discard(url)
+
+        if status_code in RETRY_STATUS_CODES:
+            self._retryable.add(url)
+        elif status_code < 400 and url.split("?")[0].endswith("/search"):
+            self.pages += 1
+
+    def latency_percentiles(self, percentiles=(50, 90, 99)):
+        """Return a dict of request latency in seconds by percentile"""
+        if not self.latencies:
+            return {}
+        return dict(
+            zip(
+                percentiles,
+                np.percentile(self.latencies, percentiles).tolist(),
+            )
+        )
+
+    def to_dict(self):
+        return {
+            "jql": self.jql,
+            "searches": self.searches,
+            "cache_hits": self.cache_hits,
+            "requests": self.requests,
+            "pages": self.pages,
+            "issues": self.issues,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "duration": self.duration,
+            "latency": {
+                "p%d" % p: v for p, v in self.latency_percentiles().items()
+            },
+        }
+
+
+class Telemetry(object):
+    """Collects `QueryStats` for each query run by a `QueryManager`.
+
+    HTTP responses are attributed to the query being run in the thread that
+    made the request, set with `for_query()`. Requests made for other
+    purposes (such as looking up fields) are attributed to `other`.
+    Responses received outside of `for_query()` are not recorded.
+    """
+
+    def __init__(self):
+        self.queries = {}
+        self.other = QueryStats(None)
+        self._lock = threading.Lock()
+
+    def query(self, jql):
+        """Return the `QueryStats` for `jql`"""
+        with self._lock:
+            if jql not in self.queries:
+                self.queries[jql] = QueryStats(jql)
+            return self.queries[jql]
+
+    @contextlib.contextmanager
+    def for_query(self, stats):
+        """Attribute responses received in this thread to `stats` within
+        the `with` block.
+        """
+        previous = getattr(_current, "query", None)
+        _current.query = (self, stats)
+        try:
+            yield stats
+        finally:
+            _current.query = previous
+
+    def current(self):
+        """Return the `QueryStats` of this object that responses received in
+        this thread are attributed to, or None outside of `for_query()`.
+        """
+        telemetry, stats = getattr(_current, "query", None) or (None, None)
+        return stats if telemetry is self else None
+
+    def record_response(self, url, status_code, elapsed, size):
+        stats = self.current()
+        if stats is None:
+            return
+
+        with self._lock:
+            stats.record_response(url, status_code, elapsed, size)
+
+    def watch(self, jira):
+        """Record the responses received by the given JIRA client. Works
+        with clients that use a `requests` session (`jira.JIRA`) or that
+        have a list of `response_hooks` (`AsyncJIRA`).
+        """
+        session = getattr(jira, "_session", None)
+        if session is not None and hasattr(session, "hooks"):
+            session.hooks["response"].append(self._requests_hook)
+
+        hooks = getattr(jira, "response_hooks", None)
+        if hooks is not None:
+            hooks.append(self.record_response)
+
+    def _requests_hook(self, response, *args, **kwargs):
+        self.record_response(
+            response.url,
+            response.status_code,
+            response.elapsed.total_seconds(),
+            len(response.content or b""),
+        )
+
+    def all_stats(self):
+        """Return the `QueryStats` for each query, and for other requests if
+        there were any.
+        """
+        return list(self.queries.values()) + (
+            [self.other] if self.other.requests else []
+        )
+
+    def to_list(self):
+        """Return the statistics for each query as a list of dicts"""
+        return [stats.to_dict() for stats in self.all_stats()]
+
+
+# Statistic, Prometheus counter name and description
+PROMETHEUS_METRICS = [
+    ("searches", "searches_total", "Number of times the query was run"),
+    ("requests", "requests_total", "HTTP requests made to JIRA"),
+    ("pages", "pages_total", "Pages of search results fetched from JIRA"),
+    ("issues", "issues_total", "Issues returned by JIRA"),
+    ("bytes", "bytes_total", "Bytes received from JIRA"),
+    ("retries", "retries_total", "HTTP requests to JIRA that were retried"),
+    (
+        "duration",
+        "duration_seconds_total",
+        "Seconds spent fetching issues",
+    ),
+]
+
+
+def prometheus_label(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def write_prometheus_file(telemetry, output_file):
+    """Write the query statistics in `telemetry` to `output_file` in the
+    Prometheus text exposition format. The file is replaced atomically, so
+    that it can be read by the node exporter's text file collector.
+    """
+
+    queries = telemetry.to_list()
+    all_stats = telemetry.all_stats()
+    lines = []
+
+    for name, counter, description in PROMETHEUS_METRICS:
+        metric = "jira_agile_metrics_query_%s" % counter
+        lines.append("# HELP %s %s" % (metric, description))
+        lines.append("# TYPE %s counter" % metric)
+        for query in queries:
+            lines.append(
+                '%s{query="%s"} %s'
+                % (
+                    metric,
+                    prometheus_label(query["jql"] or "other"),
+                    query[name],
+                )
+            )
+
+    metric = "jira_agile_metrics_query_latency_seconds"
+    lines.append("# HELP %s Latency of HTTP requests to JIRA" % metric)
+    lines.append("# TYPE %s summary" % metric)
+    for query, stats in zip(queries, all_stats):
+        label = prometheus_label(query["jql"] or "other")
+        lines.append(
+            '%s_sum{query="%s"} %s' % (metric, label, stats.latency_sum)
+        )
+        lines.append(
+            '%s_count{query="%s"} %s' % (metric, label, stats.requests)
+        )
+        for percentile, value in query["latency"].items():
+            lines.append(
+                '%s{query="%s",quantile="%s"} %s'
+                % (metric, label, int(percentile[1:]) / 100, value)
+            )
+
+    logger.info("Writing Prometheus metrics to %s", output_file)
+
+    directory = os.path.dirname(os.path.abspath(output_file))
+    fd, temp_file = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.chmod(temp_file, 0o644)
+        os.replace(temp_file, output_file)
+    except Exception:
+        os.unlink(temp_file)
+        raise
@@ -0,0 +1,122 @@
+import threading
+
+from .telemetry import QueryStats, Telemetry, write_prometheus_file
+
+
+def test_query_stats():
+    stats = QueryStats("project = A")
+    stats.record_response(
+        "https://example.org/rest/api/2/search?jql=x", 200, 0.1, 100
+    )
+    stats.record_response(
+        "https://example.org/rest/api/2/search?jql=y", 429, 0.2, 10
+    )
+    stats.record_response(
+        "https://example.org/rest/api/2/issue/A-1/changelog", 200, 0.3, 50
+    )
+
+    assert stats.requests == 3
+    assert stats.pages == 1
+    assert stats.retries == 0
+    assert stats.bytes == 160
+    assert stats.to_dict()["latency"]["p50"] == 0.2
+
+    # A retry is counted when the request is made again
+    stats.record_response(
+        "https://example.org/rest/api/2/search?jql=y", 200, 0.2, 100
+    )
+    assert stats.retries == 1
+    assert stats.pages == 2
+
+
+def test_query_stats_retries():
+    stats = QueryStats("project = A")
+    url = "https://example.org/rest/api/2/search?jql=x"
+
+    # Server errors are not retried
+    stats.record_response(url, 500, 0.1, 10)
+    stats.record_response(url, 200, 0.1, 10)
+    assert stats.retries == 0
+
+    # Only the requests that followed a retryable response are retries
+    for status_code in [429, 503, 503]:
+        stats.record_response(url, status_code, 0.1, 10)
+    assert stats.retries == 2
+
+
+def test_query_stats_keeps_recent_latencies():
+    class SmallQueryStats(QueryStats):
+        max_latencies = 10
+
+    stats = SmallQueryStats("project = A")
+
+    for n in range(100):
+        stats.record_response(
+            "https://example.org/rest/api/2/search?jql=x", 200, n, 100
+        )
+
+    assert list(stats.latencies) == list(range(90, 100))
+    assert stats.latency_sum == sum(range(100))
+    assert stats.requests == 100
+
+
+def test_telemetry_attributes_responses_to_query():
+    telemetry = Telemetry()
+    stats = telemetry.query("project = A")
+
+    # Not recorded
+    telemetry.record_response("https://example.org/field", 200, 0.1, 1)
+
+    with telemetry.for_query(telemetry.other):
+        telemetry.record_response("https://example.org/field", 200, 0.1, 10)
+
+    with telemetry.for_query(stats):
+        telemetry.record_response("https://example.org/search", 200, 0.1, 20)
+
+        # Other threads are not attributed to the query
+        thread = threading.Thread(
+            target=telemetry.record_response,
+            args=("https://example.org/search", 200, 0.1, 30),
+        )
+        thread.start()
+        thread.join()
+
+        # Nor are responses watched by another `Telemetry`
+        assert Telemetry().current() is None
+
+    assert telemetry.current() is None
+    assert telemetry.query("project = A") is stats
+    assert stats.bytes == 20
+    assert telemetry.other.bytes == 10
+    assert [q["jql"] for q in telemetry.to_list()] == ["project = A", None]
+
+
+def test_write_prometheus_file(tmp_path):
+    telemetry = Telemetry()
+    stats = telemetry.query('project = "A"')
+    stats.searches = 1
+    stats.record_response("https://example.org/search", 200, 0.5, 100)
+
+    output_file = str(tmp_path / "metrics.prom")
+    write_prometheus_file(telemetry, output_file)
+
+    with open(output_file) as f:
+        lines = f.read().splitlines()
+
+    label = 'query="project = \\"A\\""'
+    assert "# TYPE jira_agile_metrics_query_requests_total counter" in lines
+    assert "jira_agile_metrics_query_searches_total{%s} 1" % label in lines
+    assert "jira_agile_metrics_query_bytes_total{%s} 100" % label in lines
+    assert (
+        "# TYPE jira_agile_metrics_query_duration_seconds_total counter"
+        in lines
+    )
+    assert (
+        "jira_agile_metrics_query_latency_seconds_count{%s} 1" % label in lines
+    )
+    assert (
+        'jira_agile_metrics_query_latency_seconds{%s,quantile="0.99"} 0.5'
+        % label
+        in lines
+    )
+    assert list(tmp_path.iterdir()) == [tmp_path / "metrics.prom"]
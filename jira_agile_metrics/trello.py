@@ -97,7 +97,9 @@ class TrelloClient(object):
             {"id": "Flagged", "name": "Flagged"},
         ]
 
-    def search_issues(self, board_name, expand=False, maxResults=None):
+    def search_issues(
+        self, board_name, expand=False, maxResults=None, fields=None
+    ):
         issues = None
         for board in self.boards:
             if board["name"] == board_name:
@@ -1,9 +1,13 @@
+import contextlib
 import datetime
+import importlib
+import json
 import os.path
+import sys
+import threading
 
 import numpy as np
 import pandas as pd
-import seaborn as sns
 
 
 class StatusTypes:
@@ -30,19 +34,211 @@ def to_json_string(value):
         return value
 
 
+def to_json_strings(column):
+    """Return a list of `to_json_string()` of each value in the series
+    `column`, formatting whole columns of dates and numbers at once.
+    """
+
+    if pd.api.types.is_datetime64_dtype(column):
+        return column.dt.strftime("%Y-%m-%d").fillna("").tolist()
+
+    if pd.api.types.is_bool_dtype(column) or (
+        pd.api.types.is_numeric_dtype(column)
+        and not pd.api.types.is_timedelta64_dtype(column)
+    ):
+        # `tolist()` gives Python numbers, so `str()` formats them the same
+        # way, including "nan" for missing floats
+        return list(map(str, column.tolist()))
+
+    if pd.api.types.infer_dtype(column, skipna=True) == "string":
+        values = column.tolist()
+        for i in np.flatnonzero(column.isnull().values):
+            values[i] = to_json_string(values[i])
+        return values
+
+    return list(map(to_json_string, column.tolist()))
+
+
+def write_json_rows(output_file, header, data, columns, chunk_size=10000):
+    """Write `header` and the `columns` of the data frame `data` to
+    `output_file` as a JSON list of lists of strings, formatted with
+    `to_json_string()`. Gives the same output as
+    `json.dumps([header] + [list(map(to_json_string, row)) for row in
+    data[columns].values.tolist()])`, but converts a column at a time and
+    writes `chunk_size` rows at a time, rather than building the whole list.
+    """
+
+    with open(output_file, "w") as out:
+        out.write("[")
+        out.write(json.dumps(header))
+
+        for start in range(0, len(data), chunk_size):
+            chunk = data.iloc[start : start + chunk_size]
+            rows = list(
+                map(
+                    list,
+                    zip(*(to_json_strings(chunk[c]) for c in columns)),
+                )
+            )
+            out.write(", ")
+            out.write(json.dumps(rows)[1:-1])
+
+        out.write("]")
+
+
 def get_extension(filename):
     return os.path.splitext(filename)[1].lower()
 
 
+# Extensions of data files written with `write_arrow_file()`
+ARROW_EXTENSIONS = (".parquet", ".feather")
+
+# Columns with few distinct values, always stored as categories by
+# `arrow_frame()`
+CATEGORY_COLUMNS = ("status", "issue_type", "resolution", "flag")
+
+
+def arrow_category_columns(settings):
+    """Return the names of the configured columns to store as categories,
+    in addition to the `CATEGORY_COLUMNS`: the attributes and the query
+    attribute, if any.
+    """
+    columns = list(settings["attributes"])
+    if settings["query_attribute"]:
+        columns.append(settings["query_attribute"])
+    return columns
+
+
+def arrow_frame(data, category_columns=()):
+    """Return a copy of the data frame `data` with types that Apache Arrow
+    can store: the index as a column (unless it is a plain row number),
+    string column names, strings as categories if they are in one of the
+    `CATEGORY_COLUMNS` or `category_columns`, and other strings as strings,
+    so that the types do not depend on the values. Columns of lists (such
+    as `impediments`) are kept as they are, and stored as nested lists.
+    Other columns of mixed values are converted to strings.
+    """
+
+    category_columns = set(CATEGORY_COLUMNS) | set(category_columns)
+
+    if not isinstance(data.index, pd.RangeIndex):
+        data = data.reset_index()
+    else:
+        data = data.copy()
+
+    data.columns = [str(c) for c in data.columns]
+
+    for name in data.columns:
+        column = data[name]
+        if column.dtype != object:
+            continue
+
+        values = column.dropna()
+        if values.map(lambda v: isinstance(v, str)).all():
+            data[name] = (
+                column.astype("category")
+                if name in category_columns
+                else column.astype("string")
+            )
+        elif not values.map(lambda v: isinstance(v, (list, tuple))).all():
+            data[name] = column.where(column.isnull(), column.astype(str))
+
+    return data
+
+
+def write_arrow_file(data, output_file, category_columns=()):
+    """Write the data frame `data` to `output_file` in the Parquet or
+    Feather format, according to its extension, storing the strings in
+    `category_columns` as categories (see `arrow_frame()`). Requires
+    `pyarrow`.
+    """
+
+    frame = arrow_frame(data, category_columns)
+
+    try:
+        if get_extension(output_file) == ".parquet":
+            frame.to_parquet(output_file, index=False)
+        else:
+            frame.to_feather(output_file)
+    except ImportError as e:
+        from .config import ConfigError
+
+        raise ConfigError(
+            "Writing %s requires the `pyarrow` package. Install it with "
+            "`pip install jira-agile-metrics[parquet]`." % output_file
+        ) from e
+
+
 def to_days_since_epoch(d):
     return (d - datetime.date(1970, 1, 1)).days
 
 
+@contextlib.contextmanager
+def thread_name(name):
+    """Rename the current thread to `name` for the duration of the block,
+    so that its log records can be told apart by `%(threadName)s`.
+    """
+    thread = threading.current_thread()
+    previous = thread.name
+    thread.name = name
+    try:
+        yield
+    finally:
+        thread.name = previous
+
+
+class LazyModule(object):
+    """Stands in for the module `name`, which is imported the first time one
+    of its attributes is used. If given, `on_import` is then called with the
+    module. Used for the plotting and statistics libraries, which are slow
+    to import and only needed when a chart is drawn.
+    """
+
+    def __init__(self, name, on_import=None):
+        self._name = name
+        self._on_import = on_import
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            module = importlib.import_module(self._name)
+            if self._on_import is not None:
+                self._on_import(module)
+            self._module = module
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return "<lazy module %r>" % self._name
+
+
+_chart_context = None
+
+
 def set_chart_context(context):
-    sns.set_context(context)
+    """Set the seaborn plotting context used for charts. If seaborn has not
+    been imported yet, the context is applied when a chart is first drawn
+    (see `apply_chart_context()`).
+    """
+    global _chart_context
+    _chart_context = context
+
+    if "seaborn" in sys.modules:
+        apply_chart_context()
+
+
+def apply_chart_context(module=None):
+    """Apply the context set with `set_chart_context()`. Pass as the
+    `on_import` function of a `LazyModule` for `matplotlib.pyplot`.
+    """
+    if _chart_context is not None:
+        import seaborn as sns
+
+        sns.set_context(_chart_context)
 
 
 def set_chart_style(style="whitegrid", despine=True):
+    import seaborn as sns
+
     sns.set_style(style)
     if despine:
         sns.despine()
@@ -1,6 +1,8 @@
 import datetime
+import json
 import numpy as np
 import pandas as pd
+import pytest
 
 from .utils import (
     get_extension,
@@ -10,7 +12,13 @@ from .utils import (
     breakdown_by_month,
     breakdown_by_month_sum_days,
     to_bin,
+    LazyModule,
+    arrow_frame,
+    arrow_category_columns,
+    write_arrow_file,
+    write_json_rows,
 )
+from .config import ConfigError
 
 
 def test_extend_dict():
@@ -34,6 +42,125 @@ def test_to_json_string():
     assert to_json_string(pd.Timestamp(2018, 2, 1)) == "2018-02-01"
 
 
+def test_arrow_frame():
+    data = pd.DataFrame(
+        {
+            "key": ["A-1", "A-2", "A-3", "A-4"],
+            "status": ["Backlog", "Next", "Done", None],
+            "team": ["A", "B", "A", "C"],
+            "release": ["R1", "R2", "R3", "R4"],
+            "value": [1, "two", None, 4.0],
+            "impediments": [[], [{"flag": "Impediment"}], [], []],
+        },
+        index=pd.Index(["a", "b", "c", "d"], name="id"),
+    )
+
+    frame = arrow_frame(data, ["release"])
+    assert list(frame.columns) == [
+        "id",
+        "key",
+        "status",
+        "team",
+        "release",
+        "value",
+        "impediments",
+    ]
+    assert frame["key"].dtype == "string"
+    assert frame["status"].dtype == "category"
+    assert frame["team"].dtype == "string"
+    assert frame["release"].dtype == "category"
+    assert list(frame["value"]) == ["1", "two", None, "4.0"]
+    assert frame["impediments"][1] == [{"flag": "Impediment"}]
+
+    # The types do not depend on whether values are repeated
+    repeated = data.assign(key="A-1", status="Done", team="A", release="R1")
+    assert [str(t) for t in arrow_frame(repeated, ["release"]).dtypes] == [
+        str(t) for t in frame.dtypes
+    ]
+
+    # The original is unchanged
+    assert data["status"].dtype == object
+
+
+def test_arrow_frame_schema():
+    pa = pytest.importorskip("pyarrow")
+
+    def schema(data):
+        return pa.Schema.from_pandas(
+            arrow_frame(pd.DataFrame(data), ["release"]), preserve_index=False
+        ).remove_metadata()
+
+    unique = {
+        "key": ["A-1", "A-2"],
+        "status": ["Backlog", "Done"],
+        "team": ["A", "B"],
+        "release": ["R1", "R2"],
+        "value": [1, "two"],
+    }
+    repeated = {
+        "key": ["A-1", "A-1"],
+        "status": ["Done", "Done"],
+        "team": ["A", "A"],
+        "release": ["R1", "R1"],
+        "value": ["two", "two"],
+    }
+    assert schema(unique) == schema(repeated)
+
+
+def test_arrow_category_columns():
+    assert arrow_category_columns(
+        {
+            "attributes": {"Team": "Team", "Release": "Fix version/s"},
+            "query_attribute": None,
+        }
+    ) == ["Team", "Release"]
+    assert arrow_category_columns(
+        {"attributes": {}, "query_attribute": "Project"}
+    ) == ["Project"]
+
+
+def test_write_arrow_file_without_pyarrow(tmp_path, monkeypatch):
+    def to_parquet(*args, **kwargs):
+        raise ImportError("Unable to find a usable engine")
+
+    monkeypatch.setattr(pd.DataFrame, "to_parquet", to_parquet)
+
+    with pytest.raises(ConfigError, match="pyarrow"):
+        write_arrow_file(pd.DataFrame({"a": [1]}), str(tmp_path / "a.parquet"))
+
+
+@pytest.mark.parametrize("rows", [0, 1, 5])
+def test_write_json_rows(tmp_path, rows):
+    data = pd.DataFrame(
+        {
+            "key": ["A-1", "A-2", "A-3", "A-4", "A-5"],
+            "resolution": ["Done", None, np.NaN, "", "Done"],
+            "Backlog": pd.to_datetime(
+                ["2018-01-01", None, "2018-01-03", "2018-01-04", None]
+            ),
+            "blocked_days": [0, 1, 2, 3, 4],
+            "points": [1.0, np.NaN, 2.5, 1e16, 0.1],
+            "cycle_time": pd.to_timedelta([1, None, 3, 4, 5], unit="D"),
+            "Release": [["R1", "R2"], None, 3, np.NaN, pd.NaT],
+            "flagged": [True, False, True, False, True],
+        }
+    ).iloc[:rows]
+    columns = list(data.columns)
+    header = ["ID", "Resolution"] + columns[2:]
+
+    output_file = str(tmp_path / "data.json")
+    write_json_rows(output_file, header, data, columns, chunk_size=2)
+
+    with open(output_file) as f:
+        assert f.read() == json.dumps(
+            [header]
+            + [
+                list(map(to_json_string, row))
+                for row in data[columns].values.tolist()
+            ]
+        )
+
+
 def test_to_days_since_epoch():
     assert to_days_since_epoch(datetime.date(1970, 1, 1)) == 0
     assert to_days_since_epoch(datetime.date(1970, 1, 15)) == 14
@@ -520,3 +647,13 @@ def test_to_bin():
     assert to_bin(30, [10, 20, 30]) == (20, 30)
 
     assert to_bin(31, [10, 20, 30]) == (30, None)
+
+
+def test_lazy_module():
+    imported = []
+    module = LazyModule("json", on_import=imported.append)
+    assert imported == []
+
+    assert module.dumps([1]) == "[1]"
+    assert module.loads("[1]") == [1]
+    assert [m.__name__ for m in imported] == ["json"]
@@ -0,0 +1,93 @@
+import datetime
+import logging
+
+from .utils import LazyModule
+
+openpyxl = LazyModule("openpyxl")
+
+logger = logging.getLogger(__name__)
+
+
+class Workbook(object):
+    """An Excel workbook that calculators add sheets to (see
+    `Calculator.write_sheets()`), saved as `output_file` once all sheets
+    have been added.
+
+    The workbook is created in openpyxl's write-only mode, which writes
+    each row to a temporary file as it is added, rather than building the
+    whole workbook in memory.
+    """
+
+    chunk_size = 10000
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.book = openpyxl.Workbook(write_only=True)
+        self.sheets = []
+
+    def add_sheet(self, title, data, columns=None, header=None, index=True):
+        """Add the data frame `data` as a sheet called `title`, with the
+        given `columns` (defaults to all) under the names in `header`
+        (defaults to the column names). If `index` is true, the index is
+        written as the first column.
+        """
+
+        if columns is None:
+            columns = list(data.columns)
+        if header is None:
+            header = [str(c) for c in columns]
+
+        sheet = self.book.create_sheet(title)
+        self.sheets.append(title)
+
+        if index:
+            header = [data.index.name or ""] + header
+        sheet.append(header)
+
+        for start in range(0, len(data), self.chunk_size):
+            chunk = data.iloc[start : start + self.chunk_size]
+            values = [cell_values(chunk[c]) for c in columns]
+            if index:
+                values.insert(0, cell_values(chunk.index.to_series()))
+
+            for row in zip(*values):
+                sheet.append(row)
+
+    def save(self):
+        logger.info(
+            "Writing workbook with sheets %s to %s",
+            ", ".join(self.sheets),
+            self.output_file,
+        )
+        self.book.save(self.output_file)
+
+
+# Types openpyxl writes as they are. Includes `pd.Timestamp` and
+# `pd.Timedelta`, which are subclasses of `datetime` and `timedelta`.
+CELL_TYPES = (
+    str,
+    int,
+    float,
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+)
+
+
+def cell_values(column):
+    """Return a list of the values in the series `column` as values that
+    openpyxl can write to cells: missing values as None, and values that
+    are not numbers, strings, dates or times as strings.
+    """
+
+    values = column.astype(object).where(column.notnull(), None).tolist()
+
+    if column.dtype == object:
+        values = [
+            value
+            if value is None or isinstance(value, CELL_TYPES)
+            else str(value)
+            for value in values
+        ]
+
+    return values
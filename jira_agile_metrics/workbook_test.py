@@ -0,0 +1,79 @@
+import datetime
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from .calculator import Calculator, run_calculators
+from .workbook import Workbook
+
+
+def test_workbook(tmp_path):
+    output_file = str(tmp_path / "metrics.xlsx")
+
+    data = pd.DataFrame(
+        {
+            "key": ["A-1", "A-2", "A-3"],
+            "count": [1, 2, 3],
+            "points": [1.5, np.NaN, 3.0],
+            "done": pd.to_datetime(["2018-01-01", None, "2018-01-03"]),
+            "release": [["R1", "R2"], None, "R3"],
+        },
+        index=pd.Index([10, 11, 12], name="id"),
+    )
+
+    workbook = Workbook(output_file)
+    workbook.chunk_size = 2
+    workbook.add_sheet("Everything", data)
+    workbook.add_sheet(
+        "Some",
+        data,
+        columns=["key", "done"],
+        header=["ID", "Done"],
+        index=False,
+    )
+    workbook.save()
+
+    book = openpyxl.load_workbook(output_file)
+    assert book.sheetnames == ["Everything", "Some"]
+
+    assert list(book["Everything"].values) == [
+        ("id", "key", "count", "points", "done", "release"),
+        (10, "A-1", 1, 1.5, datetime.datetime(2018, 1, 1), "['R1', 'R2']"),
+        (11, "A-2", 2, None, None, None),
+        (12, "A-3", 3, 3, datetime.datetime(2018, 1, 3), "R3"),
+    ]
+    assert list(book["Some"].values) == [
+        ("ID", "Done"),
+        ("A-1", datetime.datetime(2018, 1, 1)),
+        ("A-2", None),
+        ("A-3", datetime.datetime(2018, 1, 3)),
+    ]
+
+
+def test_run_calculators_writes_workbook(tmp_path):
+    class First(Calculator):
+        def run(self):
+            return pd.DataFrame({"a": [1, 2]})
+
+        def write_sheets(self, workbook):
+            workbook.add_sheet("First", self.get_result(), index=False)
+
+    class NoSheets(Calculator):
+        pass
+
+    class Second(Calculator):
+        def run(self):
+            return pd.DataFrame({"b": ["x"]})
+
+        def write_sheets(self, workbook):
+            workbook.add_sheet("Second", self.get_result(), index=False)
+
+    output_file = str(tmp_path / "metrics.xlsx")
+    run_calculators(
+        [First, NoSheets, Second], object(), {"workbook": output_file}
+    )
+
+    book = openpyxl.load_workbook(output_file)
+    assert book.sheetnames == ["First", "Second"]
+    assert list(book["First"].values) == [("a",), (1,), (2,)]
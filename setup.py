@@ -22,10 +22,17 @@ setup(
     url="https://github.com/optilude/jira-agile-metrics",
     license="MIT",
     keywords="agile jira analytics metrics",
-    packages=find_packages(exclude=["contrib", "docs", "tests*"]),
+    packages=find_packages(
+        exclude=["contrib", "docs", "tests*", "benchmarks", "benchmarks.*"]
+    ),
     install_requires=install_requires,
+    extras_require={
+        "async": ["httpx", "h2"],
+        "parquet": ["pyarrow"],
+        "benchmarks": ["pytest", "pytest-benchmark"],
+    },
     setup_requires=["pytest-runner"],
-    tests_require=["pytest", "mock", "pytest-mock"],
+    tests_require=["pytest", "mock", "pytest-mock", "pyarrow"],
     include_package_data=True,
     package_data={
         "jira_agile_metrics.webapp": ["templates/*.*", "static/*.*"],